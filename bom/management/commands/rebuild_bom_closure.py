@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from bom.models import BomClosure
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the BomClosure table from the live BOM lines'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = BomClosure.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} BOM closure rows'))
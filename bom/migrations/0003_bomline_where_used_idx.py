@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bom', '0002_bom_uom_historicalbom_uom_alter_bom_unique_together_and_more'),
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bomline',
+            index=models.Index(fields=['component', 'bom'], name='bomline_where_used_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:10
+
+import django.db.models.deletion
+from collections import Counter, defaultdict
+from django.db import migrations, models
+
+
+def backfill_bom_closure(apps, schema_editor):
+    BomLine = apps.get_model('bom', 'BomLine')
+    BomClosure = apps.get_model('bom', 'BomClosure')
+    Material = apps.get_model('core', 'Material')
+    graph = defaultdict(Counter)
+    live = BomLine.objects.filter(deleted__isnull=True, bom__deleted__isnull=True)
+    for product_id, component_id in live.values_list('bom__product_id', 'component_id'):
+        graph[product_id][component_id] += 1
+    below = {}
+
+    def walk(product_id, path=()):
+        if product_id in below:
+            return below[product_id]
+        if product_id in path:
+            # A closure cannot hold a cycle, name the products so the data can be fixed first
+            cycle = path[path.index(product_id):] + (product_id,)
+            names = dict(Material.objects.filter(pk__in=cycle).values_list('pk', 'name'))
+            raise RuntimeError(
+                "BOM cycle found, remove one of these BOM lines and run migrate again: "
+                + " -> ".join(f"{names.get(pk, pk)} (#{pk})" for pk in cycle)
+            )
+        paths = Counter()
+        for component_id, count in graph.get(product_id, {}).items():
+            paths[component_id] += count
+            for descendant_id, descendant_paths in walk(component_id, path + (product_id,)).items():
+                paths[descendant_id] += count * descendant_paths
+        below[product_id] = paths
+        return paths
+
+    BomClosure.objects.bulk_create([
+        BomClosure(ancestor_id=product_id, descendant_id=descendant_id, paths=paths)
+        for product_id in list(graph)
+        for descendant_id, paths in walk(product_id).items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bom', '0003_bomline_where_used_idx'),
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BomClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('paths', models.PositiveIntegerField(default=1, verbose_name='Yol sayısı')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.material', verbose_name='Üst Malzeme')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.material', verbose_name='Alt Malzeme')),
+            ],
+            options={
+                'verbose_name': 'Reçete Kapanışı',
+                'verbose_name_plural': 'Reçete Kapanışları',
+                'indexes': [models.Index(fields=['descendant', 'ancestor'], name='bomclosure_desc_anc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='bomclosure_anc_desc_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_bom_closure, migrations.RunPython.noop),
+    ]
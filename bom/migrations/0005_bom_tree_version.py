@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bom', '0004_bomclosure'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bom',
+            name='tree_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -1 +1,2 @@
-from .bom import Bom, BomLine
\ No newline at end of file
+from .bom import Bom, BomLine
+from .bom_closure import BomClosure
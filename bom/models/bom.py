@@ -15,7 +15,9 @@ class Bom(SafeDeleteModel):
     uom = UOMField(null=False, blank=False, default=None)
     labor_cost = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), validators=[MinValueValidator(Decimal('0.00'))])
     machining_cost = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'), validators=[MinValueValidator(Decimal('0.00'))])
-    history = HistoricalRecords()
+    # Bumped whenever anything in the expanded tree changes, keys the tree cache and its ETag
+    tree_version = models.PositiveIntegerField(default=0, editable=False)
+    history = HistoricalRecords(excluded_fields=['tree_version'])
     
     class Meta:
         unique_together = ['product', 'uom']
@@ -24,35 +26,32 @@ class Bom(SafeDeleteModel):
     @property
     def latest_cost(self):
         """
-        Calculates the total latest cost of all components in the BOM using VariableCost records 
-        that match the UOM specified in each BOM line.
+        Rolled up cost of one unit: components, multi-level through sub-assembly
+        BOMs, plus labor_cost and machining_cost. Component costs are the latest
+        VariableCost records that match the UOM of each BOM line.
         Returns None if any component has no cost for the required UOM, if labor_cost or machining_cost is missing,
-        or if the BOM has no lines.
+        if the BOM has no lines or if it reaches itself through a cycle.
+        For many BOMs at once use bom.services.costing.BomCostRollup directly.
         """
-        if self.labor_cost is None or self.machining_cost is None:
-            return None
-            
-        lines = self.lines.all()
-        
-        # Return None if BOM has no lines
-        if not lines.exists():
+        from bom.services.costing import BomCostRollup
+        from bom.services.explosion import BomCycleError
+        try:
+            return BomCostRollup.for_products([self.product_id]).cost(self.product_id)
+        except BomCycleError:
             return None
-            
-        total = 0
-        
-        for line in lines:
-            # Get the latest cost for this material with matching UOM
-            material_cost = line.component.latest_cost_for_uom(line.uom)
-            
-            if material_cost is None:
-                return None
-            
-            total += material_cost * line.quantity
-        
-        return total + self.labor_cost + self.machining_cost
     
     def __str__(self):
         return f"BOM for {self.product.name}"
+
+    def save(self, *args, **kwargs):
+        # tree_version is only moved by an UPDATE ... SET tree_version = tree_version + 1,
+        # a stale instance must never write an older value back
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'tree_version'
+            ]
+        super().save(*args, **kwargs)
     
     def clean(self):
         if self.pk and self.lines.filter(component=self.product).exists():
@@ -69,6 +68,10 @@ class BomLine(SafeDeleteModel):
     
     class Meta:
         unique_together = ['bom', 'component', 'uom']
+        indexes = [
+            # Where-used: which BOMs consume a component
+            models.Index(fields=['component', 'bom'], name='bomline_where_used_idx'),
+        ]
     
     def __str__(self):
         return f"{self.component.name} x {self.quantity} {self.uom}"
@@ -82,15 +85,6 @@ class BomLine(SafeDeleteModel):
         if self.bom and self.component == self.bom.product:
             raise ValidationError(_("Bir Reçete satırının bileşeni, Reçete'nin ürünü ile aynı olamaz."))
 
-        visited = set()
-        current_material = self.component
-        while True:
-            if current_material == self.bom.product:
-                raise ValidationError(_("Döngüsel Reçete ilişkisi: Bu bileşen, Reçete'nin ürünü ile dolaylı olarak aynı olamaz."))
-            bom = getattr(current_material, 'bom', None)
-            if not bom or not hasattr(bom, 'product'):
-                break
-            if current_material.pk in visited:
-                break
-            visited.add(current_material.pk)
-            current_material = bom.product
\ No newline at end of file
+        from bom.models import BomClosure
+        if self.bom and BomClosure.objects.filter(ancestor_id=self.component_id, descendant_id=self.bom.product_id).exists():
+            raise ValidationError(_("Döngüsel Reçete ilişkisi: Bu bileşen, Reçete'nin ürünü ile dolaylı olarak aynı olamaz."))
@@ -0,0 +1,117 @@
+from collections import Counter, defaultdict
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class BomClosure(models.Model):
+    """
+    Transitive closure of the live BOM graph: one row per (ancestor,
+    descendant) pair of materials where the descendant is used somewhere
+    below the ancestor, with the number of distinct line paths between them.
+    Counting paths lets an edge be removed without re-walking the graph.
+    Maintained by the BomLine and Bom signals in bom/signals.py, rebuilt
+    with `manage.py rebuild_bom_closure`.
+    """
+    ancestor =   models.ForeignKey('core.Material', verbose_name=_("Üst Malzeme"), related_name='+', on_delete=models.CASCADE)
+    descendant = models.ForeignKey('core.Material', verbose_name=_("Alt Malzeme"), related_name='+', on_delete=models.CASCADE)
+    paths =      models.PositiveIntegerField(_("Yol sayısı"), default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='bomclosure_anc_desc_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'ancestor'], name='bomclosure_desc_anc_idx'),
+        ]
+        verbose_name = _("Reçete Kapanışı")
+        verbose_name_plural = _("Reçete Kapanışları")
+
+    @classmethod
+    def add_edges(cls, product_id, component_ids, sign=1):
+        """
+        Adds (sign=1) or removes (sign=-1) the edges product -> component, one
+        per live line, and updates every pair of their ancestors and descendants.
+        """
+        edges = Counter(component_ids)
+        if not edges:
+            return
+        up = {product_id: 1}
+        up.update(cls.objects.filter(descendant_id=product_id).values_list('ancestor_id', 'paths'))
+        down = defaultdict(dict)
+        for component_id in edges:
+            down[component_id][component_id] = 1
+        for ancestor_id, descendant_id, paths in cls.objects.filter(ancestor_id__in=edges).values_list('ancestor_id', 'descendant_id', 'paths'):
+            down[ancestor_id][descendant_id] = paths
+
+        deltas = Counter()
+        for component_id, count in edges.items():
+            for ancestor_id, up_paths in up.items():
+                for descendant_id, down_paths in down[component_id].items():
+                    deltas[(ancestor_id, descendant_id)] += sign * count * up_paths * down_paths
+        cls.apply(deltas)
+
+    @classmethod
+    def apply(cls, deltas):
+        """Applies {(ancestor_id, descendant_id): path delta}, dropping pairs left without paths."""
+        rows = {
+            (row.ancestor_id, row.descendant_id): row
+            for row in cls.objects.select_for_update().filter(
+                ancestor_id__in={ancestor_id for ancestor_id, _descendant_id in deltas},
+                descendant_id__in={descendant_id for _ancestor_id, descendant_id in deltas},
+            ).order_by('pk')
+        }
+        created, updated, emptied = [], [], []
+        for (ancestor_id, descendant_id), delta in deltas.items():
+            if not delta:
+                continue
+            row = rows.get((ancestor_id, descendant_id))
+            if row is None:
+                if delta > 0:
+                    created.append(cls(ancestor_id=ancestor_id, descendant_id=descendant_id, paths=delta))
+                continue
+            row.paths += delta
+            (updated if row.paths > 0 else emptied).append(row)
+        cls.objects.bulk_create(created)
+        cls.objects.bulk_update(updated, ['paths'])
+        if emptied:
+            cls.objects.filter(pk__in=[row.pk for row in emptied]).delete()
+
+    @classmethod
+    def rebuild(cls):
+        """Recreates every row from the live BOM lines. Returns the row count."""
+        from bom.models import BomLine
+        graph = defaultdict(Counter)
+        for product_id, component_id in BomLine.objects.filter(bom__deleted__isnull=True).values_list('bom__product_id', 'component_id'):
+            graph[product_id][component_id] += 1
+        below = {}
+
+        def walk(product_id, path=()):
+            if product_id in below:
+                return below[product_id]
+            if product_id in path:
+                raise ValueError(f"BOM cycle through material {product_id}")
+            paths = Counter()
+            for component_id, count in graph.get(product_id, {}).items():
+                paths[component_id] += count
+                for descendant_id, descendant_paths in walk(component_id, path + (product_id,)).items():
+                    paths[descendant_id] += count * descendant_paths
+            below[product_id] = paths
+            return paths
+
+        cls.objects.all().delete()
+        created = cls.objects.bulk_create([
+            cls(ancestor_id=product_id, descendant_id=descendant_id, paths=paths)
+            for product_id in list(graph)
+            for descendant_id, paths in walk(product_id).items()
+        ], batch_size=1000)
+        return len(created)
+
+    @classmethod
+    def descendants(cls, product_id):
+        """Ids of every material used anywhere below product_id."""
+        return set(cls.objects.filter(ancestor_id=product_id).values_list('descendant_id', flat=True))
+
+    @classmethod
+    def ancestors(cls, material_ids):
+        """Ids of every product using one of material_ids anywhere in its BOM."""
+        return set(cls.objects.filter(descendant_id__in=set(material_ids)).values_list('ancestor_id', flat=True))
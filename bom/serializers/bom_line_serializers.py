@@ -1,12 +1,11 @@
 from rest_framework import serializers
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
 from bom.models import BomLine
 from django.utils.translation import gettext_lazy as _
 
 
-class BomLineSerializer(serializers.ModelSerializer):
+class BomLineSerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
     
-    created_by = serializers.SerializerMethodField()
-    created_at = serializers.SerializerMethodField()
     uom = serializers.CharField()
     material_internal_code = serializers.SerializerMethodField()
     
@@ -27,22 +26,6 @@ class BomLineSerializer(serializers.ModelSerializer):
             'material_internal_code'
         ]
         
-    def get_created_by(self, obj):
-        first_history = getattr(obj, 'history', None)
-        if first_history:
-            first_history = first_history.order_by('history_date').first()
-            if first_history and hasattr(first_history, 'history_user') and first_history.history_user:
-                return str(first_history.history_user)
-        return None
-
-    def get_created_at(self, obj):
-        first_history = getattr(obj, 'history', None)
-        if first_history:
-            first_history = first_history.order_by('history_date').first()
-            if first_history:
-                return first_history.history_date
-        return None
-    
     def get_material_internal_code(self, obj):
         if obj.component and hasattr(obj.component, 'internal_code'):
             return obj.component.internal_code
@@ -1,13 +1,13 @@
 from rest_framework import serializers
-from bom.models import Bom, BomLine
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
+from bom.models import Bom, BomClosure, BomLine
 from bom.serializers.bom_line_serializers import BomLineSerializer
+from bom.services.explosion import BomCycleError
 from django.utils.translation import gettext_lazy as _
 
 
-class BomSerializer(serializers.ModelSerializer):
+class BomSerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
     
-    created_by = serializers.SerializerMethodField()
-    created_at = serializers.SerializerMethodField()
     uom = serializers.CharField()
     lines = serializers.ListField(child=serializers.DictField(), write_only=True, required=False)
     material_internal_code = serializers.SerializerMethodField()
@@ -34,29 +34,21 @@ class BomSerializer(serializers.ModelSerializer):
             'latest_cost',
         ]
         
-    def get_created_by(self, obj):
-        first_history = getattr(obj, 'history', None)
-        if first_history:
-            first_history = first_history.order_by('history_date').first()
-            if first_history and hasattr(first_history, 'history_user') and first_history.history_user:
-                return str(first_history.history_user)
-        return None
-
-    def get_created_at(self, obj):
-        first_history = getattr(obj, 'history', None)
-        if first_history:
-            first_history = first_history.order_by('history_date').first()
-            if first_history:
-                return first_history.history_date
-        return None
-    
     def get_material_internal_code(self, obj):
         if obj.product and hasattr(obj.product, 'internal_code'):
             return obj.product.internal_code
         return None
     
     def get_latest_cost(self, obj):
-        return obj.latest_cost
+        # The views hand in a rollup prepared for the whole page
+        rollup = self.context.get('cost_rollup')
+        if rollup is None:
+            return obj.latest_cost
+        try:
+            return rollup.cost(obj.product_id)
+        except BomCycleError:
+            # A cyclic BOM has no cost, the rest of the page still has one
+            return None
     
     
     # Intentional bulk create modification to 
@@ -82,8 +74,10 @@ class BomSerializer(serializers.ModelSerializer):
                 
         if bom_lines:
             BomLine.objects.bulk_create(bom_lines)
-            from bom.signals import create_variable_cost_for_bom_instance
-            create_variable_cost_for_bom_instance(bom)
+            # bulk_create sends no signals, the closure table is updated here
+            BomClosure.add_edges(bom.product_id, [line.component_id for line in bom_lines])
+            from bom.signals import mark_bom_dirty
+            mark_bom_dirty(bom.pk)
         
         return bom
     
@@ -92,7 +86,8 @@ class BomSerializer(serializers.ModelSerializer):
         action = self.context.get('action')
         
         if action == 'list':
-            representation['count_of_lines'] = instance.lines.count()
+            line_count = getattr(instance, 'line_count', None)
+            representation['count_of_lines'] = line_count if line_count is not None else instance.lines.count()
         
         elif action == 'retrieve':
             lines = instance.lines.all()
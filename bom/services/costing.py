@@ -0,0 +1,99 @@
+"""
+Batched BOM cost rollup.
+
+The latest VariableCost of every (component, uom) pair in a BOM graph is
+fetched in one query, then BOM costs are rolled up bottom-up over the
+graph loaded by BomExplosion. A component that has a BOM in the line's uom
+is costed by rolling its own BOM up, falling back to its latest
+VariableCost when that BOM cannot be costed. Rolled up costs are memoized,
+so a page of BOMs sharing sub-assemblies costs each of them once.
+"""
+from decimal import Decimal
+from django.apps import apps
+from bom.services.explosion import BomCycleError, BomExplosion
+
+
+def latest_costs(pairs):
+    """
+    Latest VariableCost.cost for each (material_id, uom) pair, read from the
+    CurrentCost projection in one query. Pairs without a cost are left out.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+    CurrentCost = apps.get_model('sales', 'CurrentCost')
+    rows = CurrentCost.objects.filter(
+        material_id__in={material_id for material_id, _uom in pairs},
+        uom__in={uom for _material_id, uom in pairs},
+    ).values_list('material_id', 'uom', 'cost')
+    return {(material_id, uom): cost for material_id, uom, cost in rows if (material_id, uom) in pairs}
+
+
+class BomCostRollup:
+
+    def __init__(self, explosion=None):
+        self.explosion = explosion or BomExplosion()
+        self.latest = {}
+        self._costs = {}
+        self._in_progress = set()
+
+    @classmethod
+    def for_products(cls, product_ids, explosion=None):
+        """Loads the graph below product_ids and the latest costs it needs."""
+        rollup = cls(explosion)
+        rollup.prepare(product_ids)
+        return rollup
+
+    def prepare(self, product_ids):
+        self.explosion.load(product_ids)
+        pairs = {
+            (line.component_id, line.uom)
+            for bom in self.explosion.boms.values() if bom is not None
+            for line in bom.lines.all()
+        }
+        missing = pairs - set(self.latest)
+        self.latest.update(latest_costs(missing))
+        for pair in missing:
+            self.latest.setdefault(pair, None)
+
+    def cost(self, product_id, uom=None):
+        """
+        Cost of one unit of the product's BOM: components plus labor and
+        machining. None when a component has no cost or the BOM has no lines.
+        """
+        bom = self.explosion.bom_for(product_id, uom)
+        if bom is None:
+            return None
+        if product_id in self._costs:
+            return self._costs[product_id]
+        if product_id in self._in_progress:
+            raise BomCycleError(f"BOM cycle through material {product_id}")
+        self._in_progress.add(product_id)
+        try:
+            self._costs[product_id] = self._rollup(bom)
+        finally:
+            self._in_progress.discard(product_id)
+        return self._costs[product_id]
+
+    def component_cost(self, component_id, uom):
+        if (component_id, uom) not in self.latest:
+            self.prepare([component_id])
+        if self.explosion.bom_for(component_id, uom) is not None:
+            rolled = self.cost(component_id, uom)
+            if rolled is not None:
+                return rolled
+        return self.latest.get((component_id, uom))
+
+    def _rollup(self, bom):
+        if bom.labor_cost is None or bom.machining_cost is None:
+            return None
+        lines = bom.lines.all()
+        if not lines:
+            return None
+        total = Decimal('0')
+        for line in lines:
+            component_cost = self.component_cost(line.component_id, line.uom)
+            if component_cost is None:
+                return None
+            total += component_cost * line.quantity
+        return total + bom.labor_cost + bom.machining_cost
@@ -0,0 +1,115 @@
+"""
+Multi-level BOM explosion.
+
+The BOM graph below a set of products is loaded level by level, two
+queries per level (boms and their lines), and kept in memory. Exploding a
+product flattens it into leaf components multiplied through every level;
+the result per sub-assembly is memoized, so exploding hundreds of finished
+goods that share sub-assemblies walks each of them only once.
+
+A component is expanded when it has a BOM whose uom is the uom the line
+asks for. Otherwise it is a leaf, since there is no conversion between
+units.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db.models import Prefetch
+from bom.models import Bom, BomLine
+
+
+class BomCycleError(ValueError):
+    pass
+
+
+class BomExplosion:
+
+    def __init__(self):
+        self.boms = {}  # product_id -> Bom with prefetched lines, None when there is none
+        self._leaves = {}  # product_id -> {(component_id, uom): quantity per unit}
+
+    def load(self, product_ids):
+        """Fetches the BOMs of product_ids and everything below them, one level per round trip."""
+        frontier = {pk for pk in product_ids if pk not in self.boms}
+        while frontier:
+            boms = (
+                Bom.objects.filter(product_id__in=frontier)
+                .prefetch_related(Prefetch('lines', queryset=BomLine.objects.order_by('pk')))
+            )
+            for product_id in frontier:
+                self.boms[product_id] = None
+            next_frontier = set()
+            for bom in boms:
+                self.boms[bom.product_id] = bom
+                next_frontier.update(line.component_id for line in bom.lines.all())
+            frontier = {pk for pk in next_frontier if pk not in self.boms}
+
+    def bom_for(self, product_id, uom=None):
+        """The BOM a line of this product and uom would be built from."""
+        self.load([product_id])
+        bom = self.boms[product_id]
+        if bom is None or (uom is not None and bom.uom != uom):
+            return None
+        return bom
+
+    def children(self, product_id, uom=None):
+        """Direct lines of the product's BOM as [(component_id, uom, quantity)]."""
+        bom = self.bom_for(product_id, uom)
+        if bom is None:
+            return []
+        return [(line.component_id, line.uom, line.quantity) for line in bom.lines.all()]
+
+    def leaves(self, product_id, uom=None, _path=()):
+        """
+        Leaf components needed for one unit of the product,
+        as {(component_id, uom): quantity}. Memoized per product.
+        """
+        if product_id in _path:
+            raise BomCycleError(f"BOM cycle through material {product_id}")
+        bom = self.bom_for(product_id, uom)
+        if bom is None:
+            return {(product_id, uom): Decimal('1')}
+        if product_id in self._leaves:
+            return self._leaves[product_id]
+        self.load({line.component_id for line in bom.lines.all()})
+        totals = defaultdict(Decimal)
+        for line in bom.lines.all():
+            if self.bom_for(line.component_id, line.uom) is None:
+                totals[(line.component_id, line.uom)] += line.quantity
+                continue
+            for key, quantity in self.leaves(line.component_id, line.uom, _path + (product_id,)).items():
+                totals[key] += quantity * line.quantity
+        self._leaves[product_id] = dict(totals)
+        return self._leaves[product_id]
+
+    def explode(self, product_id, quantity=Decimal('1'), uom=None):
+        """Flattened leaf requirements for quantity units of the product."""
+        return {key: per_unit * quantity for key, per_unit in self.leaves(product_id, uom).items()}
+
+    def explode_many(self, demands):
+        """
+        Sums the leaf requirements of [(product_id, uom, quantity)]. The graph
+        of all products is loaded together, shared sub-assemblies are walked once.
+        """
+        self.load({product_id for product_id, _uom, _quantity in demands})
+        totals = defaultdict(Decimal)
+        for product_id, uom, quantity in demands:
+            for key, required in self.explode(product_id, quantity, uom).items():
+                totals[key] += required
+        return dict(totals)
+
+    def uses(self, product_id, material_id):
+        """True when material_id appears anywhere below product_id, whatever the uoms."""
+        seen = set()
+        frontier = {product_id}
+        while frontier:
+            self.load(frontier)
+            seen |= frontier
+            components = {
+                line.component_id
+                for pk in frontier if self.boms[pk] is not None
+                for line in self.boms[pk].lines.all()
+            }
+            if material_id in components:
+                return True
+            frontier = components - seen
+        return False
@@ -0,0 +1,75 @@
+"""
+Fully expanded BOM trees for the shop floor.
+
+A tree is built from the graph BomExplosion loads level by level,
+serialized depth-first once and cached under (bom_id, tree_version).
+Bom.tree_version is bumped by the simple_history signals in bom/signals.py
+for the BOM itself and, through the BomClosure table, for every BOM above
+a changed BOM, line or material. Old entries are never read again and
+simply expire, and the version doubles as the ETag of the response.
+"""
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import models
+from bom.models import Bom, BomClosure
+from bom.services.explosion import BomCycleError, BomExplosion
+from core.models import Material
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def cache_key(bom):
+    return f"bom-tree:{bom.pk}:{bom.tree_version}"
+
+
+def etag(bom):
+    return f'"bom-{bom.pk}-{bom.tree_version}"'
+
+
+def bump_tree_versions(material_ids):
+    """Invalidates the trees of the BOMs of material_ids and of every BOM above them."""
+    product_ids = set(material_ids) | BomClosure.ancestors(material_ids)
+    Bom.objects.filter(product_id__in=product_ids).update(tree_version=models.F('tree_version') + 1)
+
+
+def build_tree(bom):
+    explosion = BomExplosion()
+    explosion.load([bom.product_id])
+    materials = {
+        material.pk: material
+        for material in Material.objects.filter(pk__in=explosion.boms).only('name', 'internal_code')
+    }
+
+    def node(material_id, uom, quantity, total, sub_bom, path=()):
+        if material_id in path:
+            raise BomCycleError(f"BOM cycle through material {material_id}")
+        material = materials.get(material_id)
+        children = []
+        if sub_bom is not None:
+            for line in sub_bom.lines.all():
+                child_total = total * line.quantity
+                children.append(node(
+                    line.component_id, line.uom, line.quantity, child_total,
+                    explosion.bom_for(line.component_id, line.uom), path + (material_id,),
+                ))
+        return {
+            'material': material_id,
+            'internal_code': getattr(material, 'internal_code', None),
+            'name': getattr(material, 'name', None),
+            'uom': uom,
+            'quantity': quantity,
+            'total_quantity': total,
+            'bom': sub_bom.pk if sub_bom is not None else None,
+            'children': children,
+        }
+
+    root = explosion.bom_for(bom.product_id)
+    return node(bom.product_id, bom.uom, Decimal('1'), Decimal('1'), root)
+
+
+def cached_tree(bom):
+    tree = cache.get(cache_key(bom))
+    if tree is None:
+        tree = build_tree(bom)
+        cache.set(cache_key(bom), tree, CACHE_TIMEOUT)
+    return tree
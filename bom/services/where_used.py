@@ -0,0 +1,65 @@
+"""
+Where-used lookups over BOM lines (component -> BOMs using it).
+
+Direct users come from the bomline_where_used_idx index, users at any
+depth from the BomClosure table, so finding every product affected by a
+component cost change takes two queries whatever the depth of the graph.
+"""
+from collections import defaultdict
+from bom.models import BomClosure, BomLine
+
+
+def parents(material_ids):
+    """{component_id: {product_id of every BOM using it directly}}"""
+    found = defaultdict(set)
+    rows = (
+        BomLine.objects.filter(component_id__in=set(material_ids), bom__deleted__isnull=True)
+        .values_list('component_id', 'bom__product_id')
+        .distinct()
+    )
+    for component_id, product_id in rows:
+        found[component_id].add(product_id)
+    return found
+
+
+def ancestors(material_ids):
+    """
+    Every product that uses one of material_ids at any depth, with the edges
+    between them: returns (products, {product_id: {child product ids}}).
+    Children are only the materials in material_ids or in products.
+    """
+    products = BomClosure.ancestors(material_ids)
+    edges = defaultdict(set)
+    rows = (
+        BomLine.objects.filter(
+            bom__product_id__in=products, bom__deleted__isnull=True,
+            component_id__in=products | set(material_ids),
+        )
+        .values_list('bom__product_id', 'component_id')
+        .distinct()
+    )
+    for product_id, component_id in rows:
+        edges[product_id].add(component_id)
+    return products, edges
+
+
+def topological_order(products, edges):
+    """
+    Orders products so every sub-assembly comes before the BOMs using it.
+    Products caught in a cycle are left out.
+    """
+    pending = {product_id: {child for child in edges.get(product_id, ()) if child in products} for product_id in products}
+    users = defaultdict(set)
+    for product_id, children in pending.items():
+        for child in children:
+            users[child].add(product_id)
+    ready = sorted(product_id for product_id, children in pending.items() if not children)
+    ordered = []
+    while ready:
+        product_id = ready.pop(0)
+        ordered.append(product_id)
+        for user in sorted(users[product_id]):
+            pending[user].discard(product_id)
+            if not pending[user]:
+                ready.append(user)
+    return ordered
@@ -1,12 +1,28 @@
-from django.db.models.signals import post_save
+import threading
+import weakref
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.apps import apps
-from bom.models import Bom, BomLine
+from safedelete.signals import post_softdelete, post_undelete
+from simple_history.signals import post_create_historical_record
+from bom.models import Bom, BomClosure, BomLine
+from core.models import Material
+from sales.models import VariableCost
 
 
-def create_variable_cost_for_bom_instance(bom_instance):
+def schedule_recost(material_id):
+    """Re-costs the BOMs above material_id on Celery once the transaction commits."""
+    from bom.tasks import recost_ancestors
+    transaction.on_commit(lambda: recost_ancestors.delay([material_id]))
+
+
+def create_variable_cost_for_bom_instance(bom_instance, rollup=None):
     VariableCost = apps.get_model('sales', 'VariableCost')
-    latest_cost = bom_instance.latest_cost
+    if rollup is None:
+        latest_cost = bom_instance.latest_cost
+    else:
+        latest_cost = rollup.cost(bom_instance.product_id, bom_instance.uom)
     if latest_cost is not None and latest_cost > 0:        
         
         VariableCost.objects.create(
@@ -16,15 +32,155 @@ def create_variable_cost_for_bom_instance(bom_instance):
             currency='TRY',
             uom=bom_instance.uom
         )
+        schedule_recost(bom_instance.product_id)
+
+
+# The BOMs edited in the running transaction, per thread and connection
+# alias. Each entry is a weak reference to the one on_commit callback that
+# recosts them: a rollback discards the callback, the reference dies with it
+# and the next edit starts a new set.
+_dirty = threading.local()
+
+
+class PendingRecost:
+    """The on_commit callback recosting the BOMs edited in one transaction."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.bom_ids = set()
+
+    def __call__(self):
+        ref = _dirty.boms.get(self.alias)
+        if ref is not None and ref() is self:
+            del _dirty.boms[self.alias]
+        recost_dirty_boms(self.bom_ids)
+
+
+def mark_bom_dirty(bom_id):
+    """
+    Queues a recost of the BOM for when the transaction commits. Editing many
+    lines of one BOM in a transaction then records a single VariableCost.
+    A BOM edited in a savepoint that is rolled back while the transaction goes
+    on is still recosted, which records its unchanged cost once more.
+    """
+    alias = transaction.get_connection().alias
+    if not hasattr(_dirty, 'boms'):
+        _dirty.boms = {}
+    ref = _dirty.boms.get(alias)
+    pending = ref() if ref is not None else None
+    if pending is not None:
+        pending.bom_ids.add(bom_id)
+        return
+    pending = PendingRecost(alias)
+    pending.bom_ids.add(bom_id)
+    _dirty.boms[alias] = weakref.ref(pending)
+    # Outside a transaction this runs right away
+    transaction.on_commit(pending, using=alias)
+
+
+def recost_dirty_boms(bom_ids):
+    boms = list(Bom.objects.filter(pk__in=bom_ids).select_related('product'))
+    if not boms:
+        return
+    from bom.services.costing import BomCostRollup
+    rollup = BomCostRollup.for_products([bom.product_id for bom in boms])
+    with transaction.atomic():
+        for bom in boms:
+            create_variable_cost_for_bom_instance(bom, rollup)
 
 
 @receiver(post_save, sender=Bom)
 def create_variable_cost_from_bom(sender, instance, created, **kwargs):
     # Only trigger for updates, not creation (creation is handled by serializer)
     if not created:
-        create_variable_cost_for_bom_instance(instance)
+        mark_bom_dirty(instance.pk)
 
 
 @receiver(post_save, sender=BomLine)
 def create_variable_cost_from_bomline(sender, instance, created, **kwargs):
-    create_variable_cost_for_bom_instance(instance.bom)
+    mark_bom_dirty(instance.bom_id)
+
+
+@receiver(post_save, sender=VariableCost)
+@receiver(post_softdelete, sender=VariableCost)
+@receiver(post_undelete, sender=VariableCost)
+def recost_boms_using_material(sender, instance, **kwargs):
+    # BOM sourced costs come from the recost job itself, or schedule it above
+    if instance.bom_id is None:
+        schedule_recost(instance.material_id)
+
+
+# Closure table upkeep. Soft delete and undelete go through save(), so
+# comparing the live edge before and after each save covers them too.
+
+def live_bom_product(bom_id):
+    return Bom.objects.filter(pk=bom_id).values_list('product_id', flat=True).first()
+
+
+def live_line_edge(line_id):
+    """(product_id, component_id) of a line in a live BOM, None otherwise."""
+    row = BomLine.all_objects.filter(pk=line_id).values_list(
+        'bom__product_id', 'component_id', 'deleted', 'bom__deleted'
+    ).first()
+    if row is None or row[2] is not None or row[3] is not None:
+        return None
+    return row[:2]
+
+
+@receiver(pre_save, sender=BomLine)
+def remember_bomline_edge(sender, instance, **kwargs):
+    instance._closure_edge = live_line_edge(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=BomLine)
+def update_closure_for_bomline(sender, instance, **kwargs):
+    before = getattr(instance, '_closure_edge', None)
+    after = live_line_edge(instance.pk)
+    if before == after:
+        return
+    if before is not None:
+        BomClosure.add_edges(before[0], [before[1]], sign=-1)
+    if after is not None:
+        BomClosure.add_edges(after[0], [after[1]])
+
+
+@receiver(post_delete, sender=BomLine)
+def remove_closure_for_bomline(sender, instance, **kwargs):
+    product_id = live_bom_product(instance.bom_id)
+    if instance.deleted is None and product_id is not None:
+        BomClosure.add_edges(product_id, [instance.component_id], sign=-1)
+
+
+@receiver(pre_save, sender=Bom)
+def remember_bom_product(sender, instance, **kwargs):
+    instance._closure_product = live_bom_product(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Bom)
+def update_closure_for_bom(sender, instance, **kwargs):
+    before = getattr(instance, '_closure_product', None)
+    after = live_bom_product(instance.pk)
+    if before == after:
+        return
+    # Lines of a deleted or re-targeted BOM move along with it
+    components = list(BomLine.objects.filter(bom_id=instance.pk).values_list('component_id', flat=True))
+    if before is not None:
+        BomClosure.add_edges(before, components, sign=-1)
+    if after is not None:
+        BomClosure.add_edges(after, components)
+
+
+# Every change to a BOM, a line or a material leaves a history record,
+# the cached trees containing it are invalidated from there.
+
+@receiver(post_create_historical_record)
+def bump_bom_tree_versions(sender, instance, **kwargs):
+    from bom.services.tree import bump_tree_versions
+    if isinstance(instance, Bom):
+        bump_tree_versions([instance.product_id])
+    elif isinstance(instance, BomLine):
+        product_id = Bom.all_objects.filter(pk=instance.bom_id).values_list('product_id', flat=True).first()
+        if product_id is not None:
+            bump_tree_versions([product_id])
+    elif isinstance(instance, Material):
+        bump_tree_versions([instance.pk])
@@ -0,0 +1,42 @@
+import logging
+from celery import shared_task
+from django.apps import apps
+from django.db import transaction
+from bom.services.costing import BomCostRollup
+from bom.services.where_used import ancestors, topological_order
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def recost_ancestors(material_ids):
+    """
+    Re-costs every BOM that uses one of material_ids at any depth, sub-assemblies
+    first, and records a BOM sourced VariableCost where the rolled up cost changed.
+    Triggered on commit whenever a component gets a new cost.
+    """
+    VariableCost = apps.get_model('sales', 'VariableCost')
+    CurrentCost = apps.get_model('sales', 'CurrentCost')
+    products, edges = ancestors(material_ids)
+    ordered = topological_order(products, edges)
+    if len(ordered) < len(products):
+        logger.error(f"BOM cycle among products {sorted(products - set(ordered))}, they are not re-costed")
+    if not ordered:
+        return "No BOMs to re-cost."
+
+    rollup = BomCostRollup.for_products(ordered)
+    current = {
+        (material_id, uom): cost
+        for material_id, uom, cost in CurrentCost.objects.filter(material_id__in=ordered).values_list('material_id', 'uom', 'cost')
+    }
+    recosted = 0
+    with transaction.atomic():
+        for product_id in ordered:
+            bom = rollup.explosion.bom_for(product_id)
+            cost = rollup.cost(product_id)
+            if cost is None or cost <= 0 or current.get((product_id, bom.uom)) == round(cost, 3):
+                continue
+            VariableCost.objects.create(bom=bom, material_id=product_id, cost=cost, currency='TRY', uom=bom.uom)
+            recosted += 1
+    logger.info(f"Re-costed {recosted} of {len(ordered)} BOMs above materials {material_ids}")
+    return f"Re-costed {recosted} BOMs."
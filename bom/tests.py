@@ -1,3 +1,326 @@
+import importlib
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from bom.models import Bom, BomClosure, BomLine
+from bom.services.costing import BomCostRollup
+from bom.services.explosion import BomExplosion
+from bom.services.where_used import ancestors, topological_order
+from bom.tasks import recost_ancestors
+from core.models import Material
+from rest_framework.test import APIClient
+from safedelete import HARD_DELETE
+from sales.models import CurrentCost, VariableCost
 
-# Create your tests here.
+
+class BomTestMixin:
+    def setUp(self):
+        # Ancestor recosts are enqueued on commit, tests run them explicitly
+        patcher = mock.patch('bom.tasks.recost_ancestors.delay')
+        self.recost_delay = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.product = Material.objects.create(name="Ürün", category="good")
+        self.assembly = Material.objects.create(name="Alt Montaj", category="part")
+        self.screw = Material.objects.create(name="Vida", category="supplied")
+        self.plate = Material.objects.create(name="Plaka", category="supplied")
+        self.assembly_bom = self.make_bom(self.assembly, [(self.screw, "4"), (self.plate, "1")])
+        self.product_bom = self.make_bom(self.product, [(self.assembly, "2"), (self.screw, "3")])
+
+    def make_bom(self, product, lines, uom="ADT"):
+        with self.captureOnCommitCallbacks(execute=True):
+            bom = Bom.objects.create(product=product, uom=uom)
+            for component, quantity in lines:
+                BomLine.objects.create(bom=bom, component=component, quantity=Decimal(quantity), uom="ADT")
+        return bom
+
+
+class BomExplosionTest(BomTestMixin, TestCase):
+    def test_explosion_multiplies_through_levels(self):
+        requirements = BomExplosion().explode(self.product.pk, Decimal("5"))
+        self.assertEqual(requirements, {
+            (self.screw.pk, "ADT"): Decimal("55"),
+            (self.plate.pk, "ADT"): Decimal("10"),
+        })
+
+    def test_component_with_bom_in_other_uom_is_a_leaf(self):
+        self.assembly_bom.uom = "KG"
+        self.assembly_bom.save()
+        requirements = BomExplosion().explode(self.product.pk)
+        self.assertEqual(requirements[(self.assembly.pk, "ADT")], Decimal("2"))
+        self.assertNotIn((self.plate.pk, "ADT"), requirements)
+
+    def test_graph_is_loaded_per_level_and_sub_assemblies_are_memoized(self):
+        other = Material.objects.create(name="Diğer Ürün", category="good")
+        self.make_bom(other, [(self.assembly, "1")])
+        explosion = BomExplosion()
+        with CaptureQueriesContext(connection) as queries:
+            totals = explosion.explode_many([(self.product.pk, "ADT", Decimal("1")), (other.pk, "ADT", Decimal("1"))])
+        # Two levels of BOMs plus the leaf level, one bom and one line query each
+        self.assertLessEqual(len(queries), 6)
+        self.assertEqual(totals[(self.screw.pk, "ADT")], Decimal("15"))
+        with CaptureQueriesContext(connection) as queries:
+            explosion.explode(other.pk, Decimal("2"))
+        self.assertEqual(len(queries), 0)
+
+    def test_indirect_cycle_is_rejected(self):
+        line = BomLine(bom=self.assembly_bom, component=self.product, quantity=Decimal("1"), uom="ADT")
+        with self.assertRaises(ValidationError):
+            line.clean()
+
+
+class BomClosureTest(BomTestMixin, TestCase):
+    def closure(self):
+        return {(row.ancestor_id, row.descendant_id): row.paths for row in BomClosure.objects.all()}
+
+    def test_closure_counts_paths_through_sub_assemblies(self):
+        self.assertEqual(self.closure(), {
+            (self.assembly.pk, self.screw.pk): 1,
+            (self.assembly.pk, self.plate.pk): 1,
+            (self.product.pk, self.assembly.pk): 1,
+            (self.product.pk, self.screw.pk): 2,
+            (self.product.pk, self.plate.pk): 1,
+        })
+        self.assertEqual(BomClosure.descendants(self.product.pk), {self.assembly.pk, self.screw.pk, self.plate.pk})
+
+    def test_soft_delete_and_undelete_keep_closure_in_sync(self):
+        built = self.closure()
+        line = self.assembly_bom.lines.get(component=self.plate)
+        line.delete()
+        self.assertNotIn((self.product.pk, self.plate.pk), self.closure())
+        self.assertEqual(self.closure()[(self.product.pk, self.screw.pk)], 2)
+        line.undelete()
+        self.assertEqual(self.closure(), built)
+        self.assembly_bom.delete()
+        self.assertEqual(set(self.closure()), {(self.product.pk, self.assembly.pk), (self.product.pk, self.screw.pk)})
+        self.assembly_bom.undelete()
+        self.assertEqual(self.closure(), built)
+        self.assertEqual(BomClosure.rebuild(), len(built))
+        self.assertEqual(self.closure(), built)
+        self.assembly_bom.lines.get(component=self.plate).delete(force_policy=HARD_DELETE)
+        incremental = self.closure()
+        BomClosure.rebuild()
+        self.assertEqual(self.closure(), incremental)
+        self.assertNotIn((self.product.pk, self.plate.pk), incremental)
+
+    def test_cycle_through_a_second_line_is_rejected(self):
+        # The assembly reaches the plate through its second line only
+        plate_bom = self.make_bom(self.plate, [])
+        line = BomLine(bom=plate_bom, component=self.product, quantity=Decimal("1"), uom="ADT")
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertRaises(ValidationError):
+                line.clean()
+        self.assertLessEqual(len(queries), 2)
+
+    def test_backfill_names_the_products_of_a_cycle(self):
+        from django.apps import apps
+        backfill = importlib.import_module('bom.migrations.0004_bomclosure').backfill_bom_closure
+        # Lines written before the closure existed were never checked for cycles
+        plate_bom = self.make_bom(self.plate, [])
+        BomLine.objects.create(bom=plate_bom, component=self.assembly, quantity=Decimal("1"), uom="ADT")
+        BomClosure.objects.all().delete()
+        with self.assertRaisesMessage(RuntimeError, f"{self.assembly.name} (#{self.assembly.pk})"):
+            backfill(apps, None)
+
+    def test_bulk_created_lines_are_added_to_closure(self):
+        user = User.objects.create(username="recete", is_superuser=True)
+        client = APIClient()
+        client.force_authenticate(user)
+        kit = Material.objects.create(name="Set", category="good")
+        response = client.post('/api/v1/boms/', {
+            "product": kit.pk, "uom": "ADT",
+            "lines": [{"component": self.product.pk, "quantity": "1", "uom": "ADT"}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(BomClosure.descendants(kit.pk), {self.product.pk, self.assembly.pk, self.screw.pk, self.plate.pk})
+        self.assertEqual(BomClosure.ancestors([self.plate.pk]), {self.assembly.pk, self.product.pk, kit.pk})
+
+
+class CostTestMixin(BomTestMixin):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="maliyet", is_superuser=True)
+        self.set_cost(self.screw, "1.000")
+        self.set_cost(self.screw, "2.000")
+        self.set_cost(self.plate, "10.000")
+        self.assembly_bom.labor_cost = Decimal("3.00")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assembly_bom.save()
+
+    def set_cost(self, material, cost):
+        VariableCost.objects.create(user=self.user, material=material, cost=Decimal(cost), currency="TRY", uom="ADT")
+
+
+class BomCostRollupTest(CostTestMixin, TestCase):
+
+    def test_costs_roll_up_through_sub_assemblies(self):
+        # Assembly: 4 x 2 + 1 x 10 + 3 = 21, product: 2 x 21 + 3 x 2 = 48
+        rollup = BomCostRollup.for_products([self.product.pk])
+        self.assertEqual(rollup.cost(self.assembly.pk), Decimal("21"))
+        self.assertEqual(rollup.cost(self.product.pk), Decimal("48"))
+        self.assertEqual(self.product_bom.latest_cost, Decimal("48"))
+
+    def test_missing_component_cost_gives_none(self):
+        VariableCost.objects.filter(material=self.screw).delete()
+        self.assertIsNone(self.product_bom.latest_cost)
+
+    def test_uncostable_sub_assembly_falls_back_to_its_variable_cost(self):
+        # Saving the assembly BOM recorded its rolled up cost of 21 as a VariableCost
+        VariableCost.objects.filter(material=self.plate).delete()
+        self.assertEqual(self.product_bom.latest_cost, Decimal("48"))
+
+    def test_list_reads_variable_costs_once_per_page(self):
+        for index in range(5):
+            product = Material.objects.create(name=f"Ürün {index}", category="good")
+            self.make_bom(product, [(self.assembly, "1"), (self.plate, "2")])
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/boms/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 7)
+        self.assertEqual(response.data["results"][0]["latest_cost"], Decimal("41"))
+        self.assertEqual(response.data["results"][0]["count_of_lines"], 2)
+        cost_queries = [query for query in queries if 'sales_currentcost' in query['sql']]
+        self.assertEqual(len(cost_queries), 1)
+
+    def test_cyclic_pair_has_no_cost_and_keeps_the_list_up(self):
+        # Written without clean(), as lines from before the cycle check were
+        plate_bom = self.make_bom(self.plate, [])
+        BomLine.objects.create(bom=plate_bom, component=self.assembly, quantity=Decimal("1"), uom="ADT")
+        self.assertIsNone(self.assembly_bom.latest_cost)
+        self.assertIsNone(plate_bom.latest_cost)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/v1/boms/')
+        self.assertEqual(response.status_code, 200)
+        costs = {row["id"]: row["latest_cost"] for row in response.data["results"]}
+        self.assertIsNone(costs[self.assembly_bom.pk])
+        self.assertIsNone(costs[plate_bom.pk])
+
+
+class DebouncedRecostTest(CostTestMixin, TestCase):
+    def test_line_edits_in_one_transaction_record_one_cost(self):
+        bom_costs = VariableCost.objects.filter(bom=self.assembly_bom)
+        before = bom_costs.count()
+        with self.captureOnCommitCallbacks(execute=True):
+            for line in self.assembly_bom.lines.all():
+                line.quantity += 1
+                line.save()
+            self.assembly_bom.machining_cost = Decimal("1.00")
+            self.assembly_bom.save()
+            self.assertEqual(bom_costs.count(), before)
+        self.assertEqual(bom_costs.count(), before + 1)
+        # Assembly: 5 x 2 + 2 x 10 + 3 + 1 = 34
+        self.assertEqual(bom_costs.latest('id').cost, Decimal("34"))
+
+    def test_rolled_back_edits_are_not_recosted(self):
+        from bom.signals import PendingRecost, mark_bom_dirty
+        product_costs = VariableCost.objects.filter(bom=self.product_bom)
+        before = product_costs.count()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    mark_bom_dirty(self.product_bom.pk)
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+            # The rollback discarded the pending recost, these start a new one
+            mark_bom_dirty(self.assembly_bom.pk)
+            mark_bom_dirty(self.assembly_bom.pk)
+        self.assertEqual(len([callback for callback in callbacks if isinstance(callback, PendingRecost)]), 1)
+        self.assertEqual(product_costs.count(), before)
+        self.assertTrue(VariableCost.objects.filter(bom=self.assembly_bom).exists())
+
+
+class RecostAncestorsTest(CostTestMixin, TestCase):
+    def test_ancestors_are_ordered_sub_assemblies_first(self):
+        unrelated = Material.objects.create(name="Bağımsız", category="good")
+        self.make_bom(unrelated, [(self.plate, "1")])
+        products, edges = ancestors([self.screw.pk])
+        self.assertEqual(products, {self.assembly.pk, self.product.pk})
+        self.assertEqual(topological_order(products, edges), [self.assembly.pk, self.product.pk])
+
+    def test_component_cost_change_recosts_every_ancestor(self):
+        self.set_cost(self.screw, "3.000")
+        self.assertEqual(recost_ancestors([self.screw.pk]), "Re-costed 2 BOMs.")
+        # Assembly: 4 x 3 + 10 + 3 = 25, product: 2 x 25 + 3 x 3 = 59
+        self.assertEqual(CurrentCost.objects.get(material=self.assembly, uom="ADT").cost, Decimal("25"))
+        self.assertEqual(CurrentCost.objects.get(material=self.product, uom="ADT").cost, Decimal("59"))
+        self.assertEqual(recost_ancestors([self.screw.pk]), "Re-costed 0 BOMs.")
+
+    def test_recost_is_enqueued_after_commit(self):
+        self.recost_delay.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.set_cost(self.plate, "12.000")
+        self.recost_delay.assert_called_once_with([self.plate.pk])
+
+
+class BomTreeTest(BomTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        # Primary keys are reused between tests, so are the cache keys
+        cache.clear()
+        self.user = User.objects.create(username="atolye", is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/v1/boms/{self.product_bom.pk}/tree/'
+
+    def test_tree_expands_every_level(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        root = response.data["result"]
+        self.assertEqual(root["material"], self.product.pk)
+        assembly, screw = root["children"]
+        self.assertEqual(assembly["bom"], self.assembly_bom.pk)
+        self.assertEqual([child["material"] for child in assembly["children"]], [self.screw.pk, self.plate.pk])
+        self.assertEqual(assembly["children"][0]["total_quantity"], Decimal("8"))
+        self.assertEqual(screw["children"], [])
+
+    def test_unchanged_tree_answers_304_from_cache(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([query for query in queries if 'bom_bomline' in query['sql']])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'bom_bomline' in query['sql']])
+
+    def test_changes_below_invalidate_every_tree_above(self):
+        etag = self.client.get(self.url)['ETag']
+        line = self.assembly_bom.lines.get(component=self.plate)
+        line.quantity = Decimal("3")
+        line.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["result"]["children"][0]["children"][1]["quantity"], Decimal("3"))
+        etag = response['ETag']
+        self.plate.name = "Sac Plaka"
+        self.plate.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data["result"]["children"][0]["children"][1]["name"], "Sac Plaka")
+
+    def test_stale_instance_does_not_roll_the_version_back(self):
+        stale = Bom.objects.get(pk=self.product_bom.pk)
+        line = self.assembly_bom.lines.first()
+        line.save()
+        bumped = Bom.objects.get(pk=self.product_bom.pk).tree_version
+        stale.labor_cost = Decimal("1.00")
+        stale.save()
+        self.assertGreater(Bom.objects.get(pk=self.product_bom.pk).tree_version, bumped)
+
+    def test_cyclic_tree_answers_400(self):
+        # Written without clean(), as lines from before the cycle check were
+        plate_bom = self.make_bom(self.plate, [])
+        BomLine.objects.create(bom=plate_bom, component=self.assembly, quantity=Decimal("1"), uom="ADT")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["status"], "error")
+        self.assertTrue(response.data["errors"])
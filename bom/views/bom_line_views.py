@@ -8,6 +8,7 @@ from rest_framework.decorators import action
 from bom.models import BomLine
 from bom.serializers.bom_line_serializers import BomLineSerializer
 from safedelete.config import HARD_DELETE
+from core.querysets import with_created_meta
 
 class CustomDjangoModelPermissions(DjangoModelPermissions):
     perms_map = {
@@ -37,7 +38,7 @@ class CustomPagination(pagination.PageNumberPagination):
 
 class BomLineViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
-    queryset = BomLine.objects.all().order_by('-id')
+    queryset = with_created_meta(BomLine.objects.select_related('component')).order_by('-id')
     serializer_class = BomLineSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['bom', 'component', 'uom']
@@ -5,9 +5,16 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import exception_handler
 from rest_framework.permissions import DjangoModelPermissions
 from rest_framework.decorators import action
+from django.utils.cache import patch_cache_control
+from django.utils.translation import gettext_lazy as _
 from bom.models import Bom
 from bom.serializers.bom_serializers import BomSerializer
+from bom.services import tree as bom_tree
+from bom.services.costing import BomCostRollup
+from bom.services.explosion import BomCycleError
+from django.db.models import Count, Q
 from safedelete.config import HARD_DELETE
+from core.querysets import with_created_meta
 
 class CustomDjangoModelPermissions(DjangoModelPermissions):
     perms_map = {
@@ -37,7 +44,7 @@ class CustomPagination(pagination.PageNumberPagination):
 
 class BomViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
-    queryset = Bom.objects.all().order_by('-id')
+    queryset = with_created_meta(Bom.objects.all()).order_by('-id')
     serializer_class = BomSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['product', 'uom']
@@ -50,15 +57,24 @@ class BomViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         if self.action in ['recover', 'delete']:
             return Bom.objects.all_with_deleted()
+        if self.action == 'list':
+            queryset = queryset.select_related('product').annotate(
+                line_count=Count('lines', filter=Q(lines__deleted__isnull=True))
+            )
         return queryset
 
+    def cost_rollup(self, boms):
+        return BomCostRollup.for_products([bom.product_id for bom in boms])
+
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True, context={**self.get_serializer_context(), 'action': 'list'})
+            context = {**self.get_serializer_context(), 'action': 'list', 'cost_rollup': self.cost_rollup(page)}
+            serializer = self.get_serializer(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True, context={**self.get_serializer_context(), 'action': 'list'})
+        context = {**self.get_serializer_context(), 'action': 'list', 'cost_rollup': self.cost_rollup(queryset)}
+        serializer = self.get_serializer(queryset, many=True, context=context)
         return Response({
             "status": "success",
             "message": "BOMs retrieved successfully",
@@ -67,13 +83,40 @@ class BomViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = self.get_serializer(instance, context={**self.get_serializer_context(), 'action': 'retrieve'})
+        context = {**self.get_serializer_context(), 'action': 'retrieve', 'cost_rollup': self.cost_rollup([instance])}
+        serializer = self.get_serializer(instance, context=context)
         return Response({
             "status": "success",
             "message": "BOM retrieved successfully",
             "result": serializer.data
         }, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['get'], url_path='tree')
+    def tree(self, request, *args, **kwargs):
+        """Fully expanded multi-level tree, answers 304 while the tree is unchanged."""
+        instance = self.get_object()
+        etag = bom_tree.etag(instance)
+        if_none_match = request.headers.get('If-None-Match', '')
+        if if_none_match.strip() == '*' or etag in [value.strip() for value in if_none_match.split(',')]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            try:
+                tree = bom_tree.cached_tree(instance)
+            except BomCycleError as e:
+                return Response({
+                    "status": "error",
+                    "message": _("Doğrulama başarısız"),
+                    "errors": [str(e)]
+                }, status=status.HTTP_400_BAD_REQUEST)
+            response = Response({
+                "status": "success",
+                "message": "BOM tree retrieved successfully",
+                "result": tree
+            }, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
     @transaction.atomic
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
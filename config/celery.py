@@ -14,4 +14,12 @@ app.conf.beat_schedule = {
         'task': 'finance.tasks.fetch_daily_exchange_rates',
         'schedule': crontab(hour=5, minute=0),  # Every day at 5:00
     },
+    'take-stock-snapshot-daily': {
+        'task': 'inventory.tasks.take_stock_snapshot',
+        'schedule': crontab(hour=0, minute=30),  # Every day at 0:30, closes yesterday
+    },
+    'run-mrp-daily': {
+        'task': 'production.tasks.run_material_requirements_planning',
+        'schedule': crontab(hour=1, minute=0),  # Every day at 1:00, after the stock snapshot
+    },
 }
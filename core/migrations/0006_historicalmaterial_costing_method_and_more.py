@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_company_deleted_company_deleted_by_cascade_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalmaterial',
+            name='costing_method',
+            field=models.CharField(choices=[('moving_average', 'Hareketli ortalama'), ('standard', 'Standart maliyet')], default='moving_average', max_length=20, verbose_name='Maliyetlendirme Yöntemi'),
+        ),
+        migrations.AddField(
+            model_name='historicalmaterial',
+            name='standard_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=30, null=True, verbose_name='Standart Maliyet'),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='costing_method',
+            field=models.CharField(choices=[('moving_average', 'Hareketli ortalama'), ('standard', 'Standart maliyet')], default='moving_average', max_length=20, verbose_name='Maliyetlendirme Yöntemi'),
+        ),
+        migrations.AddField(
+            model_name='material',
+            name='standard_cost',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=30, null=True, verbose_name='Standart Maliyet'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_historicalmaterial_costing_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='historicalmaterial',
+            name='costing_method',
+            field=models.CharField(choices=[('moving_average', 'Hareketli ortalama'), ('fifo', 'İlk giren ilk çıkar (FIFO)'), ('standard', 'Standart maliyet')], default='moving_average', max_length=20, verbose_name='Maliyetlendirme Yöntemi'),
+        ),
+        migrations.AlterField(
+            model_name='material',
+            name='costing_method',
+            field=models.CharField(choices=[('moving_average', 'Hareketli ortalama'), ('fifo', 'İlk giren ilk çıkar (FIFO)'), ('standard', 'Standart maliyet')], default='moving_average', max_length=20, verbose_name='Maliyetlendirme Yöntemi'),
+        ),
+    ]
@@ -18,10 +18,18 @@ class Material(SafeDeleteModel):
         ('pallet', 'palet'), #PLT-
         ('undefined', 'Belirtilmemiş') #UND-
     ]
+
+    class CostingMethod(models.TextChoices):
+        MOVING_AVERAGE = "moving_average", _("Hareketli ortalama")
+        FIFO =           "fifo", _("İlk giren ilk çıkar (FIFO)")
+        STANDARD =       "standard", _("Standart maliyet")
+
     name = models.CharField(_('Ad'), max_length=128, blank=False, null=True)
     category = models.CharField(_('Kategori'), max_length=32, choices=MATERIAL_CATEGORIES, blank=False, null=False, default='undefined')
     internal_code = models.CharField(_('İç Kod'), max_length=14, blank=True, null=True, unique=True)
     description = models.TextField(_('Açıklama'), max_length=500)
+    costing_method = models.CharField(_('Maliyetlendirme Yöntemi'), max_length=20, choices=CostingMethod.choices, default=CostingMethod.MOVING_AVERAGE)
+    standard_cost = models.DecimalField(_('Standart Maliyet'), max_digits=30, decimal_places=6, null=True, blank=True)
     history = HistoricalRecords()
     
     def __str__(self):
@@ -33,9 +41,9 @@ class Material(SafeDeleteModel):
         Returns the cost field of the latest VariableCost for this material.
         Safe for use in serializers and querysets.
         """
-        VariableCost = apps.get_model('sales', 'VariableCost')
-        latest = VariableCost.objects.filter(material=self).order_by('-id').first()
-        return latest.cost if latest else None #type: ignore
+        CurrentCost = apps.get_model('sales', 'CurrentCost')
+        current = CurrentCost.objects.filter(material=self).order_by('-variable_cost_id').first()
+        return current.cost if current else None #type: ignore
     
     def latest_cost_for_uom(self, uom):
         """
@@ -45,9 +53,9 @@ class Material(SafeDeleteModel):
         Returns:
             Decimal cost if found, None otherwise
         """
-        VariableCost = apps.get_model('sales', 'VariableCost')
-        latest = VariableCost.objects.filter(material=self, uom=uom).order_by('-id').first()
-        return latest.cost if latest else None #type: ignore
+        CurrentCost = apps.get_model('sales', 'CurrentCost')
+        current = CurrentCost.objects.filter(material=self, uom=uom).first()
+        return current.cost if current else None #type: ignore
 
     PREFIX_MAP = {
         'supplied': 'TED-',
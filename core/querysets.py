@@ -0,0 +1,139 @@
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models.functions import Coalesce
+from safedelete.queryset import SafeDeleteQueryset
+
+MONEY = models.DecimalField(max_digits=40, decimal_places=6)
+
+# Denormalized on the order header, written only by refresh_totals()
+STORED_TOTAL_FIELDS = ['subtotal', 'tax_total', 'grand_total', 'open_quantity']
+
+
+class OrderTotalsQuerySet(SafeDeleteQueryset):
+    """
+    Order totals computed in SQL over the live lines, one join for all of them.
+    Subclasses name the line field that counts as done (received or sent).
+
+    with_totals() annotates:
+        line_count, lines_subtotal, discount_total, lines_tax_total,
+        total_without_tax, total_with_tax, open_line_count, lines_open_quantity, all_done
+    The models' total_price_* and all_* properties read these when present.
+
+    refresh_totals() writes the same figures into the stored
+    STORED_TOTAL_FIELDS columns for reports over many orders.
+    """
+    done_field = None
+
+    def with_totals(self):
+        live = models.Q(lines__deleted__isnull=True)
+        priced = live & models.Q(lines__unit_price__isnull=False)
+        open_lines = live & models.Q(lines__quantity__gt=models.F(f'lines__{self.done_field}'))
+        line_value = models.F('lines__unit_price') * models.F('lines__quantity')
+        zero = models.Value(Decimal('0'), output_field=MONEY)
+        return self.annotate(
+            line_count=models.Count('lines', filter=live),
+            lines_subtotal=Coalesce(models.Sum(line_value, filter=priced, output_field=MONEY), zero),
+            lines_tax_total=Coalesce(
+                models.Sum(
+                    line_value * models.F('lines__tax_rate'),
+                    filter=priced & models.Q(lines__tax_rate__isnull=False),
+                    output_field=MONEY,
+                ),
+                zero,
+            ),
+            open_line_count=models.Count('lines', filter=open_lines),
+            lines_open_quantity=Coalesce(
+                models.Sum(models.F('lines__quantity') - models.F(f'lines__{self.done_field}'), filter=open_lines, output_field=MONEY),
+                zero,
+            ),
+        ).annotate(
+            discount_total=models.ExpressionWrapper(
+                models.F('lines_subtotal') * (models.F('trade_discount') + models.F('due_discount')), output_field=MONEY
+            ),
+        ).annotate(
+            total_without_tax=models.ExpressionWrapper(models.F('lines_subtotal') - models.F('discount_total'), output_field=MONEY),
+            total_with_tax=models.ExpressionWrapper(
+                models.F('lines_subtotal') - models.F('discount_total') + models.F('lines_tax_total'), output_field=MONEY
+            ),
+            all_done=models.ExpressionWrapper(models.Q(open_line_count=0), output_field=models.BooleanField()),
+        )
+
+    def refresh_totals(self):
+        """Recomputes the stored totals of every order in the queryset with a single UPDATE."""
+        rel = self.model.lines.rel
+        line_model, fk = rel.related_model, rel.field.name
+        zero = models.Value(Decimal('0'), output_field=MONEY)
+
+        def line_sum(expression, **filters):
+            lines = line_model.objects.filter(**{fk: models.OuterRef('pk')}, **filters)
+            return Coalesce(
+                models.Subquery(lines.values(fk).annotate(total=models.Sum(expression, output_field=MONEY)).values('total')),
+                zero,
+            )
+
+        line_value = models.F('unit_price') * models.F('quantity')
+        subtotal = line_sum(line_value, unit_price__isnull=False)
+        tax_total = line_sum(line_value * models.F('tax_rate'), unit_price__isnull=False, tax_rate__isnull=False)
+        done = models.F(self.done_field)
+        return self.update(
+            subtotal=subtotal,
+            tax_total=tax_total,
+            grand_total=models.ExpressionWrapper(
+                subtotal - subtotal * (models.F('trade_discount') + models.F('due_discount')) + tax_total, output_field=MONEY
+            ),
+            open_quantity=line_sum(models.F('quantity') - done, quantity__gt=done),
+        )
+
+
+class OrderTotalsModelMixin:
+    """
+    save() for the order headers using OrderTotalsQuerySet. Updates never
+    write STORED_TOTAL_FIELDS, only refresh_totals() does, so a stale
+    instance cannot write old totals back. Saving a discount other than the
+    one the instance was loaded with refreshes them.
+    """
+    discount_fields = ['trade_discount', 'due_discount']
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_discounts = {name: instance.__dict__[name] for name in cls.discount_fields if name in instance.__dict__}
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in STORED_TOTAL_FIELDS
+            ]
+        update_fields = kwargs.get('update_fields')
+        saved = [name for name in self.discount_fields if update_fields is None or name in update_fields]
+        loaded = getattr(self, '_loaded_discounts', {})
+        changed = not self._state.adding and any(
+            name not in loaded or loaded[name] != getattr(self, name) for name in saved
+        )
+        super().save(*args, **kwargs)
+        self._loaded_discounts = {**loaded, **{name: getattr(self, name) for name in saved}}
+        if changed:
+            self.refresh_totals()
+
+
+def with_created_meta(queryset):
+    """
+    Annotates first_history_date and first_history_user, the creation time and
+    creator from the first simple_history record, one subquery each for the whole
+    page. CreatedMetaSerializerMixin reads them instead of querying history per row.
+    """
+    model = queryset.model
+    first_history = (
+        model.history.model.objects
+        .filter(**{model._meta.pk.attname: models.OuterRef('pk')})
+        .order_by('history_date')
+    )
+    return queryset.annotate(
+        first_history_date=models.Subquery(first_history.values('history_date')[:1]),
+        first_history_user=models.Subquery(
+            first_history.values(f'history_user__{get_user_model().USERNAME_FIELD}')[:1]
+        ),
+    )
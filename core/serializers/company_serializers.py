@@ -1,10 +1,9 @@
 from rest_framework import serializers
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
 from core.models import Company
 from core.serializers.contact_serializers import ContactSerializer
 
-class CompanySerializer(serializers.ModelSerializer):
-    created_at = serializers.SerializerMethodField(read_only=True)
-    created_by = serializers.SerializerMethodField(read_only=True)
+class CompanySerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
     contacts = ContactSerializer(many=True, required=False)
 
     class Meta:
@@ -22,18 +21,13 @@ class CompanySerializer(serializers.ModelSerializer):
             'contacts',
         ]
         read_only_fields = ['created_by', 'created_at']
-        
-    def get_created_by(self, obj):
-        first_history = obj.history.order_by('history_date').first()
-        if first_history and hasattr(first_history, 'history_user') and first_history.history_user:
-            return str(first_history.history_user)
-        return None
 
-    def get_created_at(self, obj):
-        first_history = obj.history.order_by('history_date').first()
-        if first_history:
-            return first_history.history_date
-        return None
+    def get_fields(self):
+        fields = super().get_fields()
+        if getattr(self.context.get('view'), 'action', None) == 'list':
+            # The list shows contacts_count only, do not serialize contacts just to pop them
+            fields.pop('contacts', None)
+        return fields
 
     def to_representation(self, instance):
         ret = super().to_representation(instance)
@@ -47,7 +41,7 @@ class CompanySerializer(serializers.ModelSerializer):
             ret['contacts'] = ContactSerializer(instance.contacts.all(), many=True).data
             
         elif action == 'list':
-            ret['contacts_count'] = instance.contacts.count()
+            ret['contacts_count'] = instance.contacts_count if hasattr(instance, 'contacts_count') else instance.contacts.count()
             ret.pop('contacts', None)
         else:
             ret.pop('contacts', None)
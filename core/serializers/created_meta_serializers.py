@@ -0,0 +1,31 @@
+from rest_framework import serializers
+
+
+class CreatedMetaSerializerMixin(serializers.Serializer):
+    """
+    created_by and created_at from the first simple_history record.
+    Read from the annotations of core.querysets.with_created_meta() when the
+    viewset queryset has them, otherwise one history query per object.
+    """
+    created_by = serializers.SerializerMethodField(read_only=True)
+    created_at = serializers.SerializerMethodField(read_only=True)
+
+    def first_history(self, obj):
+        if not hasattr(obj, '_first_history'):
+            history = getattr(obj, 'history', None)
+            obj._first_history = history.select_related('history_user').order_by('history_date').first() if history is not None else None
+        return obj._first_history
+
+    def get_created_by(self, obj):
+        if hasattr(obj, 'first_history_user'):
+            return obj.first_history_user
+        first_history = self.first_history(obj)
+        if first_history and first_history.history_user:
+            return str(first_history.history_user)
+        return None
+
+    def get_created_at(self, obj):
+        if hasattr(obj, 'first_history_date'):
+            return obj.first_history_date
+        first_history = self.first_history(obj)
+        return first_history.history_date if first_history else None
@@ -1,10 +1,8 @@
 from rest_framework import serializers
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
 from core.models import Material
 
-class MaterialSerializer(serializers.ModelSerializer):
-    created_by = serializers.SerializerMethodField(read_only=True)
-    created_at = serializers.SerializerMethodField(read_only=True)
-
+class MaterialSerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Material
         fields = [
@@ -13,29 +11,23 @@ class MaterialSerializer(serializers.ModelSerializer):
             'category',
             'internal_code',
             'description',
+            'costing_method',
+            'standard_cost',
             'created_by',
             'created_at',
         ]
         read_only_fields = ['internal_code', 'created_by', 'created_at']
 
-    def get_created_by(self, obj):
-        first_history = obj.history.order_by('history_date').first()
-        if first_history and hasattr(first_history, 'history_user') and first_history.history_user:
-            return str(first_history.history_user)
-        return None
-
-    def get_created_at(self, obj):
-        first_history = obj.history.order_by('history_date').first()
-        if first_history:
-            return first_history.history_date
-        return None
-
     def partial_update(self, instance, validated_data):
-        # Only allow updating name and description
+        # Only allow updating name, description and costing settings
         if 'name' in validated_data:
             instance.name = validated_data['name']
         if 'description' in validated_data:
             instance.description = validated_data['description']
+        if 'costing_method' in validated_data:
+            instance.costing_method = validated_data['costing_method']
+        if 'standard_cost' in validated_data:
+            instance.standard_cost = validated_data['standard_cost']
         instance.save()
         return instance
 
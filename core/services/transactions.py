@@ -0,0 +1,57 @@
+import functools
+import logging
+import random
+import time
+from django.db import OperationalError, connection, models
+from simple_history.utils import get_history_manager_for_model
+
+logger = logging.getLogger(__name__)
+
+# serialization_failure, deadlock_detected
+RETRYABLE_PGCODES = {'40001', '40P01'}
+
+
+def is_serialization_failure(exc):
+    cause = exc.__cause__ or exc
+    return getattr(cause, 'pgcode', None) in RETRYABLE_PGCODES
+
+
+def retry_on_serialization_failure(max_attempts=3, backoff=0.05):
+    """
+    Re-runs the decorated function when the database aborts its transaction
+    with a serialization failure or a deadlock. Must wrap the outermost
+    transaction.atomic, inside an open transaction the error is re-raised.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as exc:
+                    if attempt == max_attempts or connection.in_atomic_block or not is_serialization_failure(exc):
+                        raise
+                    logger.warning(f"{func.__qualname__} hit a serialization failure, retry {attempt}/{max_attempts - 1}")
+                    time.sleep(backoff * attempt * (1 + random.random()))
+        return wrapper
+    return decorator
+
+
+def increment_within_limit(instance, field, amount, limit_field, user=None):
+    """
+    Adds amount to instance.<field> with a single conditional
+    UPDATE ... SET field = field + amount WHERE field + amount <= limit_field,
+    so two concurrent writers can never push it past the limit.
+    Records a history row like save() would. Returns False when the
+    limit would be exceeded, the instance is left untouched then.
+    """
+    model = type(instance)
+    updated = model.objects.filter(
+        pk=instance.pk,
+        **{f'{field}__lte': models.F(limit_field) - amount}
+    ).update(**{field: models.F(field) + amount})
+    if not updated:
+        return False
+    instance.refresh_from_db(fields=[field])
+    get_history_manager_for_model(model).bulk_history_create([instance], update=True, default_user=user)
+    return True
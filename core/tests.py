@@ -1,5 +1,22 @@
-from django.test import TestCase
-from core.models import Material
+from datetime import date, timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from bom.models import Bom, BomLine
+from core.models import Company, Contact, Material
+from finance.models import CurrencyExchangeRate
+from inventory.models import InventoryBalance, InventoryLocation, StockMovement
+from procurement.models import MaterialDemand, ProcurementOrder, ProcurementOrderLine
+from production.models import ManufacturingOrder
+from sales.models import SalesOrder, SalesOrderLine, VariableCost
+from core.querysets import with_created_meta
+from core.serializers import MaterialSerializer
+from core.services.transactions import retry_on_serialization_failure
 
 class MaterialModelTest(TestCase):
     def test_internal_code_generation(self):
@@ -10,4 +27,236 @@ class MaterialModelTest(TestCase):
         )
         self.assertIsNotNone(material.internal_code)
         self.assertEqual(len(material.internal_code), 14)
-        self.assertTrue(material.internal_code.startswith("TED-"))
\ No newline at end of file
+        self.assertTrue(material.internal_code.startswith("TED-"))
+
+
+class RetryOnSerializationFailureTest(SimpleTestCase):
+    def failing(self, pgcode, failures):
+        calls = []
+
+        @retry_on_serialization_failure(max_attempts=3, backoff=0)
+        def work():
+            calls.append(1)
+            if len(calls) <= failures:
+                cause = Exception()
+                cause.pgcode = pgcode
+                raise OperationalError() from cause
+            return "done"
+        return work, calls
+
+    def test_serialization_failure_is_retried(self):
+        work, calls = self.failing('40001', 2)
+        self.assertEqual(work(), "done")
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        work, calls = self.failing('57014', 1)
+        with self.assertRaises(OperationalError):
+            work()
+        self.assertEqual(len(calls), 1)
+
+
+class CreatedMetaTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="olusturan", is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_annotations_match_history_fallback(self):
+        material = Material(name="Malzeme", category="supplied")
+        material._history_user = self.user
+        material.save()
+        material = Material.objects.get(pk=material.pk)
+        material._history_user = None
+        material.description = "Güncellendi"
+        material.save()
+        fallback = MaterialSerializer(material).data
+        annotated = MaterialSerializer(with_created_meta(Material.objects.all()).get(pk=material.pk)).data
+        self.assertEqual(fallback["created_by"], "olusturan")
+        self.assertEqual(annotated["created_by"], "olusturan")
+        self.assertEqual(annotated["created_at"], fallback["created_at"])
+
+    def test_list_reads_creator_metadata_in_the_page_query(self):
+        for index in range(5):
+            Material.objects.create(name=f"Malzeme {index}", category="supplied")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/materials/')
+        self.assertEqual(len(response.data["results"]), 5)
+        history_queries = [q for q in queries if q['sql'].startswith('SELECT "core_historicalmaterial"')]
+        self.assertEqual(history_queries, [])
+
+
+# prefix: (list budget, retrieve budget) for every router endpoint and the
+# generic inventory balance views. A list must also cost the same for a page
+# of 2 rows and a page of 10, so per-row queries fail even under budget.
+API_QUERY_BUDGETS = {
+    'materials': (2, 1),
+    'companies': (2, 2),
+    'contacts': (2, 1),
+    'material-demands': (2, 2),
+    'procurement-order-lines': (2, 2),
+    'procurement-orders': (2, 7),
+    'inventory-locations': (2, 1),
+    'inventory-balances': (2, 1),
+    'variable-costs': (2, 2),
+    'sales-orders': (2, 2),
+    'boms': (6, 11),
+    'bom-lines': (2, 1),
+    'manufacturing-orders': (2, 3),
+}
+
+# route: query budget for the routes outside list/retrieve. Every GET route of
+# the API and the stock movement batch need one, route_requests() calls them.
+API_ROUTE_BUDGETS = {
+    'companies/dropdown/': 2,
+    'materials/dropdown/': 2,
+    'inventory-locations/dropdown/': 2,
+    'inventory-balances/as-of/': 2,
+    'inventory-balances/availability/': 1,
+    'procurement-orders/<pk>/allowed-transitions/': 1,
+    'boms/<pk>/tree/': 5,
+    'manufacturing-orders/<pk>/allowed-transitions/': 1,
+    'action/batch/': 21,
+}
+
+API_URL_MODULES = ['core.urls', 'procurement.urls', 'inventory.urls', 'sales.urls', 'bom.urls', 'production.urls']
+
+
+class ApiQueryBudgetTest(TestCase):
+    rows = 12
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="butce", is_superuser=True)
+        previous = None
+        for index in range(cls.rows):
+            company = Company.objects.create(name=f"Firma {index}", legal_name=f"Firma {index} Ltd.")
+            for role in range(2):
+                Contact.objects.create(company=company, name=f"Kişi {index}-{role}", last_name="Soyad", description="-")
+            material = Material.objects.create(name=f"Malzeme {index}", category="supplied")
+            product = Material.objects.create(name=f"Ürün {index}", category="good")
+            location = InventoryLocation.objects.create(area=index + 1, section=1, shelf=1, bin=1)
+            po = ProcurementOrder.objects.create(
+                vendor=company, payment_term="CIA", payment_method="BANK_TRANSFER", incoterms="EXW",
+                description="PO", status="ordered", currency="TRY", delivery_address="Adres",
+            )
+            po_lines = [
+                ProcurementOrderLine.objects.create(
+                    po=po, material=material, uom=uom, quantity=Decimal("10"), unit_price=Decimal("5.00"),
+                )
+                for uom in ("ADT", "KG", "BOX")
+            ]
+            StockMovement.enter_from_po_line(
+                po_line=po_lines[0], location=location, quantity=Decimal("10"), reason="Giriş", created_by=cls.user
+            )
+            so = SalesOrder.objects.create(
+                customer=company, payment_term="CIA", payment_method="BANK_TRANSFER", incoterms="EXW",
+                due_in_days=timedelta(0), description="SO", status="approved", currency="TRY", delivery_address="Adres",
+            )
+            for uom in ("ADT", "KG", "BOX"):
+                SalesOrderLine.objects.create(so=so, material=product, uom=uom, quantity=Decimal("2"), unit_price=Decimal("9.00"))
+            MaterialDemand.objects.create(
+                material=material, quantity=Decimal("4"), uom="ADT", deadline=date(2026, 1, 1), description="Talep"
+            )
+            VariableCost.objects.create(user=cls.user, material=material, cost=Decimal("5.000"), currency="TRY", uom="ADT")
+            bom = Bom.objects.create(product=product, uom="ADT")
+            BomLine.objects.create(bom=bom, component=material, quantity=Decimal("2"), uom="ADT")
+            if previous is not None:
+                BomLine.objects.create(bom=bom, component=previous, quantity=Decimal("1"), uom="ADT")
+            ManufacturingOrder.objects.create(
+                product=product, bom=bom, uom="ADT", quantity=Decimal("1"),
+                source_location=location, target_location=location,
+            )
+            CurrencyExchangeRate.objects.create(
+                date=date(2026, 1, 1) + timedelta(days=index), from_currency="USD", to_currency="TRY", rate=Decimal("40")
+            )
+            previous = material
+
+    def setUp(self):
+        patcher = mock.patch('bom.tasks.recost_ancestors.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200, f"{url}: {response.status_code}")
+        return len(queries)
+
+    def endpoints(self):
+        routers = [import_module(module).router for module in API_URL_MODULES]
+        endpoints = {prefix: viewset.queryset.model for router in routers for prefix, viewset, _basename in router.registry}
+        endpoints['inventory-balances'] = InventoryBalance
+        return endpoints
+
+    def get_routes(self):
+        """GET routes besides list and retrieve: plain paths and router actions."""
+        routes = set()
+        for module in map(import_module, API_URL_MODULES):
+            for pattern in module.urlpatterns:
+                view_class = getattr(getattr(pattern, 'callback', None), 'view_class', None)
+                if view_class is not None and hasattr(view_class, 'get'):
+                    routes.add(str(pattern.pattern))
+            for prefix, viewset, _basename in module.router.registry:
+                for action in viewset.get_extra_actions():
+                    if 'get' in action.mapping:
+                        routes.add(f"{prefix}/<pk>/{action.url_path}/" if action.detail else f"{prefix}/{action.url_path}/")
+        return routes - {'inventory-balances/', 'inventory-balances/<int:pk>/'}
+
+    def route_requests(self):
+        """route: (method, url, data) for every entry of API_ROUTE_BUDGETS."""
+        material = Material.objects.filter(category="supplied").order_by('pk').first()
+        locations = list(InventoryLocation.objects.order_by('pk')[:2])
+        po_line = ProcurementOrderLine.objects.filter(material=material, uom="KG").get()
+        return {
+            'companies/dropdown/': ('get', '/api/v1/companies/dropdown/', None),
+            'materials/dropdown/': ('get', '/api/v1/materials/dropdown/', None),
+            'inventory-locations/dropdown/': ('get', '/api/v1/inventory-locations/dropdown/', None),
+            'inventory-balances/as-of/': ('get', '/api/v1/inventory-balances/as-of/', {"date": "2026-01-31"}),
+            'inventory-balances/availability/': (
+                'get', '/api/v1/inventory-balances/availability/', {"material": material.pk, "uom": "ADT", "quantity": "5"}
+            ),
+            'procurement-orders/<pk>/allowed-transitions/': (
+                'get', f'/api/v1/procurement-orders/{po_line.po_id}/allowed-transitions/', None
+            ),
+            'boms/<pk>/tree/': ('get', f'/api/v1/boms/{Bom.objects.order_by("-pk").first().pk}/tree/', None),
+            'manufacturing-orders/<pk>/allowed-transitions/': (
+                'get', f'/api/v1/manufacturing-orders/{ManufacturingOrder.objects.first().pk}/allowed-transitions/', None
+            ),
+            'action/batch/': ('post', '/api/v1/action/batch/', {"actions": [
+                {"action": "enter_from_po_line", "po_line": po_line.pk, "location": locations[0].pk, "quantity": "1"},
+                {"action": "transfer", "from_location": locations[0].pk, "to_location": locations[1].pk,
+                 "material": material.pk, "uom": "ADT", "quantity": "2"},
+                {"action": "adjustment", "location": locations[0].pk, "material": material.pk,
+                 "uom": "ADT", "new_quantity": "5"},
+            ]}),
+        }
+
+    def test_every_endpoint_is_budgeted(self):
+        self.assertEqual(set(self.endpoints()), set(API_QUERY_BUDGETS))
+        self.assertEqual(self.get_routes() | {'action/batch/'}, set(API_ROUTE_BUDGETS))
+
+    def test_other_routes_stay_within_budget(self):
+        for route, (method, url, data) in self.route_requests().items():
+            with self.subTest(route):
+                with CaptureQueriesContext(connection) as queries:
+                    response = getattr(self.client, method)(url, data, format='json' if method == 'post' else None)
+                self.assertIn(response.status_code, (200, 201), f"{url}: {response.status_code}")
+                self.assertLessEqual(len(queries), API_ROUTE_BUDGETS[route])
+
+    def test_list_and_retrieve_stay_within_budget(self):
+        for prefix, model in self.endpoints().items():
+            list_budget, retrieve_budget = API_QUERY_BUDGETS[prefix]
+            with self.subTest(prefix):
+                url = f'/api/v1/{prefix}/'
+                small_page = self.count_queries(url, {'page_size': 2})
+                full_page = self.count_queries(url, {'page_size': 10})
+                self.assertEqual(full_page, small_page, f"{prefix} list queries grow with the page size")
+                self.assertLessEqual(full_page, list_budget)
+                # Empty inventory balances are hidden from the API
+                queryset = model.objects.exclude(quantity=0) if model is InventoryBalance else model.objects.all()
+                instance = queryset.order_by('-pk').first()
+                retrieve = self.count_queries(f'{url}{instance.pk}/')
+                self.assertLessEqual(retrieve, retrieve_budget)
@@ -2,12 +2,14 @@ from rest_framework import viewsets, status, filters, pagination
 from django.db import transaction
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from core.models import Company
+from django.db.models import Count, Prefetch, Q
+from core.models import Company, Contact
 from core.serializers.company_serializers import CompanySerializer
 from rest_framework.permissions import DjangoModelPermissions
 from rest_framework.decorators import action
 from safedelete.config import HARD_DELETE
 from simple_history.utils import bulk_create_with_history
+from core.querysets import with_created_meta
 
 class CustomPagination(pagination.PageNumberPagination):
     page_size = 10
@@ -35,7 +37,7 @@ class CompanyViewSet(viewsets.ModelViewSet):
       - ordering_fields: id, name, legal_name
     """
     http_method_names = ['get', 'post', 'patch', 'delete']
-    queryset = Company.objects.all().order_by('-id')
+    queryset = with_created_meta(Company.objects.all()).order_by('-id')
     serializer_class = CompanySerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['name', 'legal_name', 'e_mail', 'website', 'phone']
@@ -44,6 +46,14 @@ class CompanyViewSet(viewsets.ModelViewSet):
     pagination_class = CustomPagination
     permission_classes = [DjangoModelPermissions]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.annotate(contacts_count=Count('contacts', filter=Q(contacts__deleted__isnull=True)))
+        elif self.action == 'retrieve':
+            queryset = queryset.prefetch_related(Prefetch('contacts', queryset=with_created_meta(Contact.objects.all())))
+        return queryset
+
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
@@ -8,6 +8,7 @@ from rest_framework.views import exception_handler
 from rest_framework.permissions import DjangoModelPermissions
 from rest_framework.decorators import action
 from safedelete.config import HARD_DELETE
+from core.querysets import with_created_meta
 
 class CustomPagination(pagination.PageNumberPagination):
     page_size = 10
@@ -35,7 +36,7 @@ class ContactViewSet(viewsets.ModelViewSet):
       - search_fields: name, last_name, e_mail, phone, description
       - ordering_fields: id, name, last_name, company
     """
-    queryset = Contact.objects.all().order_by('-id')
+    queryset = with_created_meta(Contact.objects.all()).order_by('-id')
     serializer_class = ContactSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['company', 'name', 'last_name', 'gender', 'role', 'e_mail', 'phone']
@@ -8,6 +8,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import DjangoModelPermissions
 from safedelete.config import HARD_DELETE
 from simple_history.utils import bulk_create_with_history
+from core.querysets import with_created_meta
 
 class CustomPagination(pagination.PageNumberPagination):
     page_size = 10
@@ -35,7 +36,7 @@ class MaterialViewSet(viewsets.ModelViewSet):
       - search_fields: name, internal_code, description
       - ordering_fields: id, name, category, internal_code
     """
-    queryset = Material.objects.all().order_by('-id')
+    queryset = with_created_meta(Material.objects.all()).order_by('-id')
     serializer_class = MaterialSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'internal_code', 'name']
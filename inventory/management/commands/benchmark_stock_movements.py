@@ -0,0 +1,236 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+from django.utils import timezone
+from safedelete import HARD_DELETE
+from core.models import Company, Material
+from inventory.models import InventoryBalance, InventoryLocation, LocationBalance, StockMovement
+from inventory.services.snapshots import balances_as_of
+from procurement.models import ProcurementOrder, ProcurementOrderLine
+from sales.models import SalesOrder, SalesOrderLine
+
+BENCH_PREFIX = 'BENCH-'
+BENCH_AREA = 99
+UOM = 'ADT'
+
+
+@contextmanager
+def explicit_created_at():
+    # bulk_create would overwrite created_at with now, the fixture spreads it over time
+    field = StockMovement._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a StockMovement fixture and time the stock actions and hot reads, '
+        'once with the StockMovement indexes and once with the plain location FK index only'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--movements', type=int, default=5_000_000, help='Movements to seed (default: 5M)')
+        parser.add_argument('--materials', type=int, default=500, help='Materials to seed (default: 500)')
+        parser.add_argument('--locations', type=int, default=200, help='Locations to seed (default: 200)')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='bulk_create batch size (default: 10000)')
+        parser.add_argument('--runs', type=int, default=50, help='Timed runs per operation (default: 50)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+        parser.add_argument('--reuse', action='store_true', help='Time an already seeded fixture')
+        parser.add_argument('--skip-baseline', action='store_true', help='Do not drop the indexes for a baseline run')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the fixture and exit')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        if options['cleanup']:
+            self.cleanup()
+            return
+        if not options['reuse']:
+            self.cleanup()
+            self.seed(options)
+        self.load_fixture()
+
+        results = {'indexed': self.time_operations(options['runs'])}
+        if not options['skip_baseline']:
+            with self.without_indexes():
+                results['no indexes'] = self.time_operations(options['runs'])
+        self.report(results)
+
+    # ---- fixture ----
+
+    def seed(self, options):
+        self.stdout.write('Seeding fixture...')
+        self.user, _created = User.objects.get_or_create(username='bench')
+        Company.objects.get_or_create(legal_name=f'{BENCH_PREFIX}Vendor', defaults={'name': f'{BENCH_PREFIX}Vendor'})
+        Material.objects.bulk_create([
+            Material(name=f'{BENCH_PREFIX}{index}', category='supplied') for index in range(options['materials'])
+        ])
+        InventoryLocation.objects.bulk_create([
+            InventoryLocation(area=BENCH_AREA, section=index // 100, shelf=1, bin=index % 100, name=f'{BENCH_PREFIX}{index}')
+            for index in range(options['locations'])
+        ])
+        self.load_fixture()
+
+        start = timezone.now() - timedelta(days=730)
+        span = 730 * 24 * 3600
+        totals = {}
+        created = 0
+        with explicit_created_at():
+            while created < options['movements']:
+                size = min(options['batch_size'], options['movements'] - created)
+                batch = []
+                for _index in range(size):
+                    location_id = self.random.choice(self.location_ids)
+                    material_id = self.random.choice(self.material_ids)
+                    quantity = Decimal(self.random.randint(1, 20))
+                    action = self.random.choice([StockMovement.Action.IN, StockMovement.Action.ADJUST])
+                    batch.append(StockMovement(
+                        location_id=location_id, material_id=material_id, uom=UOM, quantity=quantity,
+                        action=action, unit_cost=Decimal('10.00'), reason='benchmark',
+                        created_at=start + timedelta(seconds=self.random.randrange(span)),
+                    ))
+                    totals[(location_id, material_id)] = totals.get((location_id, material_id), Decimal('0')) + quantity
+                StockMovement.objects.bulk_create(batch)
+                created += size
+                self.stdout.write(f'  {created} movements')
+
+        LocationBalance.objects.bulk_create([
+            LocationBalance(
+                location_id=location_id, material_id=material_id, uom=UOM, quantity=quantity,
+                total_cost=quantity * Decimal('10'), average_cost=Decimal('10'),
+            )
+            for (location_id, material_id), quantity in totals.items()
+        ], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Seeded {created} movements over {len(totals)} bins'))
+
+    def load_fixture(self):
+        self.user, _created = User.objects.get_or_create(username='bench')
+        self.vendor = Company.objects.get(legal_name=f'{BENCH_PREFIX}Vendor')
+        self.material_ids = list(Material.objects.filter(name__startswith=BENCH_PREFIX).values_list('id', flat=True))
+        self.location_ids = list(
+            InventoryLocation.objects.filter(area=BENCH_AREA).values_list('id', flat=True)
+        )
+
+    def cleanup(self):
+        materials = Material.objects.all_with_deleted().filter(name__startswith=BENCH_PREFIX)
+        StockMovement.objects.filter(material__in=materials).delete()
+        LocationBalance.objects.filter(material__in=materials).delete()
+        InventoryBalance.objects.filter(material__in=materials).delete()
+        ProcurementOrder.objects.all_with_deleted().filter(vendor__legal_name=f'{BENCH_PREFIX}Vendor').delete(force_policy=HARD_DELETE)
+        SalesOrder.objects.all_with_deleted().filter(customer__legal_name=f'{BENCH_PREFIX}Vendor').delete(force_policy=HARD_DELETE)
+        materials.delete(force_policy=HARD_DELETE)
+        InventoryLocation.objects.all_with_deleted().filter(area=BENCH_AREA).delete(force_policy=HARD_DELETE)
+        Company.objects.all_with_deleted().filter(legal_name=f'{BENCH_PREFIX}Vendor').delete(force_policy=HARD_DELETE)
+
+    # ---- timing ----
+
+    def rolled_back(self, prepare, operation):
+        """Times operation(prepare()) inside a transaction that is rolled back afterwards."""
+        try:
+            with transaction.atomic():
+                arguments = prepare()
+                started = time.perf_counter()
+                operation(*arguments)
+                elapsed = time.perf_counter() - started
+                raise Rollback(elapsed)
+        except Rollback as done:
+            return done.args[0]
+
+    def order_kwargs(self):
+        return {
+            'payment_term': 'CIA', 'payment_method': 'BANK_TRANSFER', 'incoterms': 'EXW',
+            'description': 'benchmark', 'currency': 'TRY', 'delivery_address': 'benchmark',
+        }
+
+    def pick(self):
+        material = Material.objects.get(pk=self.random.choice(self.material_ids))
+        balance = LocationBalance.objects.filter(material=material, uom=UOM, quantity__gt=0).order_by('?').first()
+        return material, InventoryLocation.objects.get(pk=balance.location_id)
+
+    def prepare_po_line(self):
+        material, location = self.pick()
+        po = ProcurementOrder.objects.create(vendor=self.vendor, status='ordered', **self.order_kwargs())
+        line = ProcurementOrderLine.objects.create(po=po, material=material, uom=UOM, quantity=Decimal('10'), unit_price=Decimal('10'))
+        return line, location
+
+    def prepare_so_line(self):
+        material, location = self.pick()
+        so = SalesOrder.objects.create(customer=self.vendor, status='approved', due_in_days=timedelta(0), **self.order_kwargs())
+        line = SalesOrderLine.objects.create(so=so, material=material, uom=UOM, quantity=Decimal('1'), unit_price=Decimal('10'))
+        return line, location
+
+    def prepare_pair(self):
+        material, location = self.pick()
+        return material, location, InventoryLocation.objects.get(pk=self.random.choice(self.location_ids))
+
+    def time_operations(self, runs):
+        operations = {
+            'enter_from_po_line': (self.prepare_po_line, lambda line, location: StockMovement.enter_from_po_line(
+                po_line=line, location=location, quantity=Decimal('1'), reason='benchmark', created_by=self.user)),
+            'exit_from_so_line': (self.prepare_so_line, lambda line, location: StockMovement.exit_from_so_line(
+                so_line=line, location=location, quantity=Decimal('1'), reason='benchmark', created_by=self.user)),
+            'adjustment': (self.pick, lambda material, location: StockMovement.adjustment(
+                location=location, material=material, uom=UOM, new_quantity=Decimal('1'), reason='benchmark', created_by=self.user)),
+            'transfer': (self.prepare_pair, lambda material, source, target: StockMovement.transfer(
+                from_location=source, to_location=target, material=material, quantity=Decimal('1'), uom=UOM,
+                reason='benchmark', created_by=self.user)),
+            'latest entry/exit': (self.pick, lambda material, location: [
+                StockMovement.objects.filter(material=material, uom=UOM, action=action).order_by('-created_at').values('created_at').first()
+                for action in (StockMovement.Action.IN, StockMovement.Action.OUT)
+            ]),
+            'bin ledger': (self.pick, lambda material, location: list(
+                StockMovement.objects.filter(location=location, material=material, uom=UOM).order_by('-created_at')[:50])),
+            'as-of (no snapshot, 1 material)': (self.pick, lambda material, location: balances_as_of(
+                timezone.now() - timedelta(days=self.random.randrange(730)), material_id=material.pk)),
+        }
+        timings = {}
+        for name, (prepare, operation) in operations.items():
+            self.stdout.write(f'  timing {name}...')
+            samples = [self.rolled_back(prepare, operation) for _run in range(runs)]
+            samples.sort()
+            timings[name] = (statistics.median(samples) * 1000, samples[int(len(samples) * 0.95) - 1] * 1000)
+        return timings
+
+    @contextmanager
+    def without_indexes(self):
+        indexes = StockMovement._meta.indexes
+        # Before the indexes were added the location FK had its own index,
+        # the baseline gets it back in place of stockmove_loc_mat_uom_idx
+        location_index = models.Index(fields=['location'], name='stockmove_location_base_idx')
+        self.stdout.write('Dropping StockMovement indexes for the baseline run...')
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(StockMovement, index)
+            editor.add_index(StockMovement, location_index)
+        try:
+            yield
+        finally:
+            self.stdout.write('Restoring StockMovement indexes...')
+            with connection.schema_editor() as editor:
+                editor.remove_index(StockMovement, location_index)
+                for index in indexes:
+                    editor.add_index(StockMovement, index)
+
+    def report(self, results):
+        phases = list(results)
+        self.stdout.write('')
+        header = f'{"operation":36}' + ''.join(f'{phase + " p50/p95 ms":>26}' for phase in phases)
+        self.stdout.write(header)
+        for name in results[phases[0]]:
+            row = f'{name:36}'
+            for phase in phases:
+                median, p95 = results[phase][name]
+                row += f'{median:>17.2f} / {p95:>6.2f}'
+            self.stdout.write(row)
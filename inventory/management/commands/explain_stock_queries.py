@@ -0,0 +1,64 @@
+import re
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from inventory.models import StockMovement
+from inventory.services.snapshots import movement_totals
+
+INDEX_PATTERN = re.compile(r'(?:Index(?: Only)? Scan(?: Backward)? using|USING (?:COVERING )?INDEX) "?([\w]+)"?')
+
+
+class Command(BaseCommand):
+    help = 'Print the query plan and the indexes used by the hot StockMovement queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE (PostgreSQL only)',
+        )
+        parser.add_argument(
+            '--verbose-plan',
+            action='store_true',
+            help='Print the full plan of every query',
+        )
+
+    def hot_queries(self, sample):
+        key = {'material_id': sample.material_id, 'uom': sample.uom}
+        return [
+            ('latest entry (InventoryBalanceSerializer)',
+             StockMovement.objects.filter(action=StockMovement.Action.IN, **key).order_by('-created_at').values('created_at')[:1]),
+            ('latest exit (InventoryBalanceSerializer)',
+             StockMovement.objects.filter(action=StockMovement.Action.OUT, **key).order_by('-created_at').values('created_at')[:1]),
+            ('bin ledger (location, material, uom)',
+             StockMovement.objects.filter(location_id=sample.location_id, **key).order_by('-created_at')[:50]),
+            ('as-of delta (snapshots)',
+             movement_totals(sample.created_at - timedelta(days=1), sample.created_at, end_inclusive=True)),
+            ('movements of a po line',
+             StockMovement.objects.filter(po_line_id=sample.po_line_id or 0)),
+            ('movements of a so line',
+             StockMovement.objects.filter(so_line_id=sample.so_line_id or 0)),
+        ]
+
+    def handle(self, *args, **options):
+        sample = StockMovement.objects.order_by('-id').first()
+        if sample is None:
+            self.stdout.write(self.style.WARNING('No stock movements to sample query parameters from'))
+            return
+
+        explain_options = {}
+        if options['analyze']:
+            if connection.vendor != 'postgresql':
+                self.stdout.write(self.style.WARNING('--analyze is only supported on PostgreSQL, ignoring'))
+            else:
+                explain_options['analyze'] = True
+
+        for label, queryset in self.hot_queries(sample):
+            plan = queryset.explain(**explain_options)
+            indexes = sorted(set(INDEX_PATTERN.findall(plan)))
+            if indexes:
+                self.stdout.write(self.style.SUCCESS(f'{label}: {", ".join(indexes)}'))
+            else:
+                self.stdout.write(self.style.ERROR(f'{label}: no index used'))
+            if options['verbose_plan']:
+                self.stdout.write(plan)
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:45
+
+import core.fields
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_location_balances(apps, schema_editor):
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    LocationBalance = apps.get_model('inventory', 'LocationBalance')
+    positive = models.Q(quantity__gt=0)
+    rows = (
+        StockMovement.objects
+        .values('location_id', 'material_id', 'uom')
+        .annotate(
+            on_hand=models.Sum('quantity'),
+            positive_qty=models.Sum('quantity', filter=positive),
+            positive_cost=models.Sum(
+                models.F('quantity') * models.F('unit_cost'),
+                filter=positive,
+                output_field=models.DecimalField(max_digits=36, decimal_places=6),
+            ),
+        )
+    )
+    balances = []
+    for row in rows:
+        on_hand = row['on_hand'] or Decimal('0')
+        average = (Decimal(row['positive_cost']) / Decimal(row['positive_qty'])) if row['positive_qty'] else Decimal('0')
+        balances.append(LocationBalance(
+            location_id=row['location_id'],
+            material_id=row['material_id'],
+            uom=row['uom'],
+            quantity=on_hand,
+            total_cost=(on_hand * average) if on_hand > 0 else Decimal('0'),
+        ))
+    LocationBalance.objects.bulk_create(balances, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_company_deleted_company_deleted_by_cascade_and_more'),
+        ('inventory', '0013_alter_stockmovement_po_line_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uom', core.fields.UOMField(choices=[('ADT', 'Adet'), ('KG', 'Kilogram'), ('G', 'Gram'), ('L', 'Litre'), ('ML', 'Mililitre'), ('M', 'Metre'), ('BOX', 'Koli'), ('PLT', 'Palet')], default='ADT', max_length=4, verbose_name='Birim')),
+                ('quantity', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=30, verbose_name='Miktar')),
+                ('total_cost', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=36, verbose_name='Toplam maliyet')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncellendi')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='balances', to='inventory.inventorylocation', verbose_name='Konum')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.material', verbose_name='Malzeme')),
+            ],
+            options={
+                'verbose_name': 'Location Balance',
+                'verbose_name_plural': 'Location Balances',
+                'unique_together': {('location', 'material', 'uom')},
+            },
+        ),
+        migrations.RunPython(backfill_location_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:46
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def backfill_average_cost(apps, schema_editor):
+    LocationBalance = apps.get_model('inventory', 'LocationBalance')
+    balances = list(LocationBalance.objects.filter(quantity__gt=0))
+    for balance in balances:
+        balance.average_cost = (Decimal(balance.total_cost) / Decimal(balance.quantity)).quantize(Decimal('0.000001'))
+    LocationBalance.objects.bulk_update(balances, ['average_cost'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_locationbalance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='locationbalance',
+            name='average_cost',
+            field=models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=36, verbose_name='Ortalama birim maliyet'),
+        ),
+        migrations.RunPython(backfill_average_cost, migrations.RunPython.noop),
+    ]
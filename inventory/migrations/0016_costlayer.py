@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:47
+
+import core.fields
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+        ('inventory', '0015_locationbalance_average_cost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uom', core.fields.UOMField(choices=[('ADT', 'Adet'), ('KG', 'Kilogram'), ('G', 'Gram'), ('L', 'Litre'), ('ML', 'Mililitre'), ('M', 'Metre'), ('BOX', 'Koli'), ('PLT', 'Palet')], default='ADT', max_length=4, verbose_name='Birim')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=30, verbose_name='Miktar')),
+                ('remaining_quantity', models.DecimalField(decimal_places=2, max_digits=30, verbose_name='Kalan miktar')),
+                ('unit_cost', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=36, verbose_name='Birim maliyet')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturuldu')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='cost_layers', to='inventory.inventorylocation', verbose_name='Konum')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.material', verbose_name='Malzeme')),
+                ('source', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cost_layers', to='inventory.stockmovement', verbose_name='Kaynak hareket')),
+            ],
+            options={
+                'verbose_name': 'Cost Layer',
+                'verbose_name_plural': 'Cost Layers',
+                'indexes': [models.Index(condition=models.Q(('remaining_quantity__gt', 0)), fields=['location', 'material', 'uom', 'id'], name='costlayer_open_fifo_idx')],
+            },
+        ),
+    ]
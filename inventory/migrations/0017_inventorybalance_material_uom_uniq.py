@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:52
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_balances(apps, schema_editor):
+    # The old get_or_create signal could race into several rows per key
+    InventoryBalance = apps.get_model('inventory', 'InventoryBalance')
+    duplicates = (
+        InventoryBalance.objects.values('material_id', 'uom')
+        .annotate(rows=Count('id'), total=Sum('quantity'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        balances = InventoryBalance.objects.filter(material_id=row['material_id'], uom=row['uom']).order_by('id')
+        keep = balances.first()
+        balances.exclude(pk=keep.pk).delete()
+        keep.quantity = row['total']
+        keep.save(update_fields=['quantity'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+        ('inventory', '0016_costlayer'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_balances, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inventorybalance',
+            constraint=models.UniqueConstraint(fields=('material', 'uom'), name='inventorybalance_material_uom_uniq'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:53
+
+import core.fields
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+        ('inventory', '0017_inventorybalance_material_uom_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('closing_date', models.DateField(unique=True, verbose_name='Kapanış tarihi')),
+                ('period', models.CharField(choices=[('daily', 'Günlük'), ('monthly', 'Aylık')], default='daily', max_length=16, verbose_name='Periyot')),
+                ('cutoff', models.DateTimeField(unique=True, verbose_name='Kesim zamanı')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturuldu')),
+            ],
+            options={
+                'verbose_name': 'Stock Snapshot',
+                'verbose_name_plural': 'Stock Snapshots',
+                'ordering': ['-cutoff'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshotLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uom', core.fields.UOMField(choices=[('ADT', 'Adet'), ('KG', 'Kilogram'), ('G', 'Gram'), ('L', 'Litre'), ('ML', 'Mililitre'), ('M', 'Metre'), ('BOX', 'Koli'), ('PLT', 'Palet')], default='ADT', max_length=4, verbose_name='Birim')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=30, verbose_name='Miktar')),
+                ('value', models.DecimalField(decimal_places=6, default=Decimal('0'), max_digits=36, verbose_name='Değer')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='snapshot_lines', to='inventory.inventorylocation', verbose_name='Konum')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.material', verbose_name='Malzeme')),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='inventory.stocksnapshot', verbose_name='Kapanış')),
+            ],
+            options={
+                'verbose_name': 'Stock Snapshot Line',
+                'verbose_name_plural': 'Stock Snapshot Lines',
+                'unique_together': {('snapshot', 'location', 'material', 'uom')},
+            },
+        ),
+    ]
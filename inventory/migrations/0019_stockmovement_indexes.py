@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+        ('inventory', '0018_stocksnapshot'),
+        ('procurement', '0019_alter_historicalprocurementorder_due_in_days_and_more'),
+        ('sales', '0006_historicalsalesorderline_line_number_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='location',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='inventory.inventorylocation', verbose_name='Konum'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['location', 'material', 'uom', 'created_at'], name='stockmove_loc_mat_uom_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['material', 'uom', 'action', '-created_at'], name='stockmove_mat_uom_act_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['created_at'], include=('location', 'material', 'uom', 'quantity', 'unit_cost'), name='stockmove_created_cover_idx'),
+        ),
+    ]
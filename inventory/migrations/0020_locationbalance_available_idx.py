@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+        ('inventory', '0019_stockmovement_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='locationbalance',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['material', 'uom', '-quantity'], name='locbal_available_idx'),
+        ),
+    ]
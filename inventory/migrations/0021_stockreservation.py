@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:59
+
+import core.fields
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+        ('inventory', '0020_locationbalance_available_idx'),
+        ('sales', '0006_historicalsalesorderline_line_number_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='locationbalance',
+            name='reserved_quantity',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=30, verbose_name='Rezerve miktar'),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uom', core.fields.UOMField(choices=[('ADT', 'Adet'), ('KG', 'Kilogram'), ('G', 'Gram'), ('L', 'Litre'), ('ML', 'Mililitre'), ('M', 'Metre'), ('BOX', 'Koli'), ('PLT', 'Palet')], default='ADT', max_length=4, verbose_name='Birim')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=30, verbose_name='Miktar')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturuldu')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reservations', to='inventory.inventorylocation', verbose_name='Konum')),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.material', verbose_name='Malzeme')),
+                ('so_line', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='sales.salesorderline', verbose_name='SO#')),
+            ],
+            options={
+                'verbose_name': 'Stock Reservation',
+                'verbose_name_plural': 'Stock Reservations',
+                'unique_together': {('so_line', 'location')},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0021_stockreservation'),
+        ('production', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='mo',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movements', to='production.manufacturingorder', verbose_name='MO#'),
+        ),
+    ]
@@ -1,2 +1,5 @@
 from .inventory_location import InventoryLocation
-from .stock_movement import StockMovement, InventoryBalance
\ No newline at end of file
+from .cost_layer import CostLayer
+from .stock_movement import StockMovement, InventoryBalance, LocationBalance
+from .stock_snapshot import StockSnapshot, StockSnapshotLine
+from .stock_reservation import StockReservation
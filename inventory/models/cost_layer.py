@@ -0,0 +1,34 @@
+from decimal import Decimal
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from core.fields import UOMField
+
+
+class CostLayer(models.Model):
+    """
+    A FIFO receipt layer. Created for every receipt of a FIFO costed material
+    and drained oldest-first by exits, so a consumption only touches the
+    first few open layers of its (location, material, uom).
+    """
+    location =           models.ForeignKey("inventory.InventoryLocation", verbose_name=_("Konum"), related_name='cost_layers', on_delete=models.PROTECT)
+    material =           models.ForeignKey("core.Material", verbose_name=_("Malzeme"), on_delete=models.CASCADE)
+    uom =                UOMField(null=False, blank=False)
+    source =             models.ForeignKey("inventory.StockMovement", verbose_name=_("Kaynak hareket"), related_name='cost_layers', on_delete=models.SET_NULL, null=True, blank=True)
+    quantity =           models.DecimalField(_("Miktar"), max_digits=30, decimal_places=2)
+    remaining_quantity = models.DecimalField(_("Kalan miktar"), max_digits=30, decimal_places=2)
+    unit_cost =          models.DecimalField(_("Birim maliyet"), max_digits=36, decimal_places=6, default=Decimal('0'))
+    created_at =         models.DateTimeField(auto_now_add=True, verbose_name=_("Oluşturuldu"))
+
+    class Meta:
+        verbose_name = _("Cost Layer")
+        verbose_name_plural = _("Cost Layers")
+        indexes = [
+            models.Index(
+                fields=['location', 'material', 'uom', 'id'],
+                name='costlayer_open_fifo_idx',
+                condition=models.Q(remaining_quantity__gt=0),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.material_id} {self.remaining_quantity}/{self.quantity} @ {self.unit_cost}"
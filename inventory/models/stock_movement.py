@@ -9,12 +9,147 @@ from sales.models import SalesOrderLine
 from inventory.models import InventoryLocation
 from core.models import Material
 from rest_framework.exceptions import ValidationError
-from django.db import transaction
+from django.db import transaction, connections, router
+from collections import defaultdict
+from inventory.services import costing
+from core.services.transactions import increment_within_limit
+
+class InventoryBalanceQuerySet(models.QuerySet):
+    def with_latest_movements(self):
+        """Annotates latest_entry / latest_exit, read from stockmove_mat_uom_act_idx."""
+        def latest(action):
+            return models.Subquery(
+                StockMovement.objects.filter(
+                    material=models.OuterRef('material'), uom=models.OuterRef('uom'), action=action
+                ).order_by('-created_at').values('created_at')[:1]
+            )
+        return self.annotate(
+            latest_entry=latest(StockMovement.Action.IN),
+            latest_exit=latest(StockMovement.Action.OUT),
+        )
+
 
 class InventoryBalance(models.Model):
     material = models.ForeignKey("core.Material", verbose_name=_("Malzeme"), on_delete=models.CASCADE, null=False, blank=False)
     quantity = models.DecimalField(_("Miktar"), max_digits=30, decimal_places=2)
     uom = UOMField(null=False, blank=False)
+    objects = InventoryBalanceQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['material', 'uom'], name='inventorybalance_material_uom_uniq'),
+        ]
+
+    @classmethod
+    def apply_movements(cls, movements):
+        deltas = defaultdict(decimal.Decimal)
+        for movement in movements:
+            deltas[(movement.material_id, movement.uom)] += decimal.Decimal(movement.quantity)
+        cls.apply_deltas(deltas)
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """
+        Adds aggregated quantity deltas to the (material, uom) roll-up with a
+        single INSERT ... ON CONFLICT DO UPDATE SET quantity = quantity + delta,
+        so concurrent writers never lose each other's updates.
+        deltas: {(material_id, uom): Decimal}
+        """
+        rows = [
+            (material_id, uom, str(decimal.Decimal(delta).quantize(decimal.Decimal('0.01'))))
+            for (material_id, uom), delta in sorted(deltas.items()) if delta
+        ]
+        if not rows:
+            return
+        connection = connections[router.db_for_write(cls)]
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            for material_id, uom, delta in rows:
+                updated = cls.objects.filter(material_id=material_id, uom=uom).update(quantity=models.F('quantity') + decimal.Decimal(delta))
+                if not updated:
+                    cls.objects.create(material_id=material_id, uom=uom, quantity=delta)
+            return
+        qn = connection.ops.quote_name
+        table = qn(cls._meta.db_table)
+        placeholders = ", ".join(["(%s, %s, %s)"] * len(rows))
+        sql = (
+            f"INSERT INTO {table} ({qn('material_id')}, {qn('uom')}, {qn('quantity')}) VALUES {placeholders} "
+            f"ON CONFLICT ({qn('material_id')}, {qn('uom')}) "
+            f"DO UPDATE SET {qn('quantity')} = {table}.{qn('quantity')} + EXCLUDED.{qn('quantity')}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [value for row in rows for value in row])
+
+
+class LocationBalance(models.Model):
+    """
+    Running on-hand quantity and cost basis per (location, material, uom).
+    Updated by every StockMovement write so that actions read a single
+    locked row instead of aggregating the whole ledger.
+    """
+    location =     models.ForeignKey("inventory.InventoryLocation", verbose_name=_("Konum"), related_name='balances', on_delete=models.PROTECT)
+    material =     models.ForeignKey("core.Material", verbose_name=_("Malzeme"), on_delete=models.CASCADE)
+    uom =          UOMField(null=False, blank=False)
+    quantity =     models.DecimalField(_("Miktar"), max_digits=30, decimal_places=2, default=decimal.Decimal('0.00'))
+    total_cost =   models.DecimalField(_("Toplam maliyet"), max_digits=36, decimal_places=6, default=decimal.Decimal('0'))
+    average_cost = models.DecimalField(_("Ortalama birim maliyet"), max_digits=36, decimal_places=6, default=decimal.Decimal('0'))
+    reserved_quantity = models.DecimalField(_("Rezerve miktar"), max_digits=30, decimal_places=2, default=decimal.Decimal('0.00'))
+    updated_at =   models.DateTimeField(auto_now=True, verbose_name=_("Güncellendi"))
+
+    class Meta:
+        unique_together = ('location', 'material', 'uom')
+        indexes = [
+            # Pickable bins of a material, fullest first
+            models.Index(
+                fields=['material', 'uom', '-quantity'], condition=models.Q(quantity__gt=0),
+                name='locbal_available_idx',
+            ),
+        ]
+        verbose_name = _("Location Balance")
+        verbose_name_plural = _("Location Balances")
+
+    @classmethod
+    def lock(cls, location, material, uom, create=True):
+        """
+        Returns the balance row for the key locked with select_for_update.
+        Creates an empty row when create is True, otherwise returns None if missing.
+        """
+        qs = cls.objects.select_for_update()
+        if create:
+            balance, _created = qs.get_or_create(location=location, material=material, uom=uom)
+            return balance
+        return qs.filter(location=location, material=material, uom=uom).first()
+
+    @property
+    def available_quantity(self):
+        """Available-to-promise: on hand minus what approved sales orders reserved."""
+        return self.quantity - self.reserved_quantity
+
+    @property
+    def cost_engine(self):
+        return costing.engine_for(self.material)
+
+    @property
+    def unit_cost(self):
+        """Current cost per unit according to the material's costing method."""
+        return self.cost_engine.current_cost(self)
+
+    def receive(self, quantity, unit_cost, source=None):
+        self.cost_engine.receive(self, quantity, unit_cost, source=source)
+        self.save(update_fields=['quantity', 'total_cost', 'average_cost', 'updated_at'])
+
+    def issue(self, quantity):
+        """Takes quantity out and returns the unit cost it was valued at."""
+        unit_cost = self.cost_engine.issue(self, quantity)
+        self.save(update_fields=['quantity', 'total_cost', 'average_cost', 'updated_at'])
+        return unit_cost
+
+
+class StockMovementManager(models.Manager):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        InventoryBalance.apply_movements(objs)
+        return objs
+
 
 class StockMovement(models.Model):
     class Action(models.TextChoices):
@@ -28,22 +163,42 @@ class StockMovement(models.Model):
     material =   models.ForeignKey("core.Material", verbose_name=_("Malzeme"), on_delete=models.PROTECT, null=False, blank=False)
     uom =        UOMField()
     quantity =   models.DecimalField(_("Miktar"), max_digits=30, decimal_places=2, null=False, blank=False)
-    location =   models.ForeignKey("inventory.InventoryLocation", verbose_name=_("Konum"), on_delete=models.PROTECT)
+    location =   models.ForeignKey("inventory.InventoryLocation", verbose_name=_("Konum"), on_delete=models.PROTECT, db_index=False)
     action =     models.CharField(max_length=16,choices=Action.choices,verbose_name=_("Eylem"),null=False,blank=False)
     unit_cost =  models.DecimalField(_("Birim fiyat"), max_digits=30, decimal_places=2)
     po_line =    models.ForeignKey("procurement.ProcurementOrderLine", verbose_name=_("PO#"), on_delete=models.CASCADE,null=True, blank=True, default=None)
     so_line =    models.ForeignKey("sales.SalesOrderLine", verbose_name=_("SO#"), on_delete=models.CASCADE,null=True, blank=True, default=None)
+    mo =         models.ForeignKey("production.ManufacturingOrder", verbose_name=_("MO#"), related_name='movements', on_delete=models.PROTECT, null=True, blank=True, default=None)
     reason =     models.TextField(_("Gerekçe"))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Oluşturuldu"))
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, null=True, blank=True, verbose_name=_("Oluşturan"))
+    objects = StockMovementManager()
 
     class Meta:
+        indexes = [
+            # Per-bin ledger, its leading column replaces the plain location FK index
+            models.Index(fields=['location', 'material', 'uom', 'created_at'], name='stockmove_loc_mat_uom_idx'),
+            # Latest entry/exit of a material
+            models.Index(fields=['material', 'uom', 'action', '-created_at'], name='stockmove_mat_uom_act_idx'),
+            # As-of deltas and snapshot closings, covering on PostgreSQL
+            models.Index(
+                fields=['created_at'], include=['location', 'material', 'uom', 'quantity', 'unit_cost'],
+                name='stockmove_created_cover_idx',
+            ),
+        ]
         permissions = [
             ("transact_stockrecord", "Enter/exit stock, see incoming and exits"),
         ]
         verbose_name = _("Stock Record")
         verbose_name_plural = _("Stock Records")
         
+    def save(self, *args, **kwargs):
+        creating = self.pk is None
+        super().save(*args, **kwargs)
+        # Movements are append-only, only inserts move the roll-up
+        if creating:
+            InventoryBalance.apply_movements([self])
+
     @property
     def po(self):
         """Return the related PO object via po_line, or None if not set."""
@@ -56,6 +211,10 @@ class StockMovement(models.Model):
     
     
     
+    @staticmethod
+    def _unit_cost(value):
+        return decimal.Decimal(value).quantize(decimal.Decimal('0.01'))
+
     @classmethod
     @transaction.atomic
     def enter_from_po_line(
@@ -72,14 +231,17 @@ class StockMovement(models.Model):
                 raise ValidationError({'quantity': _('Miktar, Palet, Koli veya Adet birimleri için tam sayı olmalıdır.')})
         if quantity <= 0:
             raise ValidationError(_("Girişlerde miktar pozitif olmalıdır."))
-        if quantity > po_line.quantity_left:
+        if quantity > po_line.quantity_left or not increment_within_limit(
+            po_line, 'quantity_received', quantity, 'quantity', created_by
+        ):
             raise ValidationError(_('Alış emrinde kalandan fazla miktar girilemez.'))
-        po_line._history_user = created_by #type: ignore
-        po_line.quantity_received += quantity
-        po_line.save()
-        return cls.objects.create(
+        # The conditional update bypasses save(), keep the stored open_quantity in step
+        po_line.po.refresh_totals()
+        balance = LocationBalance.lock(location, po_line.material, po_line.uom)
+        movement = cls.objects.create(
             location=location,
             material=po_line.material,
+            uom=po_line.uom,
             quantity=quantity,
             unit_cost=po_line.unit_price,
             created_by=created_by,
@@ -87,6 +249,8 @@ class StockMovement(models.Model):
             po_line=po_line,
             action=cls.Action.IN
         )
+        balance.receive(quantity, po_line.unit_price, source=movement)
+        return movement
         
         
      
@@ -106,31 +270,36 @@ class StockMovement(models.Model):
                 raise ValidationError({'quantity': _('Miktar, Palet, Koli veya Adet birimleri için tam sayı olmalıdır.')})
         if quantity <= 0:
             raise ValidationError(_('Miktar pozitif olmalıdır'))
-        if quantity > so_line.quantity_left:
+        # The conditional update locks the line first, same order as the batch path
+        if quantity > so_line.quantity_left or not increment_within_limit(
+            so_line, 'quantity_sent', quantity, 'quantity', created_by
+        ):
             raise ValidationError(_('Gönderilecek miktar satışta kalandan fazla olamaz'))
+        so_line.so.refresh_totals()
         material = so_line.material
         uom = so_line.uom
-        deductible_records = cls.objects.filter(location=location, material=material, uom=uom)
-        available_qty = deductible_records.aggregate(total=models.Sum('quantity'))['total'] or 0
-        if not deductible_records.exists():
+        balance = LocationBalance.lock(location, material, uom, create=False)
+        if balance is None:
             raise ValidationError(_('Verilen konumda bu malzeme bu birimle mevcut değil'))
-        if quantity > available_qty:
+        if quantity > balance.quantity:
             raise ValidationError(_('Bu depolama bölgesinde bu miktarda malzeme yok'))
-        positive_records = [rec for rec in deductible_records if rec.quantity > 0]
-        positive_qty = sum(float(rec.quantity) for rec in positive_records)
-        total_cost = sum(float(rec.unit_cost) * float(rec.quantity) for rec in positive_records)
-        weighted_avg_cost = (total_cost / positive_qty) if positive_qty else 0
-        so_line._history_user = created_by #type: ignore
-        so_line.quantity_sent += quantity
-        so_line.save()
+        from inventory.services import reservations
+        line_reservations = reservations.lock_line_reservations([so_line.pk])[so_line.pk]
+        own_reserved = sum((r.quantity for r in line_reservations if r.location_id == location.pk), decimal.Decimal('0'))
+        if quantity > balance.available_quantity + own_reserved:
+            raise ValidationError(_('Bu depolama bölgesindeki malzeme başka siparişlere rezerve edilmiş'))
+        unit_cost = balance.issue(quantity)
+        released = reservations.consume(line_reservations, location.pk, quantity, so_line.quantity_left)
+        reservations.save_reservations(line_reservations)
+        reservations.release_counters(material.pk, uom, released)
         return cls.objects.create(
             material=material,
             uom=uom,
-            quantity=-abs(so_line.quantity),
+            quantity=-abs(quantity),
             location=location,
             so_line=so_line,
             action=cls.Action.OUT,
-            unit_cost=weighted_avg_cost,
+            unit_cost=cls._unit_cost(unit_cost),
             reason=reason,
             created_by=created_by
         )
@@ -159,38 +328,36 @@ class StockMovement(models.Model):
             raise ValidationError(_('Malzeme boş olamaz!'))
         if new_quantity < 0:
             raise ValidationError(_('Yeni miktar 0 dan az olamaz!'))
-        records = cls.objects.filter(location=location, material=material, uom=uom)
-        positive_records = [rec for rec in records if rec.quantity > 0]
-        positive_qty = sum(float(rec.quantity) for rec in positive_records)
-        total_cost = sum(float(rec.unit_cost) * float(rec.quantity) for rec in positive_records)
-        weighted_avg_cost = (total_cost / positive_qty) if positive_qty else 0
-        available_qty = records.aggregate(total=models.Sum('quantity'))['total'] or 0
+        balance = LocationBalance.lock(location, material, uom)
+        available_qty = balance.quantity
         shared_fields = {
             "material": material,
             "uom": uom,
             "location": location,
-            "unit_cost": weighted_avg_cost,
             "action": cls.Action.ADJUST,
             "reason": reason,
             "created_by": created_by
         }
-        if new_quantity == 0:
-            return cls.objects.create(
-                quantity = -abs(available_qty),
-                **shared_fields
-            )
         if new_quantity < available_qty:
             deduction = available_qty - new_quantity
+            if deduction > balance.available_quantity:
+                raise ValidationError(_('Yeni miktar bu depolama bölgesinde rezerve edilen miktarın altında olamaz'))
+            unit_cost = balance.issue(deduction)
             return cls.objects.create(
                 quantity = -abs(deduction),
+                unit_cost = cls._unit_cost(unit_cost),
                 **shared_fields
             )
         if new_quantity > available_qty:
             addition = new_quantity - available_qty
-            return cls.objects.create(
+            unit_cost = balance.unit_cost
+            movement = cls.objects.create(
                 quantity = addition,
+                unit_cost = cls._unit_cost(unit_cost),
                 **shared_fields
             )
+            balance.receive(addition, unit_cost, source=movement)
+            return movement
             
          
     @classmethod
@@ -208,29 +375,36 @@ class StockMovement(models.Model):
         if uom in ['PLT', 'BOX', 'ADT']:
             if quantity is not None and quantity % 1 != 0:
                 raise ValidationError({'quantity': _('Miktar, Palet, Koli veya Adet birimleri için tam sayı olmalıdır.')})
-        records = cls.objects.filter(location=from_location, material=material, uom=uom)
-        available_qty = records.aggregate(total=models.Sum('quantity'))['total'] or 0 
-        if quantity > available_qty:
+        if quantity <= 0:
+            raise ValidationError(_('Miktar pozitif olmalıdır'))
+        if from_location.pk == to_location.pk:
+            raise ValidationError(_('Kaynak ve hedef konum aynı olamaz'))
+        # Lock both rows in pk order so opposite transfers cannot deadlock
+        locations = sorted([from_location, to_location], key=lambda loc: loc.pk)
+        balances = {loc.pk: LocationBalance.lock(loc, material, uom) for loc in locations}
+        source = balances[from_location.pk]
+        if quantity > source.quantity:
             raise ValidationError(_('Transfer edilmeye çalışılan miktar mevcudu aşıyor'))
-        positive_records = [rec for rec in records if rec.quantity > 0]
-        positive_qty = sum(float(rec.quantity) for rec in positive_records)
-        total_cost = sum(float(rec.unit_cost) * float(rec.quantity) for rec in positive_records)
-        weighted_avg_cost = (total_cost / positive_qty) if positive_qty else 0
+        if quantity > source.available_quantity:
+            raise ValidationError(_('Bu depolama bölgesindeki malzeme başka siparişlere rezerve edilmiş'))
+        unit_cost = source.issue(quantity)
         shared_fields = {
             "uom": uom,
             "material": material,
             "reason": reason,
             "created_by": created_by,
             "action": cls.Action.TRANSFER,
-            "unit_cost": weighted_avg_cost
+            "unit_cost": cls._unit_cost(unit_cost)
         }
         cls.objects.create(
             **shared_fields,
             quantity = -abs(quantity),
             location = from_location
         )
-        return cls.objects.create(
+        movement = cls.objects.create(
             **shared_fields,
             quantity = abs(quantity),
             location = to_location
-        )
\ No newline at end of file
+        )
+        balances[to_location.pk].receive(quantity, unit_cost, source=movement)
+        return movement
@@ -0,0 +1,23 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from core.fields import UOMField
+
+
+class StockReservation(models.Model):
+    """
+    Stock promised to an approved sales order line at one bin. The sum of
+    the reservations of a (location, material, uom) is kept on
+    LocationBalance.reserved_quantity, so available-to-promise is read from
+    the balance row alone.
+    """
+    so_line =    models.ForeignKey("sales.SalesOrderLine", verbose_name=_("SO#"), related_name='reservations', on_delete=models.CASCADE)
+    location =   models.ForeignKey("inventory.InventoryLocation", verbose_name=_("Konum"), related_name='reservations', on_delete=models.PROTECT)
+    material =   models.ForeignKey("core.Material", verbose_name=_("Malzeme"), on_delete=models.CASCADE)
+    uom =        UOMField(null=False, blank=False)
+    quantity =   models.DecimalField(_("Miktar"), max_digits=30, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Oluşturuldu"))
+
+    class Meta:
+        unique_together = ('so_line', 'location')
+        verbose_name = _("Stock Reservation")
+        verbose_name_plural = _("Stock Reservations")
@@ -0,0 +1,42 @@
+from decimal import Decimal
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from core.fields import UOMField
+
+
+class StockSnapshot(models.Model):
+    """
+    A closing of the stock ledger. Every movement created before `cutoff` is
+    folded into the snapshot's lines, so an as-of query only has to add the
+    movements between the nearest snapshot and the requested moment.
+    """
+    class Period(models.TextChoices):
+        DAILY = "daily", _("Günlük")
+        MONTHLY = "monthly", _("Aylık")
+
+    closing_date = models.DateField(_("Kapanış tarihi"), unique=True)
+    period =       models.CharField(_("Periyot"), max_length=16, choices=Period.choices, default=Period.DAILY)
+    cutoff =       models.DateTimeField(_("Kesim zamanı"), unique=True)
+    created_at =   models.DateTimeField(auto_now_add=True, verbose_name=_("Oluşturuldu"))
+
+    class Meta:
+        ordering = ['-cutoff']
+        verbose_name = _("Stock Snapshot")
+        verbose_name_plural = _("Stock Snapshots")
+
+    def __str__(self):
+        return f"{self.closing_date} ({self.period})"
+
+
+class StockSnapshotLine(models.Model):
+    snapshot = models.ForeignKey(StockSnapshot, verbose_name=_("Kapanış"), related_name='lines', on_delete=models.CASCADE)
+    location = models.ForeignKey("inventory.InventoryLocation", verbose_name=_("Konum"), related_name='snapshot_lines', on_delete=models.PROTECT)
+    material = models.ForeignKey("core.Material", verbose_name=_("Malzeme"), on_delete=models.CASCADE)
+    uom =      UOMField(null=False, blank=False)
+    quantity = models.DecimalField(_("Miktar"), max_digits=30, decimal_places=2)
+    value =    models.DecimalField(_("Değer"), max_digits=36, decimal_places=6, default=Decimal('0'))
+
+    class Meta:
+        unique_together = ('snapshot', 'location', 'material', 'uom')
+        verbose_name = _("Stock Snapshot Line")
+        verbose_name_plural = _("Stock Snapshot Lines")
@@ -2,4 +2,7 @@ from .dropdown_serializers import InventoryLocationDropdownSerializer
 from .inventory_action_serializers import (ExitFromSOLineSerializer, 
                                            EnterFromPOLineSerializer, 
                                            AdjustmentSerializer,
-                                           TransferSerializer)
\ No newline at end of file
+                                           TransferSerializer,
+                                           StockMovementBatchSerializer,
+                                           StockMovementBatchItemSerializer,
+                                           load_batch_lookups)
\ No newline at end of file
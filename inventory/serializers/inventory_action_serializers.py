@@ -6,6 +6,7 @@ from inventory.models import InventoryLocation
 from core.models import Material
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
 
 class EnterFromPOLineSerializer(serializers.Serializer):
     location = serializers.PrimaryKeyRelatedField(queryset=InventoryLocation.objects.all(), required=True)
@@ -57,3 +58,80 @@ class TransferSerializer(serializers.Serializer):
                     'quantity': 'Miktar, Palet, Koli veya Adet birimleri için tam sayı olmalıdır.'
                 })
         return attrs
+
+
+class StockMovementBatchItemSerializer(serializers.Serializer):
+    """
+    One action of a batch. Related objects are given as ids and resolved from
+    context['lookups'], which load_batch_lookups() fills for the whole batch.
+    """
+    REQUIRED_FIELDS = {
+        'enter_from_po_line': ['po_line', 'location', 'quantity'],
+        'exit_from_so_line': ['so_line', 'location', 'quantity'],
+        'adjustment': ['location', 'material', 'uom', 'new_quantity'],
+        'transfer': ['from_location', 'to_location', 'material', 'uom', 'quantity'],
+    }
+    RELATED_FIELDS = {
+        'po_line': 'po_lines',
+        'so_line': 'so_lines',
+        'location': 'locations',
+        'from_location': 'locations',
+        'to_location': 'locations',
+        'material': 'materials',
+    }
+
+    action = serializers.ChoiceField(choices=list(REQUIRED_FIELDS))
+    po_line = serializers.IntegerField(required=False)
+    so_line = serializers.IntegerField(required=False)
+    location = serializers.IntegerField(required=False)
+    from_location = serializers.IntegerField(required=False)
+    to_location = serializers.IntegerField(required=False)
+    material = serializers.IntegerField(required=False)
+    uom = serializers.ChoiceField(choices=UOMField.Unit.choices, required=False)
+    quantity = serializers.DecimalField(max_digits=30, decimal_places=2, required=False)
+    new_quantity = serializers.DecimalField(max_digits=30, decimal_places=2, required=False)
+    reason = serializers.CharField(required=False, allow_blank=True)
+
+    def validate(self, attrs):
+        lookups = self.context['lookups']
+        required = self.REQUIRED_FIELDS[attrs['action']]
+        errors = {field: _('Bu alan zorunludur.') for field in required if attrs.get(field) is None}
+        for field, lookup in self.RELATED_FIELDS.items():
+            if field not in required or attrs.get(field) is None:
+                attrs.pop(field, None)
+                continue
+            obj = lookups[lookup].get(attrs[field])
+            if obj is None:
+                errors[field] = _('Geçersiz pk "%(pk)s" - obje bulunamadı.') % {'pk': attrs[field]}
+            else:
+                attrs[field] = obj
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+
+class StockMovementBatchSerializer(serializers.Serializer):
+    actions = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=1000)
+
+
+def load_batch_lookups(items):
+    """Loads every object referenced by a batch with one query per model."""
+    from procurement.models import ProcurementOrderLine
+    from sales.models import SalesOrderLine
+
+    def ids(*fields):
+        found = set()
+        for item in items:
+            for field in fields:
+                try:
+                    found.add(int(item.get(field)))
+                except (TypeError, ValueError):
+                    continue
+        return found
+
+    return {
+        'po_lines': ProcurementOrderLine.objects.select_related('po').in_bulk(ids('po_line')),
+        'so_lines': SalesOrderLine.objects.select_related('so').in_bulk(ids('so_line')),
+        'locations': InventoryLocation.objects.in_bulk(ids('location', 'from_location', 'to_location')),
+        'materials': Material.objects.in_bulk(ids('material')),
+    }
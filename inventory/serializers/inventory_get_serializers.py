@@ -1,14 +1,16 @@
-from inventory.models import InventoryBalance
+from inventory.models import InventoryBalance, LocationBalance
 from rest_framework import serializers
 from decimal import Decimal
+from django.utils.translation import gettext_lazy as _
 
 class InventoryBalanceSerializer(serializers.ModelSerializer):
     material_internal_code = serializers.CharField(source='material.internal_code', read_only=True)
     material_name = serializers.CharField(source='material.name', read_only=True)
     material_description = serializers.CharField(source='material.description', read_only=True)
     display_quantity = serializers.SerializerMethodField()
-    latest_entry = serializers.SerializerMethodField()
-    latest_exit = serializers.SerializerMethodField()
+    # Annotated by InventoryBalance.objects.with_latest_movements()
+    latest_entry = serializers.DateTimeField(read_only=True)
+    latest_exit = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = InventoryBalance
@@ -43,31 +45,70 @@ class InventoryBalanceSerializer(serializers.ModelSerializer):
                 quantized = value
             s = f"{quantized:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
         return f"{s} {uom_display}"
-    
-    
-    def get_latest_entry(self, obj):
-        from inventory.models.stock_movement import StockMovement
-        qs = StockMovement.objects.filter(
-            material=obj.material,
-            uom=obj.uom,
-            action=StockMovement.Action.IN
-        ).order_by('-created_at')
-        latest = qs.first()
-        if latest:
-            return latest.created_at
-        return None
-
-    def get_latest_exit(self, obj):
-        from inventory.models.stock_movement import StockMovement
-        qs = StockMovement.objects.filter(
-            material=obj.material,
-            uom=obj.uom,
-            action=StockMovement.Action.OUT
-        ).order_by('-created_at')
-        latest = qs.first()
-        if latest:
-            return latest.created_at
-        return None
-        
 
 
+class StockAsOfQuerySerializer(serializers.Serializer):
+    at = serializers.DateTimeField(required=False)
+    date = serializers.DateField(required=False)
+    location = serializers.IntegerField(required=False)
+    material = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        if ('at' in attrs) == ('date' in attrs):
+            raise serializers.ValidationError(_("'at' veya 'date' parametrelerinden yalnızca biri verilmelidir."))
+        return attrs
+
+
+class StockAsOfSerializer(serializers.Serializer):
+    location_id = serializers.IntegerField()
+    location_name = serializers.SerializerMethodField()
+    material_id = serializers.IntegerField()
+    material_internal_code = serializers.SerializerMethodField()
+    material_name = serializers.SerializerMethodField()
+    uom = serializers.CharField()
+    quantity = serializers.DecimalField(max_digits=30, decimal_places=2)
+    value = serializers.DecimalField(max_digits=36, decimal_places=2)
+
+    def get_location_name(self, obj):
+        location = self.context['locations'].get(obj['location_id'])
+        return location.name if location else None
+
+    def get_material_internal_code(self, obj):
+        material = self.context['materials'].get(obj['material_id'])
+        return material.internal_code if material else None
+
+    def get_material_name(self, obj):
+        material = self.context['materials'].get(obj['material_id'])
+        return material.name if material else None
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    material = serializers.IntegerField()
+    uom = serializers.CharField(required=False)
+    quantity = serializers.DecimalField(max_digits=30, decimal_places=2, required=False, min_value=Decimal('0.01'))
+
+    def validate(self, attrs):
+        if 'quantity' in attrs and 'uom' not in attrs:
+            raise serializers.ValidationError({'uom': _("Miktar verildiğinde birim de verilmelidir.")})
+        return attrs
+
+
+class LocationAvailabilitySerializer(serializers.ModelSerializer):
+    location_name = serializers.CharField(source='location.name', read_only=True)
+    location_type = serializers.CharField(source='location.type', read_only=True)
+    available_quantity = serializers.DecimalField(max_digits=30, decimal_places=2, read_only=True)
+    pick_quantity = serializers.DecimalField(max_digits=30, decimal_places=2, read_only=True, default=None)
+
+    class Meta:
+        model = LocationBalance
+        fields = [
+            'location',
+            'location_name',
+            'location_type',
+            'uom',
+            'quantity',
+            'reserved_quantity',
+            'available_quantity',
+            'pick_quantity',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,324 @@
+"""
+Batched stock movements for scanning sessions.
+
+A batch locks every affected order line and LocationBalance once, in a
+deterministic order, applies the actions in memory one after the other and
+then writes all StockMovement rows with a single bulk_create (which also
+applies the aggregated InventoryBalance deltas) and one bulk_update of the
+LocationBalance rows.
+Actions that fail their checks are reported and skipped, they never touch
+the in-memory state of the actions after them.
+Completing a manufacturing order goes through the same path with produce().
+"""
+from decimal import Decimal
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from simple_history.utils import get_history_manager_for_model
+from inventory.models import CostLayer, LocationBalance, StockMovement
+from inventory.services import reservations
+from procurement.models import ProcurementOrder, ProcurementOrderLine
+from sales.models import SalesOrder, SalesOrderLine
+
+INTEGER_UOMS = ['PLT', 'BOX', 'ADT']
+PO_RECEIVABLE_STATUSES = ['ordered', 'paid', 'billed']
+SO_SHIPPABLE_STATUSES = ['approved', 'billed', 'paid']
+
+
+def lock_balances(keys, create=()):
+    """
+    Locks the LocationBalance rows for the given (location_id, material_id, uom)
+    keys in key order, creating the missing ones listed in create (the keys
+    stock is received at) first. Returns ({key: balance}, created keys),
+    other missing keys are left out.
+    """
+    created = set()
+    if create:
+        key_filter = models.Q()
+        for location_id, material_id, uom in create:
+            key_filter |= models.Q(location_id=location_id, material_id=material_id, uom=uom)
+        created = set(create) - set(LocationBalance.objects.filter(key_filter).values_list('location_id', 'material_id', 'uom'))
+    if created:
+        LocationBalance.objects.bulk_create(
+            [LocationBalance(location_id=loc, material_id=mat, uom=uom) for loc, mat, uom in sorted(created)],
+            ignore_conflicts=True,
+        )
+    rows = reservations.lock_balances(set(keys) | set(create))
+    return {(row.location_id, row.material_id, row.uom): row for row in rows}, created
+
+
+class StockMovementBatch:
+
+    def __init__(self, created_by):
+        self.created_by = created_by
+        self.movements = []
+        self.opened_layers = []
+        self.dirty_balances = {}
+        self.dirty_po_lines = {}
+        self.dirty_so_lines = {}
+        self.dirty_reservations = {}
+        # Released reservations at bins the batch has not locked, applied with F() at flush
+        self.pending_releases = []
+        self.created_keys = set()
+
+    @transaction.atomic
+    def run(self, items):
+        """
+        items: [(index, validated_data)] as produced by StockMovementBatchItemSerializer.
+        Returns [(index, result_dict)] in the same order.
+        """
+        po_lines = self._lock_lines(ProcurementOrderLine, [data['po_line'].pk for _, data in items if 'po_line' in data])
+        so_lines = self._lock_lines(SalesOrderLine, [data['so_line'].pk for _, data in items if 'so_line' in data])
+        keys = [key for _, data in items for key in self._balance_keys(data, po_lines, so_lines)]
+        self.balances, self.created_keys = lock_balances(
+            [key for key, _receives in keys], create=[key for key, receives in keys if receives]
+        )
+        self.reservations = reservations.lock_line_reservations(so_lines)
+
+        results = []
+        for index, data in items:
+            handler = getattr(self, f"_{data['action']}")
+            first = len(self.movements)
+            try:
+                handler(data, po_lines, so_lines)
+            except ValidationError as exc:
+                results.append((index, {"index": index, "status": "error", "errors": exc.detail}))
+                continue
+            results.append((index, {"index": index, "status": "success", "movements": self.movements[first:]}))
+
+        self._flush()
+        for _index, result in results:
+            if result["status"] == "success":
+                result["movements"] = [movement.pk for movement in result["movements"]]
+        return results
+
+    @transaction.atomic
+    def produce(self, mo, consumed, produced, quantity, extra_cost=Decimal('0')):
+        """
+        Posts a production run of mo in one go: every consumed
+        (location_id, material_id, uom, quantity) leaves as MO_OUT, then
+        quantity of the produced (location_id, material_id, uom) key enters as
+        MO_IN, valued at the cost of what was consumed plus extra_cost.
+        Raises ValidationError before anything is written when a bin is short.
+        """
+        keys = [(location_id, material_id, uom) for location_id, material_id, uom, _quantity in consumed]
+        self.balances, self.created_keys = lock_balances(keys, create=[produced])
+        reason = f"Üretim emri {mo.mo_number}"
+        total_cost = extra_cost
+        for location_id, material_id, uom, needed in consumed:
+            balance = self._source((location_id, material_id, uom))
+            if needed > balance.available_quantity:
+                raise ValidationError(
+                    _('%(material)s için bu depolama bölgesinde yeterli serbest stok yok') % {'material': balance.material}
+                )
+        for location_id, material_id, uom, needed in consumed:
+            balance = self.balances[(location_id, material_id, uom)]
+            unit_cost = self._issue(balance, needed)
+            total_cost += unit_cost * needed
+            self._movement(balance, -needed, StockMovement.Action.MO_OUT, unit_cost, reason, mo=mo)
+        target = self.balances[produced]
+        unit_cost = total_cost / quantity
+        movement = self._movement(target, quantity, StockMovement.Action.MO_IN, unit_cost, reason, mo=mo)
+        self._receive(target, movement, quantity, unit_cost)
+        self._flush()
+        return self.movements
+
+    # ---- locking ----
+
+    def _lock_lines(self, model, pks):
+        if not pks:
+            return {}
+        rows = model.objects.select_for_update().select_related('material').filter(pk__in=set(pks)).order_by('pk')
+        return {row.pk: row for row in rows}
+
+    def _balance_keys(self, data, po_lines, so_lines):
+        """[(key, receives)] for the balances the action touches, only receiving ones are created."""
+        action = data['action']
+        if action == 'enter_from_po_line':
+            line = po_lines[data['po_line'].pk]
+            return [((data['location'].pk, line.material_id, line.uom), True)]
+        if action == 'exit_from_so_line':
+            line = so_lines[data['so_line'].pk]
+            return [((data['location'].pk, line.material_id, line.uom), False)]
+        if action == 'adjustment':
+            return [((data['location'].pk, data['material'].pk, data['uom']), True)]
+        return [
+            ((data['from_location'].pk, data['material'].pk, data['uom']), False),
+            ((data['to_location'].pk, data['material'].pk, data['uom']), True),
+        ]
+
+    def _source(self, key):
+        """The locked balance stock leaves from, missing ones fail like exit_from_so_line."""
+        balance = self.balances.get(key)
+        if balance is None:
+            raise ValidationError(_('Verilen konumda bu malzeme bu birimle mevcut değil'))
+        return balance
+
+    # ---- actions, checks first and mutations after ----
+
+    def _check_quantity(self, uom, quantity, field='quantity'):
+        if uom in INTEGER_UOMS and quantity % 1 != 0:
+            raise ValidationError({field: _('Miktar, Palet, Koli veya Adet birimleri için tam sayı olmalıdır.')})
+
+    def _enter_from_po_line(self, data, po_lines, so_lines):
+        line = po_lines[data['po_line'].pk]
+        quantity = data['quantity']
+        if data['po_line'].po.status not in PO_RECEIVABLE_STATUSES:
+            raise ValidationError(_('Satın alma depoya aktarılabilir statüde değil'))
+        self._check_quantity(line.uom, quantity)
+        if quantity <= 0:
+            raise ValidationError(_("Girişlerde miktar pozitif olmalıdır."))
+        if quantity > line.quantity_left:
+            raise ValidationError(_('Alış emrinde kalandan fazla miktar girilemez.'))
+        line.quantity_received += quantity
+        self.dirty_po_lines[line.pk] = line
+        balance = self.balances[(data['location'].pk, line.material_id, line.uom)]
+        movement = self._movement(
+            balance, quantity, StockMovement.Action.IN, line.unit_price,
+            data.get('reason', ''), po_line=line
+        )
+        self._receive(balance, movement, quantity, line.unit_price)
+
+    def _exit_from_so_line(self, data, po_lines, so_lines):
+        line = so_lines[data['so_line'].pk]
+        quantity = data['quantity']
+        if data['so_line'].so.status not in SO_SHIPPABLE_STATUSES:
+            raise ValidationError(_('Satış kalemi çıkmak için geçerli statüde değil'))
+        self._check_quantity(line.uom, quantity)
+        if quantity <= 0:
+            raise ValidationError(_('Miktar pozitif olmalıdır'))
+        if quantity > line.quantity_left:
+            raise ValidationError(_('Gönderilecek miktar satışta kalandan fazla olamaz'))
+        balance = self._source((data['location'].pk, line.material_id, line.uom))
+        if quantity > balance.quantity:
+            raise ValidationError(_('Bu depolama bölgesinde bu miktarda malzeme yok'))
+        line_reservations = self.reservations[line.pk]
+        own_reserved = sum((r.quantity for r in line_reservations if r.location_id == balance.location_id), Decimal('0'))
+        if quantity > balance.available_quantity + own_reserved:
+            raise ValidationError(_('Bu depolama bölgesindeki malzeme başka siparişlere rezerve edilmiş'))
+        line.quantity_sent += quantity
+        self.dirty_so_lines[line.pk] = line
+        unit_cost = self._issue(balance, quantity)
+        released = reservations.consume(line_reservations, balance.location_id, quantity, line.quantity_left)
+        self._release(line, released)
+        self._movement(
+            balance, -quantity, StockMovement.Action.OUT, unit_cost,
+            data.get('reason') or "Satış çıkışı", so_line=line
+        )
+
+    def _adjustment(self, data, po_lines, so_lines):
+        new_quantity = data['new_quantity']
+        self._check_quantity(data['uom'], new_quantity, 'new_quantity')
+        if new_quantity < 0:
+            raise ValidationError(_('Yeni miktar 0 dan az olamaz!'))
+        balance = self.balances[(data['location'].pk, data['material'].pk, data['uom'])]
+        reason = data.get('reason', '')
+        if new_quantity < balance.quantity:
+            deduction = balance.quantity - new_quantity
+            if deduction > balance.available_quantity:
+                raise ValidationError(_('Yeni miktar bu depolama bölgesinde rezerve edilen miktarın altında olamaz'))
+            unit_cost = self._issue(balance, deduction)
+            self._movement(balance, -deduction, StockMovement.Action.ADJUST, unit_cost, reason)
+        elif new_quantity > balance.quantity:
+            addition = new_quantity - balance.quantity
+            unit_cost = balance.unit_cost
+            movement = self._movement(balance, addition, StockMovement.Action.ADJUST, unit_cost, reason)
+            self._receive(balance, movement, addition, unit_cost)
+
+    def _transfer(self, data, po_lines, so_lines):
+        quantity = data['quantity']
+        self._check_quantity(data['uom'], quantity)
+        if quantity <= 0:
+            raise ValidationError(_('Miktar pozitif olmalıdır'))
+        if data['from_location'].pk == data['to_location'].pk:
+            raise ValidationError(_('Kaynak ve hedef konum aynı olamaz'))
+        source = self._source((data['from_location'].pk, data['material'].pk, data['uom']))
+        target = self.balances[(data['to_location'].pk, data['material'].pk, data['uom'])]
+        if quantity > source.quantity:
+            raise ValidationError(_('Transfer edilmeye çalışılan miktar mevcudu aşıyor'))
+        if quantity > source.available_quantity:
+            raise ValidationError(_('Bu depolama bölgesindeki malzeme başka siparişlere rezerve edilmiş'))
+        unit_cost = self._issue(source, quantity)
+        reason = data.get('reason', '')
+        self._movement(source, -quantity, StockMovement.Action.TRANSFER, unit_cost, reason)
+        movement = self._movement(target, quantity, StockMovement.Action.TRANSFER, unit_cost, reason)
+        self._receive(target, movement, quantity, unit_cost)
+
+    # ---- in-memory bookkeeping ----
+
+    def _movement(self, balance, quantity, action, unit_cost, reason, po_line=None, so_line=None, mo=None):
+        movement = StockMovement(
+            location_id=balance.location_id,
+            material_id=balance.material_id,
+            uom=balance.uom,
+            quantity=quantity,
+            action=action,
+            unit_cost=StockMovement._unit_cost(unit_cost),
+            reason=reason,
+            po_line=po_line,
+            so_line=so_line,
+            mo=mo,
+            created_by=self.created_by,
+        )
+        self.movements.append(movement)
+        return movement
+
+    def _receive(self, balance, movement, quantity, unit_cost):
+        layer = balance.cost_engine.receive(balance, quantity, unit_cost)
+        if layer is not None:
+            self.opened_layers.append((layer, movement))
+        self.dirty_balances[balance.pk] = balance
+
+    def _release(self, line, released):
+        self.dirty_reservations[line.pk] = self.reservations[line.pk]
+        for location_id, quantity in released.items():
+            balance = self.balances.get((location_id, line.material_id, line.uom))
+            if balance is None:
+                self.pending_releases.append((line.material_id, line.uom, {location_id: quantity}))
+            else:
+                balance.reserved_quantity -= quantity
+                self.dirty_balances[balance.pk] = balance
+
+    def _issue(self, balance, quantity):
+        self.dirty_balances[balance.pk] = balance
+        return balance.cost_engine.issue(balance, quantity)
+
+    def _save_lines(self, model, order_model, lines, field, order_field):
+        """
+        Writes the received or shipped quantity of the locked lines without
+        post_save, like increment_within_limit: the batch keeps reservations
+        itself, line signals would release them a second time.
+        """
+        lines = list(lines)
+        if not lines:
+            return
+        model.objects.bulk_update(lines, [field])
+        get_history_manager_for_model(model).bulk_history_create(lines, update=True, default_user=self.created_by)
+        order_model.objects.all_with_deleted().filter(pk__in={getattr(line, order_field) for line in lines}).refresh_totals()
+
+    def _flush(self):
+        self._save_lines(ProcurementOrderLine, ProcurementOrder, self.dirty_po_lines.values(), 'quantity_received', 'po_id')
+        self._save_lines(SalesOrderLine, SalesOrder, self.dirty_so_lines.values(), 'quantity_sent', 'so_id')
+        for line_reservations in self.dirty_reservations.values():
+            reservations.save_reservations(line_reservations)
+        for material_id, uom, released in self.pending_releases:
+            reservations.release_counters(material_id, uom, released)
+        # Bins opened for receipts that all failed their checks are dropped again
+        unused = [
+            self.balances[key].pk for key in self.created_keys
+            if self.balances[key].pk not in self.dirty_balances
+        ]
+        if unused:
+            LocationBalance.objects.filter(pk__in=unused, quantity=0, reserved_quantity=0).delete()
+        if not self.movements:
+            return
+        now = timezone.now()
+        StockMovement.objects.bulk_create(self.movements)
+        for layer, movement in self.opened_layers:
+            layer.source = movement
+        CostLayer.objects.bulk_update([layer for layer, _movement in self.opened_layers], ['source'])
+        balances = list(self.dirty_balances.values())
+        for balance in balances:
+            balance.updated_at = now
+        LocationBalance.objects.bulk_update(balances, ['quantity', 'total_cost', 'average_cost', 'reserved_quantity', 'updated_at'])
@@ -0,0 +1,153 @@
+"""
+Cost engines for LocationBalance.
+
+Each engine carries the cost state of a (location, material, uom) balance
+forward on every movement, so valuing an exit never reads the ledger.
+All arithmetic is done with Decimal; rates are kept at 6 decimal places.
+Engines only mutate the balance in memory, saving it is up to the caller.
+receive() returns the CostLayer it opened, if the method keeps layers.
+"""
+from decimal import Decimal
+from core.models import Material
+from inventory.models.cost_layer import CostLayer
+
+RATE_PLACES = Decimal('0.000001')
+ZERO = Decimal('0')
+# Open layers are locked and drained this many at a time
+FIFO_BATCH_SIZE = 10
+
+
+def quantize_rate(value):
+    return Decimal(value).quantize(RATE_PLACES)
+
+
+class MovingAverageCost:
+    """
+    Receipts re-average the unit cost: (old value + receipt value) / new quantity.
+    Exits are valued at the current average and leave the average unchanged.
+    """
+    method = Material.CostingMethod.MOVING_AVERAGE
+
+    def receive(self, balance, quantity, unit_cost, source=None):
+        unit_cost = Decimal(unit_cost)
+        new_quantity = balance.quantity + quantity
+        new_total = balance.total_cost + quantity * unit_cost
+        balance.quantity = new_quantity
+        if new_quantity > 0:
+            balance.total_cost = new_total
+            balance.average_cost = quantize_rate(new_total / new_quantity)
+        else:
+            balance.total_cost = ZERO
+            balance.average_cost = quantize_rate(unit_cost)
+
+    def issue(self, balance, quantity):
+        unit_cost = balance.average_cost
+        balance.quantity -= quantity
+        balance.total_cost = balance.quantity * unit_cost if balance.quantity > 0 else ZERO
+        return unit_cost
+
+    def current_cost(self, balance):
+        return balance.average_cost
+
+
+class StandardCost(MovingAverageCost):
+    """
+    Everything is valued at Material.standard_cost. Falls back to moving
+    average while the material has no standard cost set.
+    """
+    method = Material.CostingMethod.STANDARD
+
+    def receive(self, balance, quantity, unit_cost, source=None):
+        standard = balance.material.standard_cost
+        if standard is None:
+            return super().receive(balance, quantity, unit_cost, source)
+        balance.quantity += quantity
+        balance.average_cost = quantize_rate(standard)
+        balance.total_cost = balance.quantity * balance.average_cost if balance.quantity > 0 else ZERO
+
+    def issue(self, balance, quantity):
+        standard = balance.material.standard_cost
+        if standard is not None:
+            balance.average_cost = quantize_rate(standard)
+        return super().issue(balance, quantity)
+
+    def current_cost(self, balance):
+        standard = balance.material.standard_cost
+        return quantize_rate(standard) if standard is not None else balance.average_cost
+
+
+class FifoCost:
+    """
+    Every receipt opens a CostLayer; exits drain the oldest open layers first
+    and are valued at the cost of what they consumed. Quantity on hand that
+    predates any layer is valued at the balance's carried average cost.
+    """
+    method = Material.CostingMethod.FIFO
+
+    def receive(self, balance, quantity, unit_cost, source=None):
+        unit_cost = Decimal(unit_cost)
+        layer = CostLayer.objects.create(
+            location_id=balance.location_id,
+            material_id=balance.material_id,
+            uom=balance.uom,
+            source=source,
+            quantity=quantity,
+            remaining_quantity=quantity,
+            unit_cost=unit_cost,
+        )
+        balance.quantity += quantity
+        balance.total_cost += quantity * unit_cost
+        self._reaverage(balance, unit_cost)
+        return layer
+
+    def issue(self, balance, quantity):
+        open_layers = CostLayer.objects.select_for_update().filter(
+            location_id=balance.location_id,
+            material_id=balance.material_id,
+            uom=balance.uom,
+            remaining_quantity__gt=0,
+        ).order_by('id')
+        remaining = quantity
+        consumed_cost = ZERO
+        while remaining > 0:
+            batch = list(open_layers[:FIFO_BATCH_SIZE])
+            if not batch:
+                break
+            touched = []
+            for layer in batch:
+                take = min(layer.remaining_quantity, remaining)
+                layer.remaining_quantity -= take
+                consumed_cost += take * layer.unit_cost
+                remaining -= take
+                touched.append(layer)
+                if remaining <= 0:
+                    break
+            CostLayer.objects.bulk_update(touched, ['remaining_quantity'])
+        if remaining > 0:
+            consumed_cost += remaining * balance.average_cost
+        balance.quantity -= quantity
+        balance.total_cost = balance.total_cost - consumed_cost if balance.quantity > 0 else ZERO
+        unit_cost = quantize_rate(consumed_cost / quantity)
+        self._reaverage(balance, unit_cost)
+        return unit_cost
+
+    def current_cost(self, balance):
+        return balance.average_cost
+
+    def _reaverage(self, balance, fallback):
+        if balance.quantity > 0:
+            balance.average_cost = quantize_rate(balance.total_cost / balance.quantity)
+        else:
+            balance.average_cost = quantize_rate(fallback)
+
+
+ENGINES = {
+    Material.CostingMethod.MOVING_AVERAGE: MovingAverageCost(),
+    Material.CostingMethod.FIFO: FifoCost(),
+    Material.CostingMethod.STANDARD: StandardCost(),
+}
+
+
+def engine_for(material):
+    """Returns the cost engine selected by material.costing_method."""
+    return ENGINES.get(material.costing_method, ENGINES[Material.CostingMethod.MOVING_AVERAGE])
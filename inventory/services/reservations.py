@@ -0,0 +1,172 @@
+"""
+Soft allocation of stock to approved sales orders.
+
+Approving an order spreads the open quantity of each line over the bins
+with the most unreserved stock. Shipping a line consumes its reservation
+at the bin it ships from and trims the rest down to what is still open.
+Editing a line re-fits its reservations to the new quantity or material.
+Cancelling or deleting the order releases everything. Every change is
+mirrored on LocationBalance.reserved_quantity.
+"""
+from collections import defaultdict
+from decimal import Decimal
+from django.db import models, transaction
+from inventory.models import LocationBalance, StockReservation
+
+ZERO = Decimal('0')
+
+
+def lock_line_reservations(so_line_ids):
+    """Returns {so_line_id: [StockReservation]} locked with select_for_update."""
+    reservations = defaultdict(list)
+    rows = StockReservation.objects.select_for_update().filter(so_line_id__in=set(so_line_ids)).order_by('pk')
+    for reservation in rows:
+        reservations[reservation.so_line_id].append(reservation)
+    return reservations
+
+
+def consume(reservations, location_id, quantity, quantity_left):
+    """
+    Consumes an exit of quantity at location_id from one line's reservations
+    (mutated in memory) and trims them down to the line's quantity_left.
+    Returns {location_id: released quantity}.
+    """
+    released = defaultdict(Decimal)
+    for reservation in reservations:
+        if reservation.location_id == location_id:
+            taken = min(reservation.quantity, quantity)
+            reservation.quantity -= taken
+            released[location_id] += taken
+    excess = sum((reservation.quantity for reservation in reservations), ZERO) - max(quantity_left, ZERO)
+    for reservation in sorted(reservations, key=lambda reservation: reservation.quantity):
+        if excess <= 0:
+            break
+        taken = min(reservation.quantity, excess)
+        reservation.quantity -= taken
+        released[reservation.location_id] += taken
+        excess -= taken
+    return released
+
+
+def save_reservations(reservations):
+    """Writes consumed reservations back, dropping the empty ones."""
+    emptied = [reservation.pk for reservation in reservations if reservation.quantity <= 0]
+    if emptied:
+        StockReservation.objects.filter(pk__in=emptied).delete()
+    StockReservation.objects.bulk_update(
+        [reservation for reservation in reservations if reservation.quantity > 0], ['quantity']
+    )
+
+
+def release_counters(material_id, uom, released):
+    for location_id, quantity in sorted(released.items()):
+        if quantity:
+            LocationBalance.objects.filter(location_id=location_id, material_id=material_id, uom=uom).update(
+                reserved_quantity=models.F('reserved_quantity') - quantity
+            )
+
+
+def lock_balances(keys):
+    """Locks the existing LocationBalance rows for (location_id, material_id, uom) keys in key order."""
+    keys = sorted(set(keys))
+    if not keys:
+        return []
+    key_filter = models.Q()
+    for location_id, material_id, uom in keys:
+        key_filter |= models.Q(location_id=location_id, material_id=material_id, uom=uom)
+    return list(
+        LocationBalance.objects.select_for_update().filter(key_filter).order_by('location_id', 'material_id', 'uom')
+    )
+
+
+@transaction.atomic
+def reserve_order(so):
+    """
+    Tops up the reservations of every open line of so. Lines that cannot be
+    covered by unreserved stock are reserved as far as possible.
+    """
+    reserve_lines(so.lines.all())
+
+
+def reserve_lines(lines):
+    lines = [line for line in lines if line.quantity_left > 0]
+    if not lines:
+        return
+    # Balances before reservations, the same order as the exit paths
+    balances = defaultdict(list)
+    rows = (
+        LocationBalance.objects.select_for_update()
+        .filter(material_id__in={line.material_id for line in lines}, quantity__gt=0)
+        .order_by('location_id', 'material_id', 'uom')
+    )
+    for balance in rows:
+        balances[(balance.material_id, balance.uom)].append(balance)
+    reserved = lock_line_reservations([line.pk for line in lines])
+
+    dirty = {}
+    created, updated = [], []
+    for line in lines:
+        existing = {reservation.location_id: reservation for reservation in reserved[line.pk]}
+        missing = line.quantity_left - sum((reservation.quantity for reservation in existing.values()), ZERO)
+        candidates = sorted(balances[(line.material_id, line.uom)], key=lambda balance: -balance.available_quantity)
+        for balance in candidates:
+            if missing <= 0:
+                break
+            taken = min(balance.available_quantity, missing)
+            if taken <= 0:
+                break
+            balance.reserved_quantity += taken
+            dirty[balance.pk] = balance
+            missing -= taken
+            reservation = existing.get(balance.location_id)
+            if reservation is None:
+                created.append(StockReservation(
+                    so_line=line, location_id=balance.location_id, material_id=line.material_id,
+                    uom=line.uom, quantity=taken,
+                ))
+            else:
+                reservation.quantity += taken
+                updated.append(reservation)
+    StockReservation.objects.bulk_create(created)
+    StockReservation.objects.bulk_update(updated, ['quantity'])
+    LocationBalance.objects.bulk_update(list(dirty.values()), ['reserved_quantity'])
+
+
+@transaction.atomic
+def release(reservations):
+    """Deletes the given reservations (a queryset) and gives their quantity back."""
+    # Balances before reservations, the same order as the exit paths
+    lock_balances(reservations.values_list('location_id', 'material_id', 'uom'))
+    reservations = list(reservations.select_for_update().order_by('pk'))
+    released = defaultdict(lambda: defaultdict(Decimal))
+    for reservation in reservations:
+        released[(reservation.material_id, reservation.uom)][reservation.location_id] += reservation.quantity
+    StockReservation.objects.filter(pk__in=[reservation.pk for reservation in reservations]).delete()
+    for (material_id, uom), counters in sorted(released.items()):
+        release_counters(material_id, uom, counters)
+
+
+@transaction.atomic
+def sync_line(so_line, top_up=True):
+    """
+    Re-fits the reservations of an edited line: the ones left on another
+    material or uom are released, the rest are trimmed down to what is still
+    open and, when top_up is set, topped up again.
+    """
+    line_reservations = StockReservation.objects.filter(so_line=so_line)
+    release(line_reservations.exclude(material_id=so_line.material_id, uom=so_line.uom))
+    lock_balances(line_reservations.values_list('location_id', 'material_id', 'uom'))
+    kept = lock_line_reservations([so_line.pk])[so_line.pk]
+    released = consume(kept, None, ZERO, so_line.quantity_left)
+    save_reservations(kept)
+    release_counters(so_line.material_id, so_line.uom, released)
+    if top_up:
+        reserve_lines([so_line])
+
+
+def release_order(so):
+    release(StockReservation.objects.filter(so_line__so=so))
+
+
+def release_line(so_line):
+    release(StockReservation.objects.filter(so_line=so_line))
@@ -0,0 +1,135 @@
+"""
+Stock ledger closings and as-of balances.
+
+A snapshot folds every StockMovement created before its cutoff into one line
+per (location, material, uom). It is built from the previous snapshot plus
+the movements since that snapshot's cutoff, and an as-of query starts from
+the nearest snapshot and adds only the movements after it, so both read a
+bounded created_at range instead of the whole ledger.
+"""
+import calendar
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import models, transaction
+from django.utils import timezone
+from inventory.models import StockMovement, StockSnapshot, StockSnapshotLine
+
+ZERO = Decimal('0')
+# Daily closings older than this are pruned, monthly closings are kept
+DAILY_RETENTION_DAYS = 62
+
+
+def cutoff_for(closing_date):
+    """The closing of a day covers everything before the next local midnight."""
+    return timezone.make_aware(datetime.combine(closing_date + timedelta(days=1), time.min))
+
+
+def is_month_end(day):
+    return day.day == calendar.monthrange(day.year, day.month)[1]
+
+
+def movement_totals(start, end, end_inclusive=False, **filters):
+    movements = StockMovement.objects.filter(**filters)
+    if start is not None:
+        movements = movements.filter(created_at__gte=start)
+    movements = movements.filter(created_at__lte=end) if end_inclusive else movements.filter(created_at__lt=end)
+    return (
+        movements.values('location_id', 'material_id', 'uom')
+        .order_by()
+        .annotate(
+            quantity_total=models.Sum('quantity'),
+            value_total=models.Sum(
+                models.F('quantity') * models.F('unit_cost'),
+                output_field=models.DecimalField(max_digits=36, decimal_places=6),
+            ),
+        )
+    )
+
+
+def _accumulate(snapshot, start, end, end_inclusive=False, **filters):
+    """Returns {(location_id, material_id, uom): [quantity, value]}."""
+    totals = defaultdict(lambda: [ZERO, ZERO])
+    if snapshot is not None:
+        lines = snapshot.lines.filter(**filters).values_list('location_id', 'material_id', 'uom', 'quantity', 'value')
+        for location_id, material_id, uom, quantity, value in lines:
+            totals[(location_id, material_id, uom)] = [quantity, value]
+    for row in movement_totals(start, end, end_inclusive, **filters):
+        entry = totals[(row['location_id'], row['material_id'], row['uom'])]
+        entry[0] += row['quantity_total'] or ZERO
+        entry[1] += Decimal(row['value_total'] or ZERO)
+    return totals
+
+
+def nearest_snapshot(moment):
+    return StockSnapshot.objects.filter(cutoff__lte=moment).order_by('-cutoff').first()
+
+
+def _write_lines(snapshot, previous):
+    """Replaces the lines of snapshot with previous plus the movements between their cutoffs."""
+    totals = _accumulate(previous, previous.cutoff if previous else None, snapshot.cutoff)
+    snapshot.lines.all().delete()
+    StockSnapshotLine.objects.bulk_create([
+        StockSnapshotLine(
+            snapshot=snapshot, location_id=location_id, material_id=material_id, uom=uom,
+            quantity=quantity, value=value,
+        )
+        for (location_id, material_id, uom), (quantity, value) in sorted(totals.items())
+        if quantity or value
+    ], batch_size=1000)
+
+
+@transaction.atomic
+def take_snapshot(closing_date, period=None):
+    """
+    Closes the ledger at the end of closing_date. Re-running a closing
+    rebuilds its lines, so a late-arriving movement can be folded in again.
+    The later closings are built on this one, they are rebuilt after it in
+    cutoff order.
+    """
+    if period is None:
+        period = StockSnapshot.Period.MONTHLY if is_month_end(closing_date) else StockSnapshot.Period.DAILY
+    cutoff = cutoff_for(closing_date)
+    previous = StockSnapshot.objects.filter(cutoff__lt=cutoff).order_by('-cutoff').first()
+
+    snapshot, _created = StockSnapshot.objects.update_or_create(
+        closing_date=closing_date,
+        defaults={'period': period, 'cutoff': cutoff},
+    )
+    _write_lines(snapshot, previous)
+    previous = snapshot
+    for later in StockSnapshot.objects.filter(cutoff__gt=cutoff).order_by('cutoff'):
+        _write_lines(later, previous)
+        previous = later
+    return snapshot
+
+
+def prune_daily_snapshots(today=None):
+    today = today or timezone.localdate()
+    threshold = today - timedelta(days=DAILY_RETENTION_DAYS)
+    deleted, _rows = StockSnapshot.objects.filter(
+        period=StockSnapshot.Period.DAILY, closing_date__lt=threshold
+    ).delete()
+    return deleted
+
+
+def balances_as_of(moment, **filters):
+    """
+    Stock on hand per (location, material, uom) including every movement
+    created at or before `moment`. filters narrow both the snapshot lines
+    and the movements, e.g. location_id=... or material_id=...
+    Returns a list of dicts sorted by key, zero rows left out.
+    """
+    snapshot = nearest_snapshot(moment)
+    totals = _accumulate(snapshot, snapshot.cutoff if snapshot else None, moment, end_inclusive=True, **filters)
+    return [
+        {
+            'location_id': location_id,
+            'material_id': material_id,
+            'uom': uom,
+            'quantity': quantity,
+            'value': value,
+        }
+        for (location_id, material_id, uom), (quantity, value) in sorted(totals.items())
+        if quantity or value
+    ]
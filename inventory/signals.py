@@ -1,14 +1,38 @@
-
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
-from inventory.models import StockMovement, InventoryBalance
-
-@receiver(post_save, sender=StockMovement)
-def update_inventory_balance_on_save(sender, instance, created, **kwargs):
-    balance_object, _ = InventoryBalance.objects.get_or_create(
-        material=instance.material,
-        uom=instance.uom,
-        defaults={'quantity': 0}
-    )
-    balance_object.quantity += instance.quantity
-    balance_object.save()
\ No newline at end of file
+from safedelete.signals import post_softdelete
+from inventory.services import reservations
+from sales.models import SalesOrder, SalesOrderLine
+
+RESERVING_STATUSES = ['approved', 'billed', 'paid']
+
+
+@receiver(post_save, sender=SalesOrder)
+def sync_stock_reservations(sender, instance, **kwargs):
+    if instance.status == 'approved':
+        reservations.reserve_order(instance)
+    elif instance.status not in RESERVING_STATUSES:
+        reservations.release_order(instance)
+
+
+@receiver(post_softdelete, sender=SalesOrder)
+def release_deleted_order(sender, instance, **kwargs):
+    reservations.release_order(instance)
+
+
+@receiver(post_softdelete, sender=SalesOrderLine)
+def release_deleted_line(sender, instance, **kwargs):
+    reservations.release_line(instance)
+
+
+@receiver(post_save, sender=SalesOrderLine)
+def sync_line_reservations(sender, instance, **kwargs):
+    status = instance.so.status
+    if status in RESERVING_STATUSES:
+        reservations.sync_line(instance, top_up=status == 'approved')
+
+
+@receiver(pre_delete, sender=SalesOrderLine)
+def release_removed_line(sender, instance, **kwargs):
+    # Before the cascade drops the rows, their quantity goes back to the bins
+    reservations.release_line(instance)
@@ -0,0 +1,27 @@
+import logging
+from datetime import date, timedelta
+from celery import shared_task
+from django.utils import timezone
+from inventory.services import snapshots
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def take_stock_snapshot(closing_date=None):
+    """
+    Closes the stock ledger for closing_date (yesterday by default).
+    Month-end closings are kept as monthly snapshots, daily ones are pruned
+    after snapshots.DAILY_RETENTION_DAYS.
+
+    Runs daily at 00:30
+    """
+    if closing_date is None:
+        closing_date = timezone.localdate() - timedelta(days=1)
+    elif isinstance(closing_date, str):
+        closing_date = date.fromisoformat(closing_date)
+
+    snapshot = snapshots.take_snapshot(closing_date)
+    pruned = snapshots.prune_daily_snapshots()
+    logger.info(f"Stock snapshot {snapshot} written with {snapshot.lines.count()} lines, pruned {pruned} rows")
+    return f"Stock snapshot for {closing_date} written."
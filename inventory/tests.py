@@ -0,0 +1,541 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from safedelete.config import HARD_DELETE
+from core.models import Company, Material
+from inventory.models import (
+    CostLayer, InventoryBalance, InventoryLocation, LocationBalance, StockMovement, StockReservation, StockSnapshot
+)
+from inventory.services import snapshots
+from procurement.models import ProcurementOrder, ProcurementOrderLine
+from sales.models import SalesOrder, SalesOrderLine
+
+
+class StockMovementTestMixin:
+    def setUp(self):
+        self.user = User.objects.create(username="depo")
+        self.company = Company.objects.create(name="Test Firma", legal_name="Test Firma Ltd.")
+        self.material = Material.objects.create(name="Test Malzeme", category="supplied")
+        self.location = InventoryLocation.objects.create(area=1, section=1, shelf=1, bin=1)
+        self.other_location = InventoryLocation.objects.create(area=1, section=1, shelf=1, bin=2)
+        self.po = ProcurementOrder.objects.create(
+            vendor=self.company,
+            payment_term="CIA",
+            payment_method="BANK_TRANSFER",
+            incoterms="EXW",
+            description="Test PO",
+            status="ordered",
+            currency="TRY",
+            delivery_address="Test Address"
+        )
+        self.so = SalesOrder.objects.create(
+            customer=self.company,
+            payment_term="CIA",
+            payment_method="BANK_TRANSFER",
+            incoterms="EXW",
+            due_in_days=timedelta(0),
+            description="Test SO",
+            status="approved",
+            currency="TRY",
+            delivery_address="Test Address"
+        )
+
+    def make_po_line(self, quantity, unit_price):
+        return ProcurementOrderLine.objects.create(
+            po=self.po, material=self.material, uom="ADT",
+            quantity=Decimal(quantity), unit_price=Decimal(unit_price)
+        )
+
+    def make_so_line(self, quantity):
+        return SalesOrderLine.objects.create(
+            so=self.so, material=self.material, uom="ADT",
+            quantity=Decimal(quantity), unit_price=Decimal("50.00")
+        )
+
+    def receive(self, quantity, unit_price, location=None):
+        po_line = self.make_po_line(quantity, unit_price)
+        return StockMovement.enter_from_po_line(
+            po_line=po_line, location=location or self.location,
+            quantity=Decimal(quantity), reason="Giriş", created_by=self.user
+        )
+
+    def balance(self, location=None):
+        return LocationBalance.objects.get(location=location or self.location, material=self.material, uom="ADT")
+
+
+class LocationBalanceTest(StockMovementTestMixin, TestCase):
+    def test_receipts_accumulate_quantity_and_cost(self):
+        self.receive(10, "10.00")
+        self.receive(30, "20.00")
+        balance = self.balance()
+        self.assertEqual(balance.quantity, Decimal("40.00"))
+        self.assertEqual(balance.total_cost, Decimal("700"))
+
+    def test_exit_uses_average_cost_and_reduces_balance(self):
+        self.receive(10, "10.00")
+        self.receive(30, "20.00")
+        movement = StockMovement.exit_from_so_line(
+            so_line=self.make_so_line(20), quantity=Decimal("20"),
+            location=self.location, reason="Satış çıkışı", created_by=self.user
+        )
+        self.assertEqual(movement.quantity, Decimal("-20"))
+        self.assertEqual(movement.unit_cost, Decimal("17.50"))
+        balance = self.balance()
+        self.assertEqual(balance.quantity, Decimal("20.00"))
+        self.assertEqual(balance.total_cost, Decimal("350"))
+
+    def test_receipts_and_exits_keep_stored_open_quantity(self):
+        self.make_po_line(5, "10.00")
+        self.receive(10, "10.00")
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.open_quantity, Decimal("5.00"))
+        self.assertEqual(self.po.grand_total, Decimal("150.00"))
+        StockMovement.exit_from_so_line(
+            so_line=self.make_so_line(8), quantity=Decimal("3"),
+            location=self.location, reason="Satış çıkışı", created_by=self.user
+        )
+        self.so.refresh_from_db()
+        self.assertEqual(self.so.open_quantity, Decimal("5.00"))
+
+    def test_exit_more_than_on_hand_is_rejected(self):
+        self.receive(5, "10.00")
+        with self.assertRaises(ValidationError):
+            StockMovement.exit_from_so_line(
+                so_line=self.make_so_line(10), quantity=Decimal("10"),
+                location=self.location, reason="Satış çıkışı", created_by=self.user
+            )
+        self.assertEqual(self.balance().quantity, Decimal("5.00"))
+
+    def test_stale_line_cannot_be_shipped_past_its_quantity(self):
+        self.receive(10, "10.00")
+        so_line = self.make_so_line(5)
+        stale = SalesOrderLine.objects.get(pk=so_line.pk)
+        StockMovement.exit_from_so_line(
+            so_line=so_line, quantity=Decimal("4"),
+            location=self.location, reason="Satış çıkışı", created_by=self.user
+        )
+        # A second picker still sees 5 left on its copy of the line
+        with self.assertRaises(ValidationError):
+            StockMovement.exit_from_so_line(
+                so_line=stale, quantity=Decimal("4"),
+                location=self.location, reason="Satış çıkışı", created_by=self.user
+            )
+        so_line.refresh_from_db()
+        self.assertEqual(so_line.quantity_sent, Decimal("4.00"))
+        self.assertEqual(self.balance().quantity, Decimal("6.00"))
+        self.assertEqual(so_line.history.first().history_user, self.user)
+
+    def test_transfer_moves_quantity_and_cost(self):
+        self.receive(10, "12.00")
+        StockMovement.transfer(
+            from_location=self.location, to_location=self.other_location,
+            material=self.material, quantity=Decimal("4"), uom="ADT",
+            reason="Transfer", created_by=self.user
+        )
+        self.assertEqual(self.balance().quantity, Decimal("6.00"))
+        target = self.balance(self.other_location)
+        self.assertEqual(target.quantity, Decimal("4.00"))
+        self.assertEqual(target.total_cost, Decimal("48"))
+
+    def test_transfer_rejects_non_positive_quantity_and_same_location(self):
+        self.receive(10, "12.00")
+        for to_location, quantity in [(self.other_location, Decimal("0")), (self.location, Decimal("4"))]:
+            with self.assertRaises(ValidationError):
+                StockMovement.transfer(
+                    from_location=self.location, to_location=to_location,
+                    material=self.material, quantity=quantity, uom="ADT",
+                    reason="Transfer", created_by=self.user
+                )
+        self.assertEqual(self.balance().quantity, Decimal("10.00"))
+        self.assertFalse(StockMovement.objects.filter(action=StockMovement.Action.TRANSFER).exists())
+
+
+class InventoryBalanceTest(StockMovementTestMixin, TestCase):
+    def test_single_and_bulk_movements_update_one_row(self):
+        self.receive(10, "10.00")
+        StockMovement.objects.bulk_create([
+            StockMovement(location=self.location, material=self.material, uom="ADT",
+                          quantity=Decimal("2.50"), action=StockMovement.Action.ADJUST, unit_cost=Decimal("10.00")),
+            StockMovement(location=self.other_location, material=self.material, uom="ADT",
+                          quantity=Decimal("-1.25"), action=StockMovement.Action.ADJUST, unit_cost=Decimal("10.00")),
+        ])
+        balances = InventoryBalance.objects.filter(material=self.material, uom="ADT")
+        self.assertEqual(balances.count(), 1)
+        self.assertEqual(balances.get().quantity, Decimal("11.25"))
+
+    def test_list_needs_constant_queries_and_reports_latest_movements(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.receive(10, "10.00")
+        StockMovement.exit_from_so_line(
+            so_line=self.make_so_line(2), quantity=Decimal("2"),
+            location=self.location, reason="Satış çıkışı", created_by=self.user
+        )
+        with CaptureQueriesContext(connection) as single:
+            response = client.get('/api/v1/inventory-balances/')
+        row = response.data["results"][0]
+        self.assertIsNotNone(row["latest_entry"])
+        self.assertIsNotNone(row["latest_exit"])
+
+        for index in range(5):
+            material = Material.objects.create(name=f"Ek Malzeme {index}", category="supplied")
+            StockMovement.adjustment(
+                location=self.location, material=material, uom="ADT",
+                new_quantity=Decimal("3"), reason="Sayım", created_by=self.user
+            )
+        with CaptureQueriesContext(connection) as many:
+            response = client.get('/api/v1/inventory-balances/')
+        self.assertEqual(response.data["count"], 6)
+        self.assertEqual(len(many), len(single))
+
+    def test_updating_a_movement_does_not_apply_it_again(self):
+        movement = self.receive(10, "10.00")
+        movement.reason = "Düzeltme"
+        movement.save()
+        self.assertEqual(InventoryBalance.objects.get(material=self.material, uom="ADT").quantity, Decimal("10.00"))
+
+
+class CostEngineTest(StockMovementTestMixin, TestCase):
+    def test_average_cost_is_carried_forward_when_stock_runs_out(self):
+        self.receive(3, "10.00")
+        self.receive(1, "11.00")
+        StockMovement.exit_from_so_line(
+            so_line=self.make_so_line(4), quantity=Decimal("4"),
+            location=self.location, reason="Satış çıkışı", created_by=self.user
+        )
+        balance = self.balance()
+        self.assertEqual(balance.quantity, Decimal("0.00"))
+        self.assertEqual(balance.average_cost, Decimal("10.250000"))
+        movement = StockMovement.adjustment(
+            location=self.location, material=self.material, uom="ADT",
+            new_quantity=Decimal("2"), reason="Sayım", created_by=self.user
+        )
+        self.assertEqual(movement.unit_cost, Decimal("10.25"))
+
+    def test_standard_cost_values_exits_at_standard(self):
+        self.material.costing_method = Material.CostingMethod.STANDARD
+        self.material.standard_cost = Decimal("15.00")
+        self.material.save()
+        self.receive(10, "10.00")
+        movement = StockMovement.exit_from_so_line(
+            so_line=self.make_so_line(2), quantity=Decimal("2"),
+            location=self.location, reason="Satış çıkışı", created_by=self.user
+        )
+        self.assertEqual(movement.unit_cost, Decimal("15.00"))
+        self.assertEqual(self.balance().total_cost, Decimal("120"))
+
+    def test_fifo_consumes_oldest_layers_first(self):
+        self.material.costing_method = Material.CostingMethod.FIFO
+        self.material.save()
+        self.receive(10, "10.00")
+        self.receive(10, "20.00")
+        movement = StockMovement.exit_from_so_line(
+            so_line=self.make_so_line(15), quantity=Decimal("15"),
+            location=self.location, reason="Satış çıkışı", created_by=self.user
+        )
+        # 10 @ 10 + 5 @ 20 = 200 / 15
+        self.assertEqual(movement.unit_cost, Decimal("13.33"))
+        layers = CostLayer.objects.filter(location=self.location, material=self.material).order_by('id')
+        self.assertEqual([layer.remaining_quantity for layer in layers], [Decimal("0.00"), Decimal("5.00")])
+        self.assertEqual(self.balance().total_cost, Decimal("100"))
+
+    def test_downward_adjustment_records_the_issued_fifo_cost(self):
+        self.material.costing_method = Material.CostingMethod.FIFO
+        self.material.save()
+        self.receive(10, "10.00")
+        self.receive(10, "20.00")
+        movement = StockMovement.adjustment(
+            location=self.location, material=self.material, uom="ADT",
+            new_quantity=Decimal("5"), reason="Sayım", created_by=self.user
+        )
+        # 10 @ 10 + 5 @ 20 = 200 / 15, not the 15.00 average
+        self.assertEqual(movement.unit_cost, Decimal("13.33"))
+        self.assertEqual(self.balance().total_cost, Decimal("100"))
+
+
+class StockSnapshotTest(StockMovementTestMixin, TestCase):
+    def backdate(self, movement, day):
+        moment = timezone.make_aware(datetime.combine(day, time(12)))
+        StockMovement.objects.filter(pk=movement.pk).update(created_at=moment)
+
+    def test_as_of_adds_movements_after_nearest_snapshot(self):
+        self.backdate(self.receive(10, "10.00"), date(2026, 1, 31))
+        self.backdate(self.receive(5, "10.00", self.other_location), date(2026, 2, 10))
+        snapshot = snapshots.take_snapshot(date(2026, 1, 31))
+        self.assertEqual(snapshot.period, StockSnapshot.Period.MONTHLY)
+        self.assertEqual(snapshot.lines.get().quantity, Decimal("10.00"))
+
+        self.assertEqual(snapshots.balances_as_of(snapshot.cutoff - timedelta(days=31)), [])
+        rows = snapshots.balances_as_of(timezone.make_aware(datetime(2026, 2, 15)))
+        self.assertEqual([(row['location_id'], row['quantity']) for row in rows],
+                         [(self.location.pk, Decimal("10.00")), (self.other_location.pk, Decimal("5.00"))])
+        self.assertEqual(rows[0]['value'], Decimal("100"))
+
+    def test_snapshot_builds_on_previous_one(self):
+        self.backdate(self.receive(10, "10.00"), date(2026, 3, 1))
+        snapshots.take_snapshot(date(2026, 3, 1))
+        # Not visible to the second closing, it only reads movements after the first cutoff
+        StockMovement.objects.filter(created_at__date__lte=date(2026, 3, 2)).delete()
+        snapshot = snapshots.take_snapshot(date(2026, 3, 2))
+        self.assertEqual(snapshot.period, StockSnapshot.Period.DAILY)
+        self.assertEqual(snapshot.lines.get().quantity, Decimal("10.00"))
+
+    def test_backdated_closing_rebuilds_the_later_ones(self):
+        self.backdate(self.receive(10, "10.00"), date(2026, 3, 1))
+        snapshots.take_snapshot(date(2026, 3, 1))
+        later = snapshots.take_snapshot(date(2026, 3, 2))
+        # A late movement of the first day is folded into its closing again
+        self.backdate(self.receive(4, "10.00"), date(2026, 3, 1))
+        snapshots.take_snapshot(date(2026, 3, 1))
+        self.assertEqual(later.lines.get().quantity, Decimal("14.00"))
+        rows = snapshots.balances_as_of(timezone.make_aware(datetime(2026, 3, 5)))
+        self.assertEqual(rows[0]['quantity'], Decimal("14.00"))
+
+    def test_as_of_api(self):
+        self.backdate(self.receive(10, "10.00"), date(2026, 1, 31))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/v1/inventory-balances/as-of/', {"date": "2026-01-31", "location": self.location.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["quantity"], "10.00")
+        self.assertEqual(client.get('/api/v1/inventory-balances/as-of/').status_code, 400)
+
+
+class StockReservationTest(StockMovementTestMixin, TestCase):
+    def approved_order(self, quantity):
+        so = SalesOrder.objects.create(
+            customer=self.company, payment_term="CIA", payment_method="BANK_TRANSFER", incoterms="EXW",
+            due_in_days=timedelta(0), description="Rezerve", status="submitted", currency="TRY",
+            delivery_address="Test Address"
+        )
+        line = SalesOrderLine.objects.create(
+            so=so, material=self.material, uom="ADT", quantity=Decimal(quantity), unit_price=Decimal("50.00")
+        )
+        so.change_status('approved')
+        return so, line
+
+    def test_approval_reserves_fullest_bins_and_cancel_releases(self):
+        self.receive(10, "10.00")
+        self.receive(4, "10.00", self.other_location)
+        so, line = self.approved_order(12)
+        self.assertEqual(self.balance().reserved_quantity, Decimal("10.00"))
+        self.assertEqual(self.balance(self.other_location).available_quantity, Decimal("2.00"))
+        self.assertEqual(StockReservation.objects.filter(so_line=line).count(), 2)
+
+        so.change_status('cancelled')
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertEqual(self.balance().reserved_quantity, Decimal("0.00"))
+        self.assertEqual(self.balance(self.other_location).reserved_quantity, Decimal("0.00"))
+
+    def test_reserved_stock_only_ships_to_its_order(self):
+        self.receive(10, "10.00")
+        _so, line = self.approved_order(8)
+        other_line = self.make_so_line(5)
+        # The line added to the other approved order only gets the 2 left over
+        self.assertEqual(StockReservation.objects.get(so_line=other_line).quantity, Decimal("2.00"))
+        with self.assertRaises(ValidationError):
+            StockMovement.exit_from_so_line(
+                so_line=other_line, quantity=Decimal("5"),
+                location=self.location, reason="Satış çıkışı", created_by=self.user
+            )
+        StockMovement.exit_from_so_line(
+            so_line=line, quantity=Decimal("6"),
+            location=self.location, reason="Satış çıkışı", created_by=self.user
+        )
+        balance = self.balance()
+        self.assertEqual(balance.quantity, Decimal("4.00"))
+        self.assertEqual(balance.reserved_quantity, Decimal("4.00"))
+        self.assertEqual(StockReservation.objects.get(so_line=line).quantity, Decimal("2.00"))
+
+    def test_batch_keeps_reserved_counters_in_step_with_reservations(self):
+        self.receive(10, "10.00")
+        _so, line = self.approved_order(10)
+        self.receive(5, "10.00", self.other_location)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        po_line = self.make_po_line(2, "10.00")
+        # Bin A is not touched by the batch, its trimmed reservation is released at flush
+        response = client.post('/api/v1/action/batch/', {"actions": [
+            {"action": "enter_from_po_line", "po_line": po_line.pk, "location": self.other_location.pk, "quantity": "2"},
+            {"action": "exit_from_so_line", "so_line": line.pk, "location": self.other_location.pk, "quantity": "4"},
+            {"action": "adjustment", "location": self.other_location.pk, "material": self.material.pk,
+             "uom": "ADT", "new_quantity": "2"},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        for balance in LocationBalance.objects.filter(material=self.material, uom="ADT"):
+            reserved = sum(
+                (r.quantity for r in StockReservation.objects.filter(location=balance.location_id)), Decimal("0")
+            )
+            self.assertEqual(balance.reserved_quantity, reserved)
+        self.assertEqual(self.balance().reserved_quantity, Decimal("6.00"))
+        line.refresh_from_db()
+        self.assertEqual(line.quantity_sent, Decimal("4.00"))
+        self.assertEqual(line.history.first().history_user, self.user)
+
+    def test_line_edits_and_deletes_refit_reservations(self):
+        self.receive(10, "10.00")
+        _so, line = self.approved_order(6)
+        line.quantity = Decimal("9")
+        line.save()
+        self.assertEqual(self.balance().reserved_quantity, Decimal("9.00"))
+        line.quantity = Decimal("3")
+        line.save()
+        self.assertEqual(StockReservation.objects.get(so_line=line).quantity, Decimal("3.00"))
+        self.assertEqual(self.balance().reserved_quantity, Decimal("3.00"))
+        line.delete(force_policy=HARD_DELETE)
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertEqual(self.balance().reserved_quantity, Decimal("0.00"))
+
+    def test_batch_exit_consumes_reservation(self):
+        self.receive(5, "10.00")
+        self.receive(5, "10.00", self.other_location)
+        _so, line = self.approved_order(8)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        # Reserved 5 + 3, shipping 6 from the other bin trims the first reservation to 2
+        response = client.post('/api/v1/action/batch/', {"actions": [
+            {"action": "exit_from_so_line", "so_line": line.pk, "location": self.other_location.pk, "quantity": "5"},
+            {"action": "exit_from_so_line", "so_line": line.pk, "location": self.location.pk, "quantity": "1"},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        reserved = {r.location_id: r.quantity for r in StockReservation.objects.filter(so_line=line)}
+        self.assertEqual(sum(reserved.values()), Decimal("2.00"))
+        self.assertEqual(self.balance().reserved_quantity + self.balance(self.other_location).reserved_quantity, Decimal("2.00"))
+
+    def test_transfer_and_adjustment_leave_reserved_stock_alone(self):
+        self.receive(20, "10.00")
+        self.approved_order(8)
+        with self.assertRaises(ValidationError):
+            StockMovement.transfer(
+                from_location=self.location, to_location=self.other_location,
+                material=self.material, quantity=Decimal("13"), uom="ADT",
+                reason="Transfer", created_by=self.user
+            )
+        with self.assertRaises(ValidationError):
+            StockMovement.adjustment(
+                location=self.location, material=self.material, uom="ADT",
+                new_quantity=Decimal("0"), reason="Sayım", created_by=self.user
+            )
+        StockMovement.transfer(
+            from_location=self.location, to_location=self.other_location,
+            material=self.material, quantity=Decimal("12"), uom="ADT",
+            reason="Transfer", created_by=self.user
+        )
+        balance = self.balance()
+        self.assertEqual(balance.quantity, Decimal("8.00"))
+        self.assertEqual(balance.available_quantity, Decimal("0.00"))
+
+    def test_batch_transfer_and_adjustment_leave_reserved_stock_alone(self):
+        self.receive(20, "10.00")
+        self.approved_order(8)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/v1/action/batch/', {"actions": [
+            {"action": "transfer", "from_location": self.location.pk, "to_location": self.other_location.pk,
+             "material": self.material.pk, "uom": "ADT", "quantity": "13"},
+            {"action": "adjustment", "location": self.location.pk, "material": self.material.pk,
+             "uom": "ADT", "new_quantity": "0"},
+            {"action": "adjustment", "location": self.location.pk, "material": self.material.pk,
+             "uom": "ADT", "new_quantity": "8"},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item["status"] for item in response.data["results"]], ["error", "error", "success"])
+        balance = self.balance()
+        self.assertEqual(balance.quantity, Decimal("8.00"))
+        self.assertEqual(balance.reserved_quantity, Decimal("8.00"))
+
+
+class LocationAvailabilityAPITest(StockMovementTestMixin, TestCase):
+    def test_bins_are_listed_fullest_first_with_a_pick_plan(self):
+        self.receive(10, "10.00")
+        self.receive(35, "10.00", self.other_location)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/v1/inventory-balances/availability/',
+                              {"material": self.material.pk, "uom": "ADT", "quantity": "40"})
+        self.assertEqual(response.status_code, 200)
+        result = response.data["result"]
+        self.assertTrue(result["fulfillable"])
+        self.assertEqual(result["total_quantity"], Decimal("45.00"))
+        self.assertEqual([(row["location"], row["pick_quantity"]) for row in result["bins"]],
+                         [(self.other_location.pk, "35.00"), (self.location.pk, "5.00")])
+
+        response = client.get('/api/v1/inventory-balances/availability/', {"material": self.material.pk, "quantity": "50"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_totals_are_grouped_by_uom(self):
+        self.receive(10, "10.00")
+        LocationBalance.lock(self.other_location, self.material, "KG").receive(Decimal("3"), Decimal("1"))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/v1/inventory-balances/availability/', {"material": self.material.pk})
+        self.assertEqual(response.status_code, 200)
+        result = response.data["result"]
+        self.assertNotIn("total_quantity", result)
+        self.assertEqual(
+            [(total["uom"], total["total_quantity"]) for total in result["totals"]],
+            [("ADT", Decimal("10.00")), ("KG", Decimal("3.00"))],
+        )
+
+
+class StockMovementBatchAPITest(StockMovementTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_batch_applies_valid_actions_and_reports_each_item(self):
+        po_line = self.make_po_line(10, "10.00")
+        so_line = self.make_so_line(5)
+        response = self.client.post('/api/v1/action/batch/', {"actions": [
+            {"action": "enter_from_po_line", "po_line": po_line.pk, "location": self.location.pk, "quantity": "10"},
+            {"action": "transfer", "from_location": self.location.pk, "to_location": self.other_location.pk,
+             "material": self.material.pk, "uom": "ADT", "quantity": "4"},
+            {"action": "exit_from_so_line", "so_line": so_line.pk, "location": self.location.pk, "quantity": "7"},
+            {"action": "exit_from_so_line", "so_line": so_line.pk, "location": self.location.pk, "quantity": "5"},
+            {"action": "adjustment", "location": self.location.pk, "uom": "ADT", "new_quantity": "1"},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        statuses = [item["status"] for item in response.data["results"]]
+        self.assertEqual(statuses, ["success", "success", "error", "success", "error"])
+        self.assertEqual(len(response.data["results"][1]["movements"]), 2)
+        self.assertEqual(self.balance().quantity, Decimal("1.00"))
+        self.assertEqual(self.balance(self.other_location).quantity, Decimal("4.00"))
+        self.assertEqual(InventoryBalance.objects.get(material=self.material, uom="ADT").quantity, Decimal("5.00"))
+        so_line.refresh_from_db()
+        self.assertEqual(so_line.quantity_sent, Decimal("5.00"))
+        self.so.refresh_from_db()
+        self.assertEqual(self.so.open_quantity, Decimal("0.00"))
+
+    def test_missing_sources_fail_without_creating_balances(self):
+        so_line = self.make_so_line(5)
+        response = self.client.post('/api/v1/action/batch/', {"actions": [
+            {"action": "exit_from_so_line", "so_line": so_line.pk, "location": self.other_location.pk, "quantity": "1"},
+            {"action": "transfer", "from_location": self.other_location.pk, "to_location": self.location.pk,
+             "material": self.material.pk, "uom": "ADT", "quantity": "1"},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([item["status"] for item in response.data["results"]], ["error", "error"])
+        for item in response.data["results"]:
+            self.assertIn("mevcut değil", str(item["errors"]))
+        self.assertFalse(LocationBalance.objects.filter(location=self.other_location).exists())
+
+    def test_failed_receipts_leave_no_empty_balances(self):
+        po_line = self.make_po_line(5, "10.00")
+        response = self.client.post('/api/v1/action/batch/', {"actions": [
+            {"action": "enter_from_po_line", "po_line": po_line.pk, "location": self.other_location.pk, "quantity": "6"},
+            {"action": "adjustment", "location": self.other_location.pk, "material": self.material.pk,
+             "uom": "ADT", "new_quantity": "1.5"},
+            {"action": "enter_from_po_line", "po_line": po_line.pk, "location": self.location.pk, "quantity": "5"},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item["status"] for item in response.data["results"]], ["error", "error", "success"])
+        self.assertFalse(LocationBalance.objects.filter(location=self.other_location).exists())
+        self.assertEqual(self.balance().quantity, Decimal("5.00"))
@@ -7,10 +7,13 @@ from inventory.views.inventory_action_views import (
     ExitFromSOLineAPIView,
     AdjustmentAPIView,
     TransferAPIView,
+    StockMovementBatchAPIView,
 )
 from inventory.views.inventory_get_views import (
     InventoryBalanceListAPIView,
-    InventoryBalanceDetailAPIView
+    InventoryBalanceDetailAPIView,
+    StockAsOfAPIView,
+    LocationAvailabilityAPIView,
 )
 
 
@@ -23,8 +26,11 @@ urlpatterns = [
     path('action/<int:id>/enter-from-po-line/', EnterFromPOLineAPIView.as_view(), name='enter-from-po-line'),
     path('action/adjustment/', AdjustmentAPIView.as_view(), name='adjustment'),
     path('action/transfer/', TransferAPIView.as_view(), name='transfer'),
+    path('action/batch/', StockMovementBatchAPIView.as_view(), name='stock-movement-batch'),
     path('inventory-locations/dropdown/', InventoryLocationDropdownView.as_view()),
     path('inventory-balances/', InventoryBalanceListAPIView.as_view(), name='inventory-balance-list'),
+    path('inventory-balances/as-of/', StockAsOfAPIView.as_view(), name='inventory-balance-as-of'),
+    path('inventory-balances/availability/', LocationAvailabilityAPIView.as_view(), name='inventory-balance-availability'),
     path('inventory-balances/<int:pk>/', InventoryBalanceDetailAPIView.as_view(), name='inventory-balance-detail'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -10,21 +10,27 @@ from inventory.serializers import (
     ExitFromSOLineSerializer,
     AdjustmentSerializer,
     TransferSerializer,
+    StockMovementBatchSerializer,
+    StockMovementBatchItemSerializer,
+    load_batch_lookups,
 )
 from inventory.models.stock_movement import StockMovement
+from inventory.services.batch import PO_RECEIVABLE_STATUSES, StockMovementBatch
 from procurement.models import ProcurementOrderLine
 from sales.models import SalesOrderLine
 from drf_yasg.utils import swagger_auto_schema
+from core.services.transactions import retry_on_serialization_failure
 
 class EnterFromPOLineAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(request_body=EnterFromPOLineSerializer)
+    @retry_on_serialization_failure()
     @transaction.atomic
     def post(self, request, id):
         po_line = get_object_or_404(ProcurementOrderLine, pk=id)
         
-        if po_line.po.status not in ['ordered', 'paid', 'billed']:
+        if po_line.po.status not in PO_RECEIVABLE_STATUSES:
             raise ValidationError(_('Satın alma depoya aktarılabilir statüde değil'))
         
         data = request.data.copy()
@@ -46,6 +52,7 @@ class ExitFromSOLineAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(request_body=ExitFromSOLineSerializer)
+    @retry_on_serialization_failure()
     def post(self, request, id):
         so_line = get_object_or_404(SalesOrderLine, pk=id)
         
@@ -72,6 +79,7 @@ class AdjustmentAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(request_body=AdjustmentSerializer)
+    @retry_on_serialization_failure()
     def post(self, request):
         data = request.data.copy()
         data['created_by'] = request.user.pk
@@ -91,6 +99,7 @@ class TransferAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(request_body=TransferSerializer)
+    @retry_on_serialization_failure()
     def post(self, request):
         data = request.data.copy()
         data['created_by'] = request.user.pk
@@ -103,3 +112,49 @@ class TransferAPIView(APIView):
             "status": "success",
             "message": _("Stok transferi başarıyla kaydedildi."),
         }, status=status.HTTP_201_CREATED)
+
+
+class StockMovementBatchAPIView(APIView):
+    """
+    Applies a list of mixed actions (enter_from_po_line, exit_from_so_line,
+    adjustment, transfer) in one transaction and reports a result per item.
+    Invalid items are skipped, the valid ones are still applied.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(request_body=StockMovementBatchSerializer)
+    @retry_on_serialization_failure()
+    @transaction.atomic
+    def post(self, request):
+        serializer = StockMovementBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['actions'] #type: ignore
+        context = {'lookups': load_batch_lookups(items)}
+
+        results = [None] * len(items)
+        valid_items = []
+        for index, item in enumerate(items):
+            item_serializer = StockMovementBatchItemSerializer(data=item, context=context)
+            if item_serializer.is_valid():
+                valid_items.append((index, item_serializer.validated_data))
+            else:
+                results[index] = {"index": index, "status": "error", "errors": item_serializer.errors}
+
+        for index, result in StockMovementBatch(created_by=request.user).run(valid_items):
+            results[index] = result
+
+        success_count = sum(1 for result in results if result["status"] == "success") #type: ignore
+        error_count = len(results) - success_count
+        if success_count == 0:
+            return Response({
+                "status": "error",
+                "message": _("Hiçbir stok hareketi kaydedilemedi."),
+                "summary": {"total": len(results), "success": 0, "errors": error_count},
+                "results": results,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "status": "success",
+            "message": _("%(success)d stok hareketi kaydedildi, %(errors)d hatalı.") % {"success": success_count, "errors": error_count},
+            "summary": {"total": len(results), "success": success_count, "errors": error_count},
+            "results": results,
+        }, status=status.HTTP_201_CREATED)
@@ -1,7 +1,21 @@
 
+from datetime import datetime, time
+from decimal import Decimal
 from rest_framework import pagination, status, permissions, filters, generics
-from inventory.models import InventoryBalance
-from inventory.serializers.inventory_get_serializers import InventoryBalanceSerializer
+from rest_framework.views import APIView
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from drf_yasg.utils import swagger_auto_schema
+from core.models import Material
+from inventory.models import InventoryBalance, InventoryLocation, LocationBalance
+from inventory.serializers.inventory_get_serializers import (
+    InventoryBalanceSerializer,
+    AvailabilityQuerySerializer,
+    LocationAvailabilitySerializer,
+    StockAsOfQuerySerializer,
+    StockAsOfSerializer,
+)
+from inventory.services.snapshots import balances_as_of
 from rest_framework.response import Response
 
 class CustomPagination(pagination.PageNumberPagination):
@@ -21,7 +35,7 @@ class CustomPagination(pagination.PageNumberPagination):
 
 
 class InventoryBalanceListAPIView(generics.ListAPIView):
-    queryset = InventoryBalance.objects.exclude(quantity=0)
+    queryset = InventoryBalance.objects.exclude(quantity=0).select_related('material').with_latest_movements()
     serializer_class = InventoryBalanceSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter]
@@ -35,7 +49,7 @@ class InventoryBalanceListAPIView(generics.ListAPIView):
             return Response(paginated, status=status.HTTP_200_OK)
 
 class InventoryBalanceDetailAPIView(generics.RetrieveAPIView):
-    queryset = InventoryBalance.objects.exclude(quantity=0)
+    queryset = InventoryBalance.objects.exclude(quantity=0).select_related('material').with_latest_movements()
     serializer_class = InventoryBalanceSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -47,3 +61,85 @@ class InventoryBalanceDetailAPIView(generics.RetrieveAPIView):
             "result": response.data
         }
         return Response(data, status=status.HTTP_200_OK)
+
+
+class StockAsOfAPIView(APIView):
+    """
+    Stock on hand per location and material at a past moment, read from the
+    nearest stock snapshot plus the movements after it.
+    ?date=YYYY-MM-DD means the end of that day, ?at= takes an exact datetime.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CustomPagination
+
+    @swagger_auto_schema(query_serializer=StockAsOfQuerySerializer)
+    def get(self, request):
+        query = StockAsOfQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        if 'at' in params:
+            moment = params['at']
+        else:
+            moment = timezone.make_aware(datetime.combine(params['date'], time.max))
+
+        filters = {}
+        if 'location' in params:
+            filters['location_id'] = params['location']
+        if 'material' in params:
+            filters['material_id'] = params['material']
+        rows = balances_as_of(moment, **filters)
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(rows, request, view=self)
+        context = {
+            'materials': Material.objects.all_with_deleted().in_bulk({row['material_id'] for row in page}),
+            'locations': InventoryLocation.objects.all_with_deleted().in_bulk({row['location_id'] for row in page}),
+        }
+        serializer = StockAsOfSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class LocationAvailabilityAPIView(APIView):
+    """
+    Bins holding a material, fullest first, read from LocationBalance, with
+    totals per uom. The overall totals are only given when ?uom= is set.
+    With ?quantity= (and uom) each bin also gets the pick_quantity of a
+    plan that takes unreserved stock from the fullest bins first.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(query_serializer=AvailabilityQuerySerializer)
+    def get(self, request):
+        query = AvailabilityQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        bins = LocationBalance.objects.filter(material_id=params['material'], quantity__gt=0).select_related('location')
+        if 'uom' in params:
+            bins = bins.filter(uom=params['uom'])
+        bins = list(bins.order_by('uom', '-quantity', 'location_id'))
+
+        # Quantities only add up within a uom, there is no conversion between units
+        totals = {}
+        for row in bins:
+            total = totals.setdefault(row.uom, {"uom": row.uom, "total_quantity": Decimal('0'), "available_quantity": Decimal('0')})
+            total["total_quantity"] += row.quantity
+            total["available_quantity"] += max(row.available_quantity, Decimal('0'))
+        result = {"material": params['material'], "totals": list(totals.values())}
+        if 'uom' in params:
+            result["total_quantity"] = sum((total["total_quantity"] for total in totals.values()), Decimal('0'))
+            result["available_quantity"] = sum((total["available_quantity"] for total in totals.values()), Decimal('0'))
+        if 'quantity' in params:
+            remaining = params['quantity']
+            for row in sorted(bins, key=lambda row: -row.available_quantity):
+                available = max(row.available_quantity, Decimal('0'))
+                row.pick_quantity = min(available, remaining) if remaining > 0 and available > 0 else None
+                remaining -= row.pick_quantity or 0
+            result["requested_quantity"] = params['quantity']
+            result["fulfillable"] = remaining <= 0
+        result["bins"] = LocationAvailabilitySerializer(bins, many=True).data
+        return Response({
+            "status": "success",
+            "message": _("Stok bulunabilirliği getirildi"),
+            "result": result,
+        }, status=status.HTTP_200_OK)
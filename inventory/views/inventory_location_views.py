@@ -9,6 +9,7 @@ from inventory.serializers.inventory_location_serializers import InventoryLocati
 from safedelete.config import HARD_DELETE
 from django.utils.translation import gettext_lazy as _
 from simple_history.utils import bulk_create_with_history
+from core.querysets import with_created_meta
 
 class CustomDjangoModelPermissions(DjangoModelPermissions):
     perms_map = {
@@ -48,7 +49,7 @@ class InventoryLocationViewSet(viewsets.ModelViewSet):
       - search_fields: name
       - ordering_fields: id, name, facility, area, section, shelf, bin, type
     """
-    queryset = InventoryLocation.objects.all().order_by('-id')
+    queryset = with_created_meta(InventoryLocation.objects.all()).order_by('-id')
     serializer_class = InventoryLocationSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['facility', 'area', 'section', 'shelf', 'bin', 'type']
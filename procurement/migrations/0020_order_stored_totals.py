@@ -0,0 +1,67 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:21
+
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import migrations, models
+
+CENT = Decimal('0.01')
+
+
+def backfill_order_totals(apps, schema_editor):
+    ProcurementOrder = apps.get_model('procurement', 'ProcurementOrder')
+    ProcurementOrderLine = apps.get_model('procurement', 'ProcurementOrderLine')
+    totals = defaultdict(lambda: [Decimal('0')] * 3)
+    lines = ProcurementOrderLine.objects.filter(deleted__isnull=True).values_list('po_id', 'quantity', 'quantity_received', 'unit_price', 'tax_rate')
+    for order_id, quantity, done, unit_price, tax_rate in lines.iterator():
+        order_totals = totals[order_id]
+        if unit_price is not None:
+            order_totals[0] += unit_price * quantity
+            if tax_rate is not None:
+                order_totals[1] += unit_price * quantity * tax_rate
+        if quantity > done:
+            order_totals[2] += quantity - done
+    orders = list(ProcurementOrder.objects.filter(pk__in=list(totals)))
+    for order in orders:
+        subtotal, tax_total, open_quantity = totals[order.pk]
+        grand_total = subtotal - subtotal * (order.trade_discount + order.due_discount) + tax_total
+        order.subtotal = subtotal.quantize(CENT, rounding=ROUND_HALF_UP)
+        order.tax_total = tax_total.quantize(CENT, rounding=ROUND_HALF_UP)
+        order.grand_total = grand_total.quantize(CENT, rounding=ROUND_HALF_UP)
+        order.open_quantity = open_quantity
+    ProcurementOrder.objects.bulk_update(orders, ['subtotal', 'tax_total', 'grand_total', 'open_quantity'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+        ('procurement', '0019_alter_historicalprocurementorder_due_in_days_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='procurementorder',
+            name='grand_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=32, verbose_name='Genel Toplam'),
+        ),
+        migrations.AddField(
+            model_name='procurementorder',
+            name='open_quantity',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=21, verbose_name='Açık Miktar'),
+        ),
+        migrations.AddField(
+            model_name='procurementorder',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=32, verbose_name='Ara Toplam'),
+        ),
+        migrations.AddField(
+            model_name='procurementorder',
+            name='tax_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=32, verbose_name='Vergi Toplamı'),
+        ),
+        migrations.AddIndex(
+            model_name='procurementorder',
+            index=models.Index(fields=['vendor', 'status'], include=('grand_total', 'open_quantity'), name='po_vendor_totals_idx'),
+        ),
+        migrations.RunPython(backfill_order_totals, migrations.RunPython.noop),
+    ]
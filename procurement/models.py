@@ -1,10 +1,12 @@
 from django.db import models
 from simple_history.models import HistoricalRecords
 from core.fields import CurrencyField, UOMField
+from core.querysets import OrderTotalsModelMixin, OrderTotalsQuerySet, STORED_TOTAL_FIELDS
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from datetime import datetime
 from safedelete.models import SafeDeleteModel
+from safedelete.managers import SafeDeleteManager
 from safedelete.config import SOFT_DELETE, SOFT_DELETE_CASCADE
 from decimal import Decimal
 from django.utils.translation import gettext_lazy as _
@@ -46,7 +48,11 @@ class MaterialDemand(SafeDeleteModel):
 
             
 
-class ProcurementOrder(SafeDeleteModel):
+class ProcurementOrderQuerySet(OrderTotalsQuerySet):
+    done_field = 'quantity_received'
+
+
+class ProcurementOrder(OrderTotalsModelMixin, SafeDeleteModel):
     _safedelete_policy = SOFT_DELETE_CASCADE
     
     PAYMENT_TERMS = [
@@ -110,7 +116,12 @@ class ProcurementOrder(SafeDeleteModel):
     status = models.CharField(_('Durum'), max_length=20, choices=STATUS, default="draft") 
     currency = CurrencyField(null=False, blank=False)
     delivery_address = models.CharField(_('Teslimat Adresi'), max_length=250, null=True, blank=False)
-    history = HistoricalRecords()
+    subtotal = models.DecimalField(_('Ara Toplam'), max_digits=32, decimal_places=2, default=Decimal('0.00'), editable=False)
+    tax_total = models.DecimalField(_('Vergi Toplamı'), max_digits=32, decimal_places=2, default=Decimal('0.00'), editable=False)
+    grand_total = models.DecimalField(_('Genel Toplam'), max_digits=32, decimal_places=2, default=Decimal('0.00'), editable=False)
+    open_quantity = models.DecimalField(_('Açık Miktar'), max_digits=21, decimal_places=2, default=Decimal('0.00'), editable=False)
+    history = HistoricalRecords(excluded_fields=STORED_TOTAL_FIELDS)
+    objects = SafeDeleteManager.from_queryset(ProcurementOrderQuerySet)()
     
     def __str__(self):
         return str(self.po_number)
@@ -137,38 +148,48 @@ class ProcurementOrder(SafeDeleteModel):
             ("cancel_procurementorder", "Procurement order cancel permission"),
             ("bill_procurementorder", "Can set invoice issuance date, also means invoice is approved"),
         ]
+        indexes = [
+            # Per-vendor reports read the stored totals from the index alone
+            models.Index(fields=['vendor', 'status'], include=['grand_total', 'open_quantity'], name='po_vendor_totals_idx'),
+        ]
     
+    def refresh_totals(self):
+        """Recomputes subtotal, tax_total, grand_total and open_quantity from the live lines."""
+        type(self).objects.all_with_deleted().filter(pk=self.pk).refresh_totals()
+        self.refresh_from_db(fields=STORED_TOTAL_FIELDS)
+
+    def _line_totals(self):
+        """(subtotal, tax_total) over the lines in one pass, used when the order was not loaded with_totals()."""
+        subtotal = tax_total = Decimal('0')
+        for line in self.lines.all(): # type: ignore
+            if line.unit_price is None or line.quantity is None:
+                continue
+            subtotal += line.unit_price * line.quantity
+            if line.tax_rate is not None:
+                tax_total += line.unit_price * line.quantity * line.tax_rate
+        return subtotal, tax_total
+
     @property
     def total_price_without_tax(self):
         # Sum of unit_price * quantity for all lines, minus trade_discount and due_discount
-        subtotal = sum(
-            (line.unit_price * line.quantity)
-            for line in self.lines.all() # type: ignore
-            if line.unit_price is not None and line.quantity is not None
-        )
-        discount = subtotal * (self.trade_discount + self.due_discount)
-        return subtotal - discount
+        if hasattr(self, 'total_without_tax'):
+            return self.total_without_tax
+        subtotal, _tax_total = self._line_totals()
+        return subtotal - subtotal * (self.trade_discount + self.due_discount)
 
     @property
     def total_price_with_tax(self):
         # Sum of (unit_price * quantity) * (1 + tax_rate) for all lines, minus discounts
-        subtotal = sum(
-            (line.unit_price * line.quantity)
-            for line in self.lines.all() # type: ignore
-            if line.unit_price is not None and line.quantity is not None
-        )
-        discount = subtotal * (self.trade_discount + self.due_discount)
-        subtotal_after_discount = subtotal - discount
-        tax_total = sum(
-            (line.unit_price * line.quantity * line.tax_rate)
-            for line in self.lines.all() # type: ignore
-            if line.unit_price is not None and line.quantity is not None and line.tax_rate is not None
-        )
-        return subtotal_after_discount + tax_total
+        if hasattr(self, 'total_with_tax'):
+            return self.total_with_tax
+        subtotal, tax_total = self._line_totals()
+        return subtotal - subtotal * (self.trade_discount + self.due_discount) + tax_total
 
     @property
     def all_received(self):
         """Returns True if all order lines have no missing quantity (quantity_left <= 0)."""
+        if hasattr(self, 'all_done'):
+            return self.all_done
         return all(line.quantity_left <= 0 for line in self.lines.all()) # type: ignore
     
     @property
@@ -1,11 +1,9 @@
 from rest_framework import serializers
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
 from procurement.models import MaterialDemand
 from core.serializers.material_serializers import MaterialSerializer
 
-class MaterialDemandSerializer(serializers.ModelSerializer):
-    created_by = serializers.SerializerMethodField(read_only=True)
-    created_at = serializers.SerializerMethodField(read_only=True)
-
+class MaterialDemandSerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = MaterialDemand
         fields = [
@@ -22,20 +20,6 @@ class MaterialDemandSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['demand_no', 'status', 'created_by', 'created_at']
 
-    def get_created_by(self, obj):
-        # Use django-simple-history to get the first history record's user
-        first_history = obj.history.order_by('history_date').first()
-        if first_history and hasattr(first_history, 'history_user') and first_history.history_user:
-            return str(first_history.history_user)
-        return None
-
-    def get_created_at(self, obj):
-        # Use django-simple-history to get the first history record's date
-        first_history = obj.history.order_by('history_date').first()
-        if first_history:
-            return first_history.history_date
-        return None
-
     def to_representation(self, instance):
         ret = super().to_representation(instance)
         action = self.context.get('action')
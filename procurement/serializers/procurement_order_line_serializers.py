@@ -1,13 +1,12 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
 from core.serializers.material_serializers import MaterialSerializer
 from procurement.models import ProcurementOrderLine, ProcurementOrder
 
 
-class ProcurementOrderLineSerializer(serializers.ModelSerializer):
+class ProcurementOrderLineSerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
     po = serializers.PrimaryKeyRelatedField(queryset=ProcurementOrder.objects.all(), required=False)
-    created_at = serializers.SerializerMethodField(read_only=True)
-    created_by = serializers.SerializerMethodField(read_only=True)
     quantity = serializers.DecimalField(max_digits=21, decimal_places=2, coerce_to_string=False)
     quantity_received = serializers.DecimalField(max_digits=21, decimal_places=2, coerce_to_string=False, read_only=True)
     unit_price = serializers.DecimalField(max_digits=32, decimal_places=2, coerce_to_string=False, required=False, allow_null=True)
@@ -50,18 +49,6 @@ class ProcurementOrderLineSerializer(serializers.ModelSerializer):
             ret['material'] = getattr(material, 'internal_code', None)
         return ret
 
-    def get_created_by(self, obj):
-        first_history = obj.history.order_by('history_date').first()
-        if first_history and hasattr(first_history, 'history_user') and first_history.history_user:
-            return str(first_history.history_user)
-        return None
-
-    def get_created_at(self, obj):
-        first_history = obj.history.order_by('history_date').first()
-        if first_history:
-            return first_history.history_date
-        return None
-    
     def validate(self, attrs):
         # Use self.partial to determine if this is a partial update
         uom = attrs.get('uom')
@@ -1,16 +1,15 @@
 from decimal import Decimal
 from rest_framework import serializers
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
 from procurement.models import ProcurementOrder, ProcurementOrderLine
 from procurement.serializers.procurement_order_line_serializers import ProcurementOrderLineSerializer
 from core.models import Company
 from core.serializers.company_serializers import CompanySerializer
 from django.utils.translation import gettext_lazy as _
 
-class ProcurementOrderSerializer(serializers.ModelSerializer):
+class ProcurementOrderSerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
     lines = ProcurementOrderLineSerializer(many=True, required=False)
     vendor = serializers.PrimaryKeyRelatedField(queryset=Company.objects.all(), required=False)
-    created_at = serializers.SerializerMethodField(read_only=True)
-    created_by = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = ProcurementOrder
@@ -52,6 +51,13 @@ class ProcurementOrderSerializer(serializers.ModelSerializer):
             'status'
         ]
         
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('action') == 'list':
+            # The list shows lines_count only, do not serialize lines just to drop them
+            fields.pop('lines', None)
+        return fields
+
     def get_lines(self, obj):
         qs = obj.lines.all()
         return ProcurementOrderLineSerializer(qs, many=True, context=self.context).data
@@ -61,10 +67,11 @@ class ProcurementOrderSerializer(serializers.ModelSerializer):
         action = self.context.get('action')
         if action == 'retrieve':
             ret['lines'] = ProcurementOrderLineSerializer(instance.lines.all(), many=True, context=self.context).data
-            ret['vendor'] = CompanySerializer(instance.vendor, context=self.context).data if instance.vendor else None
+            # Embedded without the view, the vendor's own retrieve would add its contacts
+            ret['vendor'] = CompanySerializer(instance.vendor).data if instance.vendor else None
         elif action == 'list':
             ret['vendor'] = getattr(instance.vendor, 'name', None)
-            ret['lines_count'] = instance.lines.count()
+            ret['lines_count'] = instance.line_count if hasattr(instance, 'line_count') else instance.lines.count()
         return ret
 
     def create(self, validated_data):
@@ -111,18 +118,6 @@ class ProcurementOrderSerializer(serializers.ModelSerializer):
         
         return attrs
     
-    def get_created_by(self, obj):
-        first_history = obj.history.order_by('history_date').first()
-        if first_history and hasattr(first_history, 'history_user') and first_history.history_user:
-            return str(first_history.history_user)
-        return None
-
-    def get_created_at(self, obj):
-        first_history = obj.history.order_by('history_date').first()
-        if first_history:
-            return first_history.history_date
-        return None
-
     def update(self, instance, validated_data):
         # Remove status from validated_data if present (status changes should use dedicated endpoint)
         validated_data.pop('status', None)
@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from procurement.models import ProcurementOrder
+from safedelete.signals import post_softdelete, post_undelete
+from procurement.models import ProcurementOrder, ProcurementOrderLine
 from sales.models import VariableCost
 from finance.models import CurrencyExchangeRate
 from datetime import date
@@ -82,4 +83,17 @@ def create_cost_data(sender, instance, **kwargs):
                     cost=final_cost,
                     currency=final_currency,
                     uom=line.uom
-                )
\ No newline at end of file
+                )
+
+
+@receiver(post_save, sender=ProcurementOrderLine)
+@receiver(post_softdelete, sender=ProcurementOrderLine)
+@receiver(post_undelete, sender=ProcurementOrderLine)
+def refresh_order_totals(sender, instance, **kwargs):
+    instance.po.refresh_totals()
+
+
+@receiver(post_delete, sender=ProcurementOrderLine)
+def refresh_order_totals_after_delete(sender, instance, **kwargs):
+    # The order may be going away in the same cascade, update it by id
+    ProcurementOrder.objects.all_with_deleted().filter(pk=instance.po_id).refresh_totals()
@@ -1,5 +1,12 @@
+from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 from core.models import Company, Material
 from procurement.models import ProcurementOrder, ProcurementOrderLine
 
@@ -88,6 +95,157 @@ class ProcurementOrderCalculationTest(TestCase):
         po.payment_term = "X_Y_NET_T"
         po.save()
         self.assertEqual(po.last_payment_date, date(2025, 7, 29))
-from django.test import TestCase
 
-# Create your tests here.
+
+class OrderTotalsTestMixin:
+    def setUp(self):
+        self.company = Company.objects.create(name="Test Vendor", legal_name="Test Vendor Ltd.")
+        self.material = Material.objects.create(name="Test Material", category="supplied")
+        self.user = User.objects.create(username="satinalma", is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_po(self, lines, trade_discount="0.05"):
+        po = ProcurementOrder.objects.create(
+            vendor=self.company, payment_term="CIA", payment_method="BANK_TRANSFER", incoterms="EXW",
+            trade_discount=Decimal(trade_discount), due_in_days=timedelta(0), description="Test PO",
+            status="draft", currency="TRY", delivery_address="Test Address",
+        )
+        for quantity, unit_price, tax_rate in lines:
+            ProcurementOrderLine.objects.create(
+                po=po, material=self.material, quantity=Decimal(quantity),
+                unit_price=unit_price and Decimal(unit_price), tax_rate=Decimal(tax_rate),
+            )
+        return po
+
+
+class OrderTotalsAnnotationTest(OrderTotalsTestMixin, TestCase):
+    def test_annotations_match_python_properties(self):
+        po = self.make_po([("10", "100.00", "0.18"), ("5", "200.00", "0.08"), ("3", None, "0.18")])
+        annotated = ProcurementOrder.objects.with_totals().get(pk=po.pk)
+        self.assertEqual(annotated.line_count, 3)
+        self.assertEqual(annotated.total_price_without_tax, po.total_price_without_tax)
+        self.assertEqual(annotated.total_price_with_tax, po.total_price_with_tax)
+        self.assertEqual(annotated.total_price_with_tax, Decimal("2160.00"))
+        self.assertFalse(annotated.all_received)
+
+    def test_deleted_lines_are_excluded(self):
+        po = self.make_po([("10", "100.00", "0.18"), ("5", "200.00", "0.08")])
+        line = po.lines.get(quantity=Decimal("5"))
+        line.delete()
+        annotated = ProcurementOrder.objects.with_totals().get(pk=po.pk)
+        self.assertEqual(annotated.line_count, 1)
+        self.assertEqual(annotated.total_price_without_tax, Decimal("950.00"))
+        line = po.lines.get()
+        line.quantity_received = line.quantity
+        line.save()
+        self.assertTrue(ProcurementOrder.objects.with_totals().get(pk=po.pk).all_received)
+
+    def test_list_orders_and_filters_by_total(self):
+        small = self.make_po([("1", "10.00", "0.00")])
+        large = self.make_po([("1", "1000.00", "0.00")])
+        response = self.client.get('/api/v1/procurement-orders/', {"ordering": "-total_with_tax"})
+        self.assertEqual([row["id"] for row in response.data["results"]], [large.pk, small.pk])
+        response = self.client.get('/api/v1/procurement-orders/', {"total_with_tax__gte": "100"})
+        self.assertEqual([row["id"] for row in response.data["results"]], [large.pk])
+
+    def test_totals_do_not_fetch_lines(self):
+        for _ in range(5):
+            self.make_po([("1", "10.00", "0.18"), ("2", "20.00", "0.08")])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/procurement-orders/')
+        self.assertEqual(response.data["count"], 5)
+        line_selects = [q for q in queries if q['sql'].startswith('SELECT "procurement_procurementorderline"."id"')]
+        # The list has no nested lines, totals, flags and lines_count come from the annotation
+        self.assertEqual(line_selects, [])
+        self.assertNotIn("lines", response.data["results"][0])
+        self.assertEqual(response.data["results"][0]["lines_count"], 2)
+        self.assertEqual(response.data["results"][0]["vendor"], self.company.name)
+
+
+class StoredOrderTotalsTest(OrderTotalsTestMixin, TestCase):
+    def stored(self, po):
+        po.refresh_from_db()
+        return po.subtotal, po.tax_total, po.grand_total, po.open_quantity
+
+    def test_line_writes_keep_header_totals(self):
+        po = self.make_po([("10", "100.00", "0.18"), ("5", "200.00", "0.08")])
+        self.assertEqual(self.stored(po), (Decimal("2000.00"), Decimal("260.00"), Decimal("2160.00"), Decimal("15.00")))
+        line = po.lines.get(quantity=Decimal("5"))
+        line.quantity_received = Decimal("5")
+        line.save()
+        self.assertEqual(self.stored(po)[3], Decimal("10.00"))
+        line.delete()
+        self.assertEqual(self.stored(po), (Decimal("1000.00"), Decimal("180.00"), Decimal("1130.00"), Decimal("10.00")))
+        line.undelete()
+        self.assertEqual(self.stored(po)[0], Decimal("2000.00"))
+
+    def test_discount_change_recomputes_and_stale_save_keeps_totals(self):
+        po = self.make_po([("10", "100.00", "0.00")], trade_discount="0")
+        stale = ProcurementOrder.objects.get(pk=po.pk)
+        ProcurementOrderLine.objects.create(po=po, material=self.material, quantity=Decimal("1"), unit_price=Decimal("500.00"))
+        stale.description = "Güncel"
+        stale.save()
+        self.assertEqual(self.stored(po)[2], Decimal("1500.00"))
+        po.trade_discount = Decimal("0.1")
+        po.save()
+        self.assertEqual(self.stored(po)[2], Decimal("1350.00"))
+
+    def test_save_without_discount_change_skips_refresh(self):
+        po = self.make_po([("10", "100.00", "0.00")])
+        po.description = "Güncel"
+        with CaptureQueriesContext(connection) as queries:
+            po.save()
+        self.assertFalse([q for q in queries if 'procurement_procurementorderline' in q['sql']])
+
+    def test_discount_change_is_detected_without_reading_the_order(self):
+        po = ProcurementOrder.objects.get(pk=self.make_po([("10", "100.00", "0.00")]).pk)
+        po.trade_discount = Decimal("0.1")
+        with CaptureQueriesContext(connection) as queries:
+            po.save()
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT') and 'trade_discount' in q['sql']])
+        self.assertEqual(self.stored(po)[2], Decimal("900.00"))
+        with CaptureQueriesContext(connection) as queries:
+            po.save()
+        self.assertFalse([q for q in queries if 'procurement_procurementorderline' in q['sql']])
+
+    def test_verify_command_reports_and_repairs_drift(self):
+        po = self.make_po([("10", "100.00", "0.18")])
+        ProcurementOrder.objects.filter(pk=po.pk).update(grand_total=Decimal("1"))
+        out = StringIO()
+        call_command('verify_order_totals', stdout=out)
+        self.assertIn('1 orders with drifted totals', out.getvalue())
+        self.assertEqual(self.stored(po)[2], Decimal("1"))
+        call_command('verify_order_totals', '--repair', stdout=StringIO())
+        self.assertEqual(self.stored(po)[2], Decimal("1130.00"))
+        out = StringIO()
+        call_command('verify_order_totals', stdout=out)
+        self.assertNotIn('drifted', out.getvalue())
+
+
+class ProcurementOrderQueryBudgetTest(OrderTotalsTestMixin, TestCase):
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_list_page_has_a_fixed_query_budget(self):
+        for _ in range(2):
+            self.make_po([("1", "10.00", "0.18"), ("2", "20.00", "0.08")])
+        baseline = self.count_queries('/api/v1/procurement-orders/')
+        for _ in range(6):
+            self.make_po([("1", "10.00", "0.18"), ("2", "20.00", "0.08"), ("3", "30.00", "0.08")])
+        # Count and the page with totals and vendor
+        self.assertEqual(self.count_queries('/api/v1/procurement-orders/'), baseline)
+        self.assertLessEqual(baseline, 3)
+
+    def test_retrieve_does_not_grow_with_lines(self):
+        po = self.make_po([("1", "10.00", "0.18")])
+        baseline = self.count_queries(f'/api/v1/procurement-orders/{po.pk}/')
+        for _ in range(4):
+            ProcurementOrderLine.objects.create(
+                po=po, material=Material.objects.create(name="Ek Malzeme", category="supplied"),
+                quantity=Decimal("1"), unit_price=Decimal("1.00"),
+            )
+        self.assertEqual(self.count_queries(f'/api/v1/procurement-orders/{po.pk}/'), baseline)
@@ -8,6 +8,7 @@ from rest_framework.views import exception_handler
 from rest_framework.permissions import DjangoModelPermissions
 from rest_framework.decorators import action
 from safedelete.config import HARD_DELETE
+from core.querysets import with_created_meta
 
 class CustomDjangoModelPermissions(DjangoModelPermissions):
     perms_map = {
@@ -47,7 +48,7 @@ class MaterialDemandViewSet(viewsets.ModelViewSet):
       - search_fields: description, demand_no
       - ordering_fields: id, demand_no, deadline, status
     """
-    queryset = MaterialDemand.objects.all().order_by('-id')
+    queryset = with_created_meta(MaterialDemand.objects.select_related('material')).order_by('-id')
     serializer_class = MaterialDemandSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['material', 'status', 'deadline']
@@ -9,6 +9,7 @@ from rest_framework.permissions import DjangoModelPermissions, IsAuthenticated
 from rest_framework.decorators import action
 from safedelete.config import HARD_DELETE
 from django.conf import settings
+from core.querysets import with_created_meta
 
 class CustomDjangoModelPermissions(DjangoModelPermissions):
     perms_map = {
@@ -46,7 +47,7 @@ class ProcurementOrderLineViewSet(viewsets.ModelViewSet):
       - search_fields: description
       - ordering_fields: id, po, material
     """
-    queryset = ProcurementOrderLine.objects.all().order_by('-id')
+    queryset = with_created_meta(ProcurementOrderLine.objects.select_related('material')).order_by('-id')
     serializer_class = ProcurementOrderLineSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['po', 'material', 'uom']
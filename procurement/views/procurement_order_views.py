@@ -2,14 +2,17 @@ from django.http import JsonResponse
 from rest_framework import viewsets, status, filters, pagination
 from django.db import transaction
 from rest_framework.response import Response
-from django_filters.rest_framework import DjangoFilterBackend
-from procurement.models import ProcurementOrder
+from django_filters.rest_framework import DjangoFilterBackend, FilterSet, NumberFilter
+from django.db.models import Prefetch
+from core.models import Company, Material
+from procurement.models import ProcurementOrder, ProcurementOrderLine
 from procurement.serializers.procurement_order_serializers import ProcurementOrderSerializer
 from rest_framework.views import exception_handler
 from rest_framework.permissions import DjangoModelPermissions
 from rest_framework.decorators import action
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
+from core.querysets import with_created_meta
 
 class CustomDjangoModelPermissions(DjangoModelPermissions):
     perms_map = {
@@ -37,17 +40,45 @@ class CustomPagination(pagination.PageNumberPagination):
             "results": data
         })
 
+class ProcurementOrderFilter(FilterSet):
+    total_with_tax__gte = NumberFilter(field_name='total_with_tax', lookup_expr='gte')
+    total_with_tax__lte = NumberFilter(field_name='total_with_tax', lookup_expr='lte')
+
+    class Meta:
+        model = ProcurementOrder
+        fields = ['vendor', 'status', 'po_number', 'currency']
+
 class ProcurementOrderViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'head', 'options', 'delete']
-    queryset = ProcurementOrder.objects.all().order_by('-id')
+    queryset = with_created_meta(ProcurementOrder.objects.all()).order_by('-id')
     serializer_class = ProcurementOrderSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['vendor', 'status', 'po_number', 'currency']
+    filterset_class = ProcurementOrderFilter
     search_fields = ['po_number', 'description', 'vendor__name']
-    ordering_fields = ['id', 'po_number', 'vendor', 'status']
+    ordering_fields = ['id', 'po_number', 'vendor', 'status', 'total_without_tax', 'total_with_tax', 'grand_total', 'open_quantity']
     pagination_class = CustomPagination
     permission_classes = [CustomDjangoModelPermissions]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Totals in SQL, the model properties read the annotations; everything the
+        # serializer touches is loaded up front so a page costs a fixed number of queries
+        if self.action == 'list':
+            queryset = queryset.with_totals().select_related('vendor')
+        elif self.action == 'retrieve':
+            queryset = queryset.with_totals().prefetch_related(
+                Prefetch('vendor', queryset=with_created_meta(Company.objects.all())),
+                Prefetch('lines', queryset=with_created_meta(ProcurementOrderLine.objects.all())),
+                Prefetch('lines__material', queryset=with_created_meta(Material.objects.all())),
+            )
+        return queryset
+
+    def get_serializer_context(self):
+        # The serializer shapes vendor and lines per action
+        context = super().get_serializer_context()
+        context['action'] = self.action
+        return context
+
     def list(self, request, *args, **kwargs):
         response = super().list(request, *args, **kwargs)
         if isinstance(response.data, dict) and "results" in response.data:
@@ -57,7 +88,7 @@ class ProcurementOrderViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        serializer = self.get_serializer(instance, context={'action': 'retrieve'})
+        serializer = self.get_serializer(instance)
         return Response({
             "status": "success",
             "message": "Order retrieved successfully",
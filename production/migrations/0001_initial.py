@@ -0,0 +1,77 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:14
+
+import core.fields
+import django.core.validators
+import django.db.models.deletion
+import simple_history.models
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('bom', '0004_bomclosure'),
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+        ('inventory', '0021_stockreservation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricalManufacturingOrder',
+            fields=[
+                ('id', models.BigIntegerField(auto_created=True, blank=True, db_index=True, verbose_name='ID')),
+                ('deleted', models.DateTimeField(db_index=True, editable=False, null=True)),
+                ('deleted_by_cascade', models.BooleanField(default=False, editable=False)),
+                ('mo_number', models.CharField(db_index=True, max_length=50, null=True, verbose_name='MO #no')),
+                ('uom', core.fields.UOMField(choices=[('ADT', 'Adet'), ('KG', 'Kilogram'), ('G', 'Gram'), ('L', 'Litre'), ('ML', 'Mililitre'), ('M', 'Metre'), ('BOX', 'Koli'), ('PLT', 'Palet')], default='ADT', max_length=4, verbose_name='Birim')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=21, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Miktar')),
+                ('deadline', models.DateField(blank=True, null=True, verbose_name='Son Tarih')),
+                ('description', models.TextField(blank=True, max_length=500, verbose_name='Açıklama')),
+                ('status', models.CharField(choices=[('draft', 'Taslak'), ('released', 'Serbest bırakıldı'), ('completed', 'Tamamlandı'), ('cancelled', 'İptal edildi')], default='draft', max_length=20, verbose_name='Durum')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Tamamlanma Tarihi')),
+                ('history_id', models.AutoField(primary_key=True, serialize=False)),
+                ('history_date', models.DateTimeField(db_index=True)),
+                ('history_change_reason', models.CharField(max_length=100, null=True)),
+                ('history_type', models.CharField(choices=[('+', 'Created'), ('~', 'Changed'), ('-', 'Deleted')], max_length=1)),
+                ('bom', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='bom.bom', verbose_name='Reçete')),
+                ('history_user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.material', verbose_name='Ürün')),
+                ('source_location', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.inventorylocation', verbose_name='Bileşen Konumu')),
+                ('target_location', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventory.inventorylocation', verbose_name='Ürün Konumu')),
+            ],
+            options={
+                'verbose_name': 'historical manufacturing order',
+                'verbose_name_plural': 'historical manufacturing orders',
+                'ordering': ('-history_date', '-history_id'),
+                'get_latest_by': ('history_date', 'history_id'),
+            },
+            bases=(simple_history.models.HistoricalChanges, models.Model),
+        ),
+        migrations.CreateModel(
+            name='ManufacturingOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deleted', models.DateTimeField(db_index=True, editable=False, null=True)),
+                ('deleted_by_cascade', models.BooleanField(default=False, editable=False)),
+                ('mo_number', models.CharField(max_length=50, null=True, unique=True, verbose_name='MO #no')),
+                ('uom', core.fields.UOMField(choices=[('ADT', 'Adet'), ('KG', 'Kilogram'), ('G', 'Gram'), ('L', 'Litre'), ('ML', 'Mililitre'), ('M', 'Metre'), ('BOX', 'Koli'), ('PLT', 'Palet')], default='ADT', max_length=4, verbose_name='Birim')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=21, validators=[django.core.validators.MinValueValidator(Decimal('0.01'))], verbose_name='Miktar')),
+                ('deadline', models.DateField(blank=True, null=True, verbose_name='Son Tarih')),
+                ('description', models.TextField(blank=True, max_length=500, verbose_name='Açıklama')),
+                ('status', models.CharField(choices=[('draft', 'Taslak'), ('released', 'Serbest bırakıldı'), ('completed', 'Tamamlandı'), ('cancelled', 'İptal edildi')], default='draft', max_length=20, verbose_name='Durum')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Tamamlanma Tarihi')),
+                ('bom', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='manufacturing_orders', to='bom.bom', verbose_name='Reçete')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='manufacturing_orders', to='core.material', verbose_name='Ürün')),
+                ('source_location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='inventory.inventorylocation', verbose_name='Bileşen Konumu')),
+                ('target_location', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='inventory.inventorylocation', verbose_name='Ürün Konumu')),
+            ],
+            options={
+                'permissions': [('release_manufacturingorder', 'Release manufacturing order to the shop floor'), ('complete_manufacturingorder', 'Complete manufacturing order, backflushes stock'), ('cancel_manufacturingorder', 'Manufacturing order cancel permission')],
+            },
+        ),
+    ]
@@ -1,4 +1,128 @@
-from django.db import models
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from safedelete.config import SOFT_DELETE
+from safedelete.models import SafeDeleteModel
 from simple_history.models import HistoricalRecords
+from core.fields import UOMField
 
-# Create your models here.
+
+class ManufacturingOrder(SafeDeleteModel):
+    _safedelete_policy = SOFT_DELETE
+
+    STATUS = [
+        ('draft', 'Taslak'),
+        ('released', 'Serbest bırakıldı'),
+        ('completed', 'Tamamlandı'),
+        ('cancelled', 'İptal edildi'),
+    ]
+
+    TRANSITIONS = {
+        'draft': ['released', 'cancelled'],
+        'released': ['completed', 'cancelled', 'draft'],
+        'completed': [],
+        'cancelled': [],
+    }
+
+    mo_number = models.CharField(_("MO #no"), max_length=50, unique=True, null=True, blank=False)
+    product = models.ForeignKey("core.Material", related_name='manufacturing_orders', on_delete=models.PROTECT, verbose_name=_('Ürün'))
+    bom = models.ForeignKey("bom.Bom", related_name='manufacturing_orders', on_delete=models.PROTECT, verbose_name=_('Reçete'))
+    uom = UOMField(null=False, blank=False)
+    quantity = models.DecimalField(_('Miktar'), max_digits=21, decimal_places=2, validators=[MinValueValidator(Decimal('0.01'))])
+    source_location = models.ForeignKey("inventory.InventoryLocation", related_name='+', on_delete=models.PROTECT, verbose_name=_('Bileşen Konumu'))
+    target_location = models.ForeignKey("inventory.InventoryLocation", related_name='+', on_delete=models.PROTECT, verbose_name=_('Ürün Konumu'))
+    deadline = models.DateField(_('Son Tarih'), null=True, blank=True)
+    description = models.TextField(_('Açıklama'), max_length=500, blank=True)
+    status = models.CharField(_('Durum'), max_length=20, choices=STATUS, default='draft')
+    completed_at = models.DateTimeField(_('Tamamlanma Tarihi'), null=True, blank=True)
+    history = HistoricalRecords()
+
+    class Meta:
+        permissions = [
+            ("release_manufacturingorder", "Release manufacturing order to the shop floor"),
+            ("complete_manufacturingorder", "Complete manufacturing order, backflushes stock"),
+            ("cancel_manufacturingorder", "Manufacturing order cancel permission"),
+        ]
+
+    def __str__(self):
+        return str(self.mo_number)
+
+    def save(self, *args, **kwargs):
+        creating = self.pk is None
+        super().save(*args, **kwargs)
+
+        if creating and not self.mo_number:
+            prefix = "MO-#"
+            year = str(datetime.now().year)[-2:]
+            pk_str = str(self.pk)
+            zeros_len = 16 - (len(prefix) + len(year) + len(pk_str))
+            zeros = '0' * max(0, zeros_len)
+            self.mo_number = f"{prefix}{year}{zeros}{pk_str}"[:16]
+            super().save(update_fields=["mo_number"])
+
+    def clean(self):
+        if self.bom_id and self.product_id and self.bom.product_id != self.product_id:
+            raise ValidationError({'bom': _("Reçete, üretilecek ürüne ait değil.")})
+
+    def requirements(self):
+        """Components to backflush as [(component_id, uom, quantity)], rounded to the movement precision."""
+        return [
+            (line.component_id, line.uom, (line.quantity * self.quantity).quantize(Decimal('0.01'), ROUND_HALF_UP))
+            for line in self.bom.lines.all()
+        ]
+
+    def can_transition_to(self, new_status, user=None):
+        return new_status in self.TRANSITIONS.get(self.status, [])
+
+    def get_allowed_transitions(self, user=None):
+        return self.TRANSITIONS.get(self.status, [])
+
+    def change_status(self, new_status, user=None):
+        """Safely change status with all validations, completing goes through complete()"""
+        if not self.can_transition_to(new_status, user):
+            current_display = dict(self.STATUS).get(self.status, self.status)
+            new_display = dict(self.STATUS).get(new_status, new_status)
+            raise ValidationError(_("%(current)s durumundan %(new)s durumuna geçiş yapılamaz") % {
+                'current': current_display,
+                'new': new_display
+            })
+        if new_status == 'completed':
+            return self.complete(user)
+        if new_status == 'released' and not self.bom.lines.exists():
+            raise ValidationError({'bom': _("Reçetede bileşen yok.")})
+        self.status = new_status
+        self.save()
+        return self
+
+    @transaction.atomic
+    def complete(self, user=None):
+        """
+        Backflushes every BOM component from source_location as MO_OUT and
+        receives the product at target_location as MO_IN, valued at the
+        consumed cost plus the BOM's labor and machining cost. Runs as one
+        StockMovementBatch: one bulk insert and one balance update per key.
+        """
+        from inventory.services.batch import StockMovementBatch
+        locked = type(self).objects.select_for_update().select_related('bom').get(pk=self.pk)
+        if locked.status != 'released':
+            raise ValidationError(_("Sadece serbest bırakılmış üretim emirleri tamamlanabilir."))
+        consumed = [
+            (locked.source_location_id, component_id, uom, quantity)
+            for component_id, uom, quantity in locked.requirements() if quantity > 0
+        ]
+        extra_cost = (locked.bom.labor_cost + locked.bom.machining_cost) * locked.quantity
+        batch = StockMovementBatch(user)
+        batch.produce(
+            locked, consumed, (locked.target_location_id, locked.product_id, locked.uom),
+            locked.quantity, extra_cost,
+        )
+        locked.status = 'completed'
+        locked.completed_at = timezone.now()
+        locked._history_user = user  # type: ignore
+        locked.save()
+        self.refresh_from_db()
+        return self
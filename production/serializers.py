@@ -0,0 +1,53 @@
+from rest_framework import serializers
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
+from django.utils.translation import gettext_lazy as _
+from bom.models import Bom
+from production.models import ManufacturingOrder
+
+
+class ManufacturingOrderSerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = ManufacturingOrder
+        fields = [
+            'id',
+            'mo_number',
+            'product',
+            'bom',
+            'uom',
+            'quantity',
+            'source_location',
+            'target_location',
+            'deadline',
+            'description',
+            'status',
+            'completed_at',
+            'created_by',
+            'created_at',
+        ]
+        read_only_fields = ['mo_number', 'bom', 'uom', 'status', 'completed_at', 'created_by', 'created_at']
+
+    def validate(self, attrs):
+        product = attrs.get('product', getattr(self.instance, 'product', None))
+        bom = Bom.objects.filter(product=product).first()
+        if bom is None:
+            raise serializers.ValidationError({'product': _("Bu ürünün reçetesi yok.")})
+        attrs['bom'] = bom
+        attrs['uom'] = bom.uom
+        return attrs
+
+    def to_representation(self, instance):
+        ret = super().to_representation(instance)
+        action = self.context.get('action')
+        if action == 'retrieve':
+            ret['requirements'] = [
+                {'component': component_id, 'uom': uom, 'quantity': quantity}
+                for component_id, uom, quantity in instance.requirements()
+            ]
+        elif action == 'list':
+            ret['product'] = getattr(instance.product, 'internal_code', None)
+        return ret
+
+    def create(self, validated_data):
+        # Orders always start as 'draft'
+        validated_data.pop('status', None)
+        return ManufacturingOrder.objects.create(**validated_data)
@@ -0,0 +1,195 @@
+"""
+Material requirements planning.
+
+An MRP run loads its inputs in a handful of bulk queries: open sales order
+lines, the BOM graph below them (BomExplosion, one round trip per level),
+on-hand stock, open procurement order lines, open material demands and
+released manufacturing orders.
+Netting then happens in memory, one material at a time in low-level-code
+order, so every parent's planned production has been exploded into the
+requirements of a component before the component itself is netted.
+
+Requirements are time-phased backwards from the finished good: a BOM is
+planned to finish one LEAD_TIME after the latest of its components, so
+purchased leaves are due on the run date and each level above them one
+LEAD_TIME later. Net requirements of purchased materials become draft
+MaterialDemand proposals, one per (material, uom, deadline). Existing
+open demands count as supply, so running MRP again only proposes what is
+still missing. A released manufacturing order is supply of its product,
+while the components it will backflush are still in stock and so count
+as demand from the day it is due to start.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import ROUND_UP, Decimal
+from django.db import models, transaction
+from django.utils import timezone
+from bom.services.explosion import BomCycleError, BomExplosion
+from inventory.models import InventoryBalance
+from inventory.services.batch import PO_RECEIVABLE_STATUSES
+from procurement.models import MaterialDemand, ProcurementOrderLine
+from production.models import ManufacturingOrder
+from sales.models import SalesOrderLine
+
+LEAD_TIME = timedelta(days=7)
+# Orders whose open lines are still to be shipped
+DEMAND_STATUSES = ['approved', 'billed', 'paid']
+# Orders whose lines are still to be received, approved ones are about to be ordered
+SUPPLY_STATUSES = ['approved', *PO_RECEIVABLE_STATUSES]
+# Manufacturing orders on the shop floor
+PRODUCTION_STATUSES = ['released']
+PROPOSAL_DESCRIPTION = "MRP önerisi"
+
+
+class MrpRun:
+
+    def __init__(self, run_date=None, lead_time=LEAD_TIME):
+        self.run_date = run_date or timezone.localdate()
+        self.lead_time = lead_time
+        self.explosion = BomExplosion()
+        self.gross = defaultdict(lambda: defaultdict(Decimal))  # (material_id, uom) -> {date: quantity}
+        self.supply = defaultdict(Decimal)  # (material_id, uom) -> quantity available
+        self.planned_production = defaultdict(lambda: defaultdict(Decimal))
+        self.proposals = defaultdict(lambda: defaultdict(Decimal))
+        self._heights = {}
+
+    def load_demand(self):
+        rows = (
+            SalesOrderLine.objects.filter(so__status__in=DEMAND_STATUSES, so__deleted__isnull=True, quantity__gt=models.F('quantity_sent'))
+            .values('material_id', 'uom')
+            .order_by()
+            .annotate(open_quantity=models.Sum(models.F('quantity') - models.F('quantity_sent')))
+        )
+        demand = [(row['material_id'], row['uom'], row['open_quantity']) for row in rows]
+        self.explosion.load({material_id for material_id, _uom, _quantity in demand})
+        for material_id, uom, quantity in demand:
+            due = self.run_date + self.lead_time * self.height(material_id, uom)
+            self.gross[(material_id, uom)][due] += quantity
+
+    def load_production(self):
+        """Released manufacturing orders: their output is supply, their components demand."""
+        orders = (
+            ManufacturingOrder.objects.filter(status__in=PRODUCTION_STATUSES)
+            .select_related('bom')
+            .prefetch_related('bom__lines')
+        )
+        requirements = []
+        for mo in orders:
+            self.supply[(mo.product_id, mo.uom)] += mo.quantity
+            start = max((mo.deadline or self.run_date) - self.lead_time, self.run_date)
+            requirements.extend((component_id, uom, start, quantity) for component_id, uom, quantity in mo.requirements())
+        self.explosion.load({component_id for component_id, _uom, _start, _quantity in requirements})
+        for component_id, uom, start, quantity in requirements:
+            self.gross[(component_id, uom)][start] += quantity
+
+    def load_supply(self, material_ids):
+        """On hand stock, open procurement order lines and open material demands."""
+        balances = InventoryBalance.objects.filter(material_id__in=material_ids).values_list('material_id', 'uom', 'quantity')
+        for material_id, uom, quantity in balances:
+            self.supply[(material_id, uom)] += quantity
+        open_lines = (
+            ProcurementOrderLine.objects.filter(
+                material_id__in=material_ids, po__status__in=SUPPLY_STATUSES, po__deleted__isnull=True,
+                quantity__gt=models.F('quantity_received'),
+            )
+            .values('material_id', 'uom')
+            .order_by()
+            .annotate(open_quantity=models.Sum(models.F('quantity') - models.F('quantity_received')))
+        )
+        for row in open_lines:
+            self.supply[(row['material_id'], row['uom'])] += row['open_quantity']
+        demands = (
+            MaterialDemand.objects.filter(material_id__in=material_ids).exclude(status='closed')
+            .values('material_id', 'uom')
+            .order_by()
+            .annotate(total=models.Sum('quantity'))
+        )
+        for row in demands:
+            self.supply[(row['material_id'], row['uom'])] += row['total']
+
+    def height(self, material_id, uom):
+        """Number of BOM levels below the material, 0 for purchased ones."""
+        bom = self.explosion.bom_for(material_id, uom)
+        if bom is None:
+            return 0
+        if material_id not in self._heights:
+            self._heights[material_id] = None
+            heights = [self.height(line.component_id, line.uom) for line in bom.lines.all()]
+            self._heights[material_id] = 1 + max(heights, default=0)
+        elif self._heights[material_id] is None:
+            raise BomCycleError(f"BOM cycle through material {material_id}")
+        return self._heights[material_id]
+
+    def low_level_order(self):
+        """Every loaded material, each one after all the BOMs using it."""
+        users = defaultdict(int)
+        for bom in self.explosion.boms.values():
+            if bom is not None:
+                for component_id in {line.component_id for line in bom.lines.all()}:
+                    users[component_id] += 1
+        ready = sorted(material_id for material_id in self.explosion.boms if not users[material_id])
+        ordered = []
+        while ready:
+            material_id = ready.pop()
+            ordered.append(material_id)
+            bom = self.explosion.boms[material_id]
+            if bom is None:
+                continue
+            for component_id in {line.component_id for line in bom.lines.all()}:
+                users[component_id] -= 1
+                if not users[component_id]:
+                    ready.append(component_id)
+        if len(ordered) < len(self.explosion.boms):
+            raise BomCycleError("BOM cycle among the planned materials")
+        return ordered
+
+    def net(self, key):
+        """Consumes supply against the requirements of key, earliest first. Returns {date: net quantity}."""
+        available = self.supply[key]
+        net = {}
+        for due, quantity in sorted(self.gross[key].items()):
+            taken = min(available, quantity)
+            available -= taken
+            if quantity > taken:
+                net[due] = quantity - taken
+        self.supply[key] = available
+        return net
+
+    def plan(self):
+        self.load_demand()
+        self.load_production()
+        self.load_supply(set(self.explosion.boms))
+        uoms = defaultdict(set)
+        for material_id, uom in self.gross:
+            uoms[material_id].add(uom)
+        for material_id in self.low_level_order():
+            for uom in sorted(uoms[material_id]):
+                bom = self.explosion.bom_for(material_id, uom)
+                for due, quantity in self.net((material_id, uom)).items():
+                    if bom is None:
+                        self.proposals[(material_id, uom)][due] += quantity
+                        continue
+                    self.planned_production[(material_id, uom)][due] += quantity
+                    start = max(due - self.lead_time, self.run_date)
+                    for line in bom.lines.all():
+                        self.gross[(line.component_id, line.uom)][start] += quantity * line.quantity
+                        uoms[line.component_id].add(line.uom)
+        return self
+
+    @transaction.atomic
+    def save(self):
+        """Creates one draft MaterialDemand per proposal. Returns them."""
+        demands = []
+        for (material_id, uom), dated in sorted(self.proposals.items()):
+            for deadline, quantity in sorted(dated.items()):
+                demands.append(MaterialDemand.objects.create(
+                    material_id=material_id, uom=uom, quantity=quantity.quantize(Decimal('0.01'), ROUND_UP),
+                    deadline=deadline, description=PROPOSAL_DESCRIPTION,
+                ))
+        return demands
+
+
+def run_mrp(run_date=None):
+    """Plans every open sales order and saves the purchase proposals."""
+    mrp = MrpRun(run_date).plan()
+    return mrp, mrp.save()
@@ -0,0 +1,19 @@
+import logging
+from celery import shared_task
+from production.services.mrp import run_mrp
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def run_material_requirements_planning():
+    """
+    Nets open sales orders through their BOMs against stock, open purchase
+    orders and open demands, and saves the missing purchases as draft
+    MaterialDemand proposals.
+
+    Runs daily at 01:00
+    """
+    mrp, demands = run_mrp()
+    logger.info(f"MRP planned {len(mrp.gross)} materials, proposed {len(demands)} material demands")
+    return f"MRP proposed {len(demands)} material demands."
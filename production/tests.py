@@ -1,3 +1,213 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from rest_framework.test import APIClient
+from bom.models import Bom, BomLine
+from core.models import Company, Material
+from inventory.models import InventoryBalance, InventoryLocation, LocationBalance, StockMovement
+from procurement.models import MaterialDemand, ProcurementOrder, ProcurementOrderLine
+from production.models import ManufacturingOrder
+from production.services.mrp import MrpRun, run_mrp
+from sales.models import SalesOrder, SalesOrderLine
 
-# Create your tests here.
+
+class MrpTestMixin:
+    run_date = date(2026, 1, 5)
+
+    def setUp(self):
+        patcher = mock.patch('bom.tasks.recost_ancestors.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.company = Company.objects.create(name="Test Firma", legal_name="Test Firma Ltd.")
+        self.product = Material.objects.create(name="Ürün", category="good")
+        self.assembly = Material.objects.create(name="Alt Montaj", category="part")
+        self.screw = Material.objects.create(name="Vida", category="supplied")
+        self.plate = Material.objects.create(name="Plaka", category="supplied")
+        self.make_bom(self.assembly, [(self.screw, "4"), (self.plate, "1")])
+        self.make_bom(self.product, [(self.assembly, "2"), (self.screw, "3")])
+        self.so = SalesOrder.objects.create(
+            customer=self.company, payment_term="CIA", payment_method="BANK_TRANSFER", incoterms="EXW",
+            due_in_days=timedelta(0), description="Test SO", status="approved", currency="TRY",
+            delivery_address="Test Address",
+        )
+
+    def make_bom(self, product, lines):
+        bom = Bom.objects.create(product=product, uom="ADT")
+        for component, quantity in lines:
+            BomLine.objects.create(bom=bom, component=component, quantity=Decimal(quantity), uom="ADT")
+        return bom
+
+    def order(self, material, quantity, quantity_sent="0"):
+        return SalesOrderLine.objects.create(
+            so=self.so, material=material, uom="ADT", quantity=Decimal(quantity),
+            quantity_sent=Decimal(quantity_sent), unit_price=Decimal("50.00"),
+        )
+
+    def stock(self, material, quantity):
+        InventoryBalance.objects.create(material=material, uom="ADT", quantity=Decimal(quantity))
+
+
+class MrpRunTest(MrpTestMixin, TestCase):
+    def proposals(self, mrp):
+        return {
+            (material_id, due): quantity
+            for (material_id, _uom), dated in mrp.proposals.items()
+            for due, quantity in dated.items()
+        }
+
+    def test_demand_is_exploded_and_time_phased_per_level(self):
+        self.order(self.product, "10", quantity_sent="5")
+        mrp = MrpRun(self.run_date).plan()
+        # 5 products due after two levels, 10 assemblies one level before
+        self.assertEqual(dict(mrp.planned_production[(self.product.pk, "ADT")]), {self.run_date + timedelta(days=14): Decimal("5")})
+        self.assertEqual(dict(mrp.planned_production[(self.assembly.pk, "ADT")]), {self.run_date + timedelta(days=7): Decimal("10")})
+        self.assertEqual(self.proposals(mrp), {
+            (self.screw.pk, self.run_date + timedelta(days=7)): Decimal("15"),
+            (self.screw.pk, self.run_date): Decimal("40"),
+            (self.plate.pk, self.run_date): Decimal("10"),
+        })
+
+    def test_stock_and_open_orders_are_netted_at_every_level(self):
+        self.order(self.product, "10")
+        self.stock(self.product, "4")
+        self.stock(self.assembly, "2")
+        self.stock(self.screw, "20")
+        po = ProcurementOrder.objects.create(
+            vendor=self.company, payment_term="CIA", payment_method="BANK_TRANSFER", incoterms="EXW",
+            description="Test PO", status="ordered", currency="TRY", delivery_address="Test Address",
+        )
+        ProcurementOrderLine.objects.create(po=po, material=self.plate, uom="ADT", quantity=Decimal("6"), unit_price=Decimal("1.00"))
+        mrp = MrpRun(self.run_date).plan()
+        # 6 products to build need 12 assemblies, 10 after stock; screws 18 + 40 - 20
+        self.assertEqual(sum(mrp.planned_production[(self.assembly.pk, "ADT")].values()), Decimal("10"))
+        self.assertEqual(sum(mrp.proposals[(self.screw.pk, "ADT")].values()), Decimal("38"))
+        self.assertEqual(sum(mrp.proposals[(self.plate.pk, "ADT")].values()), Decimal("4"))
+
+    def test_inputs_are_loaded_in_bulk(self):
+        for index in range(10):
+            product = Material.objects.create(name=f"Ürün {index}", category="good")
+            self.make_bom(product, [(self.assembly, "1")])
+            self.order(product, "1")
+        with CaptureQueriesContext(connection) as queries:
+            MrpRun(self.run_date).plan()
+        # Demand, released orders, three BOM levels of two queries and three supply queries
+        self.assertLessEqual(len(queries), 11)
+
+    def test_released_manufacturing_orders_are_netted(self):
+        location = InventoryLocation.objects.create(area=1, section=1, shelf=1, bin=1)
+        ManufacturingOrder.objects.create(
+            product=self.assembly, bom=Bom.objects.get(product=self.assembly), uom="ADT", quantity=Decimal("4"),
+            source_location=location, target_location=location, status="released",
+        )
+        self.order(self.product, "2")
+        mrp = MrpRun(self.run_date).plan()
+        # The 4 assemblies on the shop floor cover the order, their components are still needed
+        self.assertEqual(sum(mrp.planned_production[(self.assembly.pk, "ADT")].values()), Decimal("0"))
+        self.assertEqual(self.proposals(mrp), {
+            (self.screw.pk, self.run_date + timedelta(days=7)): Decimal("6"),
+            (self.screw.pk, self.run_date): Decimal("16"),
+            (self.plate.pk, self.run_date): Decimal("4"),
+        })
+
+    def test_billed_and_paid_orders_count_as_supply(self):
+        self.order(self.plate, "5")
+        for status in ["billed", "paid"]:
+            po = ProcurementOrder.objects.create(
+                vendor=self.company, payment_term="CIA", payment_method="BANK_TRANSFER", incoterms="EXW",
+                description="Test PO", status=status, currency="TRY", delivery_address="Test Address",
+            )
+            ProcurementOrderLine.objects.create(po=po, material=self.plate, uom="ADT", quantity=Decimal("2"), unit_price=Decimal("1.00"))
+        mrp = MrpRun(self.run_date).plan()
+        self.assertEqual(self.proposals(mrp), {(self.plate.pk, self.run_date): Decimal("1")})
+
+    def test_saved_proposals_count_as_supply_next_run(self):
+        self.order(self.product, "1")
+        _mrp, demands = run_mrp(self.run_date)
+        self.assertEqual(len(demands), 3)
+        self.assertEqual(MaterialDemand.objects.get(material=self.plate).quantity, Decimal("2.00"))
+        _mrp, demands = run_mrp(self.run_date)
+        self.assertEqual(demands, [])
+
+
+class ManufacturingOrderTest(MrpTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(username="uretim", is_superuser=True)
+        self.store = InventoryLocation.objects.create(area=1, section=1, shelf=1, bin=1)
+        self.line_side = InventoryLocation.objects.create(area=2, section=1, shelf=1, bin=1)
+        LocationBalance.lock(self.line_side, self.screw, "ADT").receive(Decimal("100"), Decimal("2"))
+        LocationBalance.lock(self.line_side, self.plate, "ADT").receive(Decimal("10"), Decimal("10"))
+        self.assembly_bom = Bom.objects.get(product=self.assembly)
+        self.assembly_bom.labor_cost = Decimal("3.00")
+        self.assembly_bom.save()
+        self.mo = ManufacturingOrder.objects.create(
+            product=self.assembly, bom=self.assembly_bom, uom="ADT", quantity=Decimal("5"),
+            source_location=self.line_side, target_location=self.store,
+        )
+
+    def balance(self, location, material):
+        return LocationBalance.objects.get(location=location, material=material, uom="ADT")
+
+    def test_complete_backflushes_components_and_receives_product(self):
+        self.mo.change_status('released', user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.mo.change_status('completed', user=self.user)
+        self.assertEqual(self.mo.status, 'completed')
+        movements = {(m.material_id, m.action): m for m in StockMovement.objects.filter(mo=self.mo)}
+        self.assertEqual(movements[(self.screw.pk, StockMovement.Action.MO_OUT)].quantity, Decimal("-20"))
+        self.assertEqual(movements[(self.plate.pk, StockMovement.Action.MO_OUT)].quantity, Decimal("-5"))
+        # 4 x 2 + 1 x 10 + 3 labor per assembly
+        received = movements[(self.assembly.pk, StockMovement.Action.MO_IN)]
+        self.assertEqual(received.quantity, Decimal("5"))
+        self.assertEqual(received.unit_cost, Decimal("21"))
+        self.assertEqual(self.balance(self.line_side, self.screw).quantity, Decimal("80"))
+        self.assertEqual(self.balance(self.store, self.assembly).quantity, Decimal("5"))
+        self.assertEqual(InventoryBalance.objects.get(material=self.assembly).quantity, Decimal("5"))
+        movement_inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "inventory_stockmovement"')]
+        self.assertEqual(len(movement_inserts), 1)
+
+    def test_short_component_rolls_back_everything(self):
+        self.mo.quantity = Decimal("11")
+        self.mo.status = 'released'
+        self.mo.save()
+        with self.assertRaises(DRFValidationError):
+            self.mo.complete(self.user)
+        self.mo.refresh_from_db()
+        self.assertEqual(self.mo.status, 'released')
+        self.assertFalse(StockMovement.objects.filter(mo=self.mo).exists())
+        self.assertEqual(self.balance(self.line_side, self.screw).quantity, Decimal("100"))
+
+    def test_api_reports_a_short_component_in_the_error_envelope(self):
+        self.mo.quantity = Decimal("11")
+        self.mo.status = 'released'
+        self.mo.save()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.patch(f'/api/v1/manufacturing-orders/{self.mo.pk}/set-status/', {"status": "completed"}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["status"], "error")
+        self.assertTrue(response.data["errors"])
+        self.mo.refresh_from_db()
+        self.assertEqual(self.mo.status, 'released')
+
+    def test_only_released_orders_complete(self):
+        with self.assertRaises(ValidationError):
+            self.mo.change_status('completed', user=self.user)
+
+    def test_api_creates_order_from_product_bom(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/v1/manufacturing-orders/', {
+            "product": self.product.pk, "quantity": "2",
+            "source_location": self.line_side.pk, "target_location": self.store.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data["result"]["bom"], Bom.objects.get(product=self.product).pk)
+        response = client.patch(f'/api/v1/manufacturing-orders/{response.data["result"]["id"]}/set-status/', {"status": "completed"}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,10 @@
+from rest_framework.routers import DefaultRouter
+from production.views import ManufacturingOrderViewSet
+from django.urls import path, include
+
+router = DefaultRouter()
+router.register(r'manufacturing-orders', ManufacturingOrderViewSet, basename='manufacturing-order')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -1,3 +1,171 @@
-from django.shortcuts import render
+from rest_framework import viewsets, status, filters, pagination
+from django.db import transaction
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.permissions import DjangoModelPermissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+from core.services.transactions import retry_on_serialization_failure
+from production.models import ManufacturingOrder
+from production.serializers import ManufacturingOrderSerializer
+from core.querysets import with_created_meta
 
-# Create your views here.
+
+class CustomDjangoModelPermissions(DjangoModelPermissions):
+    perms_map = {
+        'GET': ['%(app_label)s.view_%(model_name)s'],
+        'OPTIONS': [],
+        'HEAD': [],
+        'POST': ['%(app_label)s.add_%(model_name)s'],
+        'PUT': ['%(app_label)s.change_%(model_name)s'],
+        'PATCH': ['%(app_label)s.change_%(model_name)s'],
+        'DELETE': ['%(app_label)s.delete_%(model_name)s'],
+    }
+
+
+class CustomPagination(pagination.PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_paginated_response(self, data):
+        return Response({
+            "status": "success",
+            "message": "Manufacturing orders retrieved successfully",
+            "count": self.page.paginator.count,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data
+        })
+
+
+class ManufacturingOrderViewSet(viewsets.ModelViewSet):
+    http_method_names = ['get', 'post', 'patch', 'head', 'options', 'delete']
+    queryset = with_created_meta(ManufacturingOrder.objects.select_related('product')).order_by('-id')
+    serializer_class = ManufacturingOrderSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['product', 'status', 'mo_number']
+    search_fields = ['mo_number', 'description', 'product__name']
+    ordering_fields = ['id', 'mo_number', 'deadline', 'status']
+    pagination_class = CustomPagination
+    permission_classes = [CustomDjangoModelPermissions]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        context = {**self.get_serializer_context(), 'action': 'list'}
+        if page is not None:
+            serializer = self.get_serializer(page, many=True, context=context)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True, context=context)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, context={**self.get_serializer_context(), 'action': 'retrieve'})
+        return Response({
+            "status": "success",
+            "message": "Manufacturing order retrieved successfully",
+            "result": serializer.data
+        }, status=status.HTTP_200_OK)
+
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        return Response({
+            "status": "success",
+            "message": "Manufacturing order created successfully",
+            "result": response.data
+        }, status=status.HTTP_201_CREATED)
+
+    @transaction.atomic
+    def partial_update(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if instance.status != 'draft':
+            return Response({
+                "status": "error",
+                "message": _("Sadece taslak üretim emirleri düzenlenebilir.")
+            }, status=status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(instance, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response({
+            "status": "success",
+            "message": "Manufacturing order updated successfully",
+            "result": serializer.data
+        }, status=status.HTTP_200_OK)
+
+    @transaction.atomic
+    def destroy(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if instance.status == 'completed':
+            return Response({
+                "status": "error",
+                "message": _("Tamamlanmış üretim emirleri silinemez.")
+            }, status=status.HTTP_400_BAD_REQUEST)
+        instance.delete()
+        return Response({
+            "status": "success",
+            "message": "Manufacturing order soft deleted successfully"
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['patch'], url_path='set-status')
+    @retry_on_serialization_failure()
+    @transaction.atomic
+    def change_status(self, request, *args, **kwargs):
+        instance = self.get_object()
+        new_status = request.data.get('status')
+
+        if not new_status:
+            return Response({
+                "status": "error",
+                "message": _("Durum alanı gereklidir")
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        permission_map = {
+            'released': 'release_manufacturingorder',
+            'draft': 'release_manufacturingorder',
+            'completed': 'complete_manufacturingorder',
+            'cancelled': 'cancel_manufacturingorder',
+        }
+
+        required_permission = permission_map.get(new_status)
+        if required_permission and not request.user.has_perm(f'production.{required_permission}'):
+            return Response({
+                "status": "error",
+                "message": _("Bu durum değişikliği için yetkiniz bulunmamaktadır.")
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            instance.change_status(new_status, user=request.user)
+        except ValidationError as e:
+            return Response({
+                "status": "error",
+                "message": _("Doğrulama başarısız"),
+                "errors": e.message_dict if hasattr(e, 'message_dict') else e.messages
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except DRFValidationError as e:
+            # Stock checks of the backflush raise the DRF error
+            return Response({
+                "status": "error",
+                "message": _("Doğrulama başarısız"),
+                "errors": e.detail
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(instance)
+        return Response({
+            "status": "success",
+            "message": _("Üretim emri durumu %(status)s olarak başarıyla değiştirildi") % {'status': new_status},
+            "result": serializer.data
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'], url_path='allowed-transitions')
+    def allowed_transitions(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return Response({
+            "status": "success",
+            "current_status": instance.status,
+            "allowed_transitions": instance.get_allowed_transitions(user=request.user)
+        }, status=status.HTTP_200_OK)
@@ -40,6 +40,7 @@ urlpatterns = [
     path('api/v1/', include('inventory.urls')),
     path('api/v1/', include('sales.urls')),
     path('api/v1/', include('bom.urls')),
+    path('api/v1/', include('production.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
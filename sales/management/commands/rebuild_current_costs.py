@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from sales.models import CurrentCost
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the CurrentCost projection from VariableCost history'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = CurrentCost.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} current cost rows'))
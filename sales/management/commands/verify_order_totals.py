@@ -0,0 +1,44 @@
+from decimal import Decimal, ROUND_HALF_UP
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from procurement.models import ProcurementOrder
+from sales.models import SalesOrder
+
+CENT = Decimal('0.01')
+# Stored column -> with_totals() annotation it must match
+CHECKS = {
+    'subtotal': 'lines_subtotal',
+    'tax_total': 'lines_tax_total',
+    'grand_total': 'total_with_tax',
+    'open_quantity': 'lines_open_quantity',
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare the stored order totals with the order lines, optionally repairing drifted orders'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Recompute the stored totals of drifted orders')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Orders repaired per UPDATE (default: 1000)')
+
+    def handle(self, *args, **options):
+        for model in (ProcurementOrder, SalesOrder):
+            drifted = self.drifted(model)
+            label = model._meta.verbose_name
+            if not drifted:
+                self.stdout.write(self.style.SUCCESS(f'{label}: stored totals are consistent'))
+                continue
+            self.stdout.write(self.style.WARNING(f'{label}: {len(drifted)} orders with drifted totals'))
+            if options['repair']:
+                batch_size = options['batch_size']
+                with transaction.atomic():
+                    for start in range(0, len(drifted), batch_size):
+                        model.objects.all_with_deleted().filter(pk__in=drifted[start:start + batch_size]).refresh_totals()
+                self.stdout.write(self.style.SUCCESS(f'{label}: repaired {len(drifted)} orders'))
+
+    def drifted(self, model):
+        rows = model.objects.all_with_deleted().with_totals().values('pk', *CHECKS, *CHECKS.values())
+        return [
+            row['pk'] for row in rows.iterator()
+            if any(row[stored] != row[computed].quantize(CENT, rounding=ROUND_HALF_UP) for stored, computed in CHECKS.items())
+        ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:03
+
+import core.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_current_costs(apps, schema_editor):
+    VariableCost = apps.get_model('sales', 'VariableCost')
+    CurrentCost = apps.get_model('sales', 'CurrentCost')
+    live = VariableCost.objects.filter(deleted__isnull=True)
+    latest_ids = live.order_by().values('material_id', 'uom').annotate(latest_id=models.Max('id')).values('latest_id')
+    CurrentCost.objects.bulk_create([
+        CurrentCost(material_id=row.material_id, uom=row.uom, variable_cost=row, cost=row.cost, currency=row.currency)
+        for row in VariableCost.objects.filter(pk__in=models.Subquery(latest_ids)).iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bom', '0002_bom_uom_historicalbom_uom_alter_bom_unique_together_and_more'),
+        ('core', '0007_alter_historicalmaterial_costing_method_and_more'),
+        ('procurement', '0019_alter_historicalprocurementorder_due_in_days_and_more'),
+        ('sales', '0006_historicalsalesorderline_line_number_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurrentCost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uom', core.fields.UOMField(choices=[('ADT', 'Adet'), ('KG', 'Kilogram'), ('G', 'Gram'), ('L', 'Litre'), ('ML', 'Mililitre'), ('M', 'Metre'), ('BOX', 'Koli'), ('PLT', 'Palet')], default='ADT', max_length=4, verbose_name='Birim')),
+                ('cost', models.DecimalField(decimal_places=3, max_digits=30, verbose_name='Birim maliyeti')),
+                ('currency', core.fields.CurrencyField(choices=[('TRY', 'Türk Lirası'), ('USD', 'ABD Doları'), ('EUR', 'Euro'), ('GBP', 'İngiliz Sterlini'), ('RUB', 'Rus Rublesi')], default='TRY', max_length=6)),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncellendi')),
+            ],
+            options={
+                'verbose_name': 'Güncel Maliyet',
+                'verbose_name_plural': 'Güncel Maliyetler',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='variablecost',
+            index=models.Index(fields=['material', 'uom', '-id'], name='varcost_mat_uom_id_idx'),
+        ),
+        migrations.AddField(
+            model_name='currentcost',
+            name='material',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='current_costs', to='core.material', verbose_name='Malzeme'),
+        ),
+        migrations.AddField(
+            model_name='currentcost',
+            name='variable_cost',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sales.variablecost', verbose_name='Değişken Maliyet'),
+        ),
+        migrations.AddConstraint(
+            model_name='currentcost',
+            constraint=models.UniqueConstraint(fields=('material', 'uom'), name='currentcost_material_uom_uniq'),
+        ),
+        migrations.RunPython(backfill_current_costs, migrations.RunPython.noop),
+    ]
@@ -1,2 +1,3 @@
 from .sales_order import SalesOrder, SalesOrderLine
-from .variable_cost import VariableCost
\ No newline at end of file
+from .variable_cost import VariableCost
+from .current_cost import CurrentCost
@@ -0,0 +1,54 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from core.fields import CurrencyField, UOMField
+
+
+class CurrentCost(models.Model):
+    """
+    Projection of the latest live VariableCost per (material, uom).
+    Maintained by the VariableCost signals in sales/signals.py, rebuilt
+    from history with `manage.py rebuild_current_costs`.
+    """
+    material =      models.ForeignKey("core.Material", verbose_name=_("Malzeme"), related_name='current_costs', on_delete=models.CASCADE)
+    uom =           UOMField(null=False, blank=False)
+    variable_cost = models.OneToOneField("sales.VariableCost", verbose_name=_("Değişken Maliyet"), related_name='+', on_delete=models.CASCADE)
+    cost =          models.DecimalField(_("Birim maliyeti"), max_digits=30, decimal_places=3)
+    currency =      CurrencyField(null=False, blank=False)
+    updated_at =    models.DateTimeField(auto_now=True, verbose_name=_("Güncellendi"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['material', 'uom'], name='currentcost_material_uom_uniq'),
+        ]
+        verbose_name = _("Güncel Maliyet")
+        verbose_name_plural = _("Güncel Maliyetler")
+
+    @classmethod
+    def refresh(cls, material_id, uom):
+        """Points the (material, uom) row at the latest live VariableCost, or drops it."""
+        from sales.models import VariableCost
+        latest = VariableCost.objects.filter(material_id=material_id, uom=uom).order_by('-id').first()
+        if latest is None:
+            cls.objects.filter(material_id=material_id, uom=uom).delete()
+            return None
+        current, _created = cls.objects.update_or_create(
+            material_id=material_id, uom=uom,
+            defaults={'variable_cost': latest, 'cost': latest.cost, 'currency': latest.currency},
+        )
+        return current
+
+    @classmethod
+    def rebuild(cls):
+        """Recreates every row from VariableCost history. Returns the row count."""
+        from sales.models import VariableCost
+        latest_ids = (
+            VariableCost.objects.order_by().values('material_id', 'uom')
+            .annotate(latest_id=models.Max('id')).values('latest_id')
+        )
+        rows = VariableCost.objects.filter(pk__in=models.Subquery(latest_ids))
+        cls.objects.all().delete()
+        created = cls.objects.bulk_create([
+            cls(material_id=row.material_id, uom=row.uom, variable_cost=row, cost=row.cost, currency=row.currency)
+            for row in rows.iterator()
+        ], batch_size=1000)
+        return len(created)
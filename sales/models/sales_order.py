@@ -4,14 +4,20 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from safedelete import SOFT_DELETE, SOFT_DELETE_CASCADE
 from safedelete.models import SafeDeleteModel
+from safedelete.managers import SafeDeleteManager
 from simple_history.models import HistoricalRecords
 from core.fields import CurrencyField, UOMField
+from core.querysets import OrderTotalsModelMixin, OrderTotalsQuerySet, STORED_TOTAL_FIELDS
 from datetime import datetime, timedelta
 from django.core.exceptions import ValidationError
 from datetime import datetime, timedelta
 
 
-class SalesOrder(SafeDeleteModel):
+class SalesOrderQuerySet(OrderTotalsQuerySet):
+    done_field = 'quantity_sent'
+
+
+class SalesOrder(OrderTotalsModelMixin, SafeDeleteModel):
     _safedelete_policy = SOFT_DELETE_CASCADE
      
     PAYMENT_TERMS = [
@@ -74,7 +80,12 @@ class SalesOrder(SafeDeleteModel):
     currency = CurrencyField(null=False, blank=False)
     delivery_address = models.CharField(_('Teslimat Adresi'), max_length=250, null=True, blank=False)
     dispatch_ordered = models.BooleanField(_('Sevk emri verildi'), null = False, blank=False, default = False)
-    history = HistoricalRecords()
+    subtotal = models.DecimalField(_('Ara Toplam'), max_digits=32, decimal_places=2, default=Decimal('0.00'), editable=False)
+    tax_total = models.DecimalField(_('Vergi Toplamı'), max_digits=32, decimal_places=2, default=Decimal('0.00'), editable=False)
+    grand_total = models.DecimalField(_('Genel Toplam'), max_digits=32, decimal_places=2, default=Decimal('0.00'), editable=False)
+    open_quantity = models.DecimalField(_('Açık Miktar'), max_digits=21, decimal_places=2, default=Decimal('0.00'), editable=False)
+    history = HistoricalRecords(excluded_fields=STORED_TOTAL_FIELDS)
+    objects = SafeDeleteManager.from_queryset(SalesOrderQuerySet)()
     
     class Meta:
         permissions = [
@@ -84,6 +95,10 @@ class SalesOrder(SafeDeleteModel):
             ("cancel_salesorder", "Sales order cancel permission"),
             ("bill_salesorder", "Can set invoice issuance date, also means invoice is approved"),
         ]
+        indexes = [
+            # Per-customer reports read the stored totals from the index alone
+            models.Index(fields=['customer', 'status'], include=['grand_total', 'open_quantity'], name='so_customer_totals_idx'),
+        ]
 
     def __str__(self):
         return str(self.so_number)
@@ -101,34 +116,40 @@ class SalesOrder(SafeDeleteModel):
             self.so_number = f"{prefix}{year}{zeros}{pk_str}"[:16]
             super().save(update_fields=["so_number"])
             
+    def refresh_totals(self):
+        """Recomputes subtotal, tax_total, grand_total and open_quantity from the live lines."""
+        type(self).objects.all_with_deleted().filter(pk=self.pk).refresh_totals()
+        self.refresh_from_db(fields=STORED_TOTAL_FIELDS)
+
+    def _line_totals(self):
+        """(subtotal, tax_total) over the lines in one pass, used when the order was not loaded with_totals()."""
+        subtotal = tax_total = Decimal('0')
+        for line in self.lines.all(): # type: ignore
+            if line.unit_price is None or line.quantity is None:
+                continue
+            subtotal += line.unit_price * line.quantity
+            if line.tax_rate is not None:
+                tax_total += line.unit_price * line.quantity * line.tax_rate
+        return subtotal, tax_total
+
     @property
     def total_price_without_tax(self):
-        subtotal = sum(
-            (line.unit_price * line.quantity)
-            for line in self.lines.all() # type: ignore
-            if line.unit_price is not None and line.quantity is not None
-        )
-        discount = subtotal * (self.trade_discount + self.due_discount)
-        return subtotal - discount
+        if hasattr(self, 'total_without_tax'):
+            return self.total_without_tax
+        subtotal, _tax_total = self._line_totals()
+        return subtotal - subtotal * (self.trade_discount + self.due_discount)
 
     @property
     def total_price_with_tax(self):
-        subtotal = sum(
-            (line.unit_price * line.quantity)
-            for line in self.lines.all() # type: ignore
-            if line.unit_price is not None and line.quantity is not None
-        )
-        discount = subtotal * (self.trade_discount + self.due_discount)
-        subtotal_after_discount = subtotal - discount
-        tax_total = sum(
-            (line.unit_price * line.quantity * line.tax_rate)
-            for line in self.lines.all() # type: ignore
-            if line.unit_price is not None and line.quantity is not None and line.tax_rate is not None
-        )
-        return subtotal_after_discount + tax_total
+        if hasattr(self, 'total_with_tax'):
+            return self.total_with_tax
+        subtotal, tax_total = self._line_totals()
+        return subtotal - subtotal * (self.trade_discount + self.due_discount) + tax_total
 
     @property
     def all_sent(self):
+        if hasattr(self, 'all_done'):
+            return self.all_done
         return all(line.quantity_left <= 0 for line in self.lines.all()) # type: ignore
     
     @property
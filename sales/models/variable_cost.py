@@ -41,6 +41,7 @@ class VariableCost(SafeDeleteModel):
             models.Index(fields=['procurement_order'], name='varcost_proc_order_idx'),
             models.Index(fields=['user'], name='varcost_user_idx'),
             models.Index(fields=['bom'], name='varcost_bom_idx'),
+            models.Index(fields=['material', 'uom', '-id'], name='varcost_mat_uom_id_idx'),
         ]
         constraints = [
             models.CheckConstraint(
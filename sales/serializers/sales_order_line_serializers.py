@@ -1,12 +1,11 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
 from sales.models import SalesOrder, SalesOrderLine
 from core.serializers.material_serializers import MaterialSerializer
 
-class SalesOrderLineSerializer(serializers.ModelSerializer):
+class SalesOrderLineSerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
     material_internal_code = serializers.CharField(source='material.internal_code', read_only=True)
-    created_by = serializers.SerializerMethodField()
-    created_at = serializers.SerializerMethodField()
     so = serializers.PrimaryKeyRelatedField(queryset=SalesOrder.objects.all(), required=False)
 
     class Meta:
@@ -30,22 +29,6 @@ class SalesOrderLineSerializer(serializers.ModelSerializer):
             'created_at'
         ]
         
-    def get_created_by(self, obj):
-        first_history = getattr(obj, 'history', None)
-        if first_history:
-            first_history = first_history.order_by('history_date').first()
-            if first_history and hasattr(first_history, 'history_user') and first_history.history_user:
-                return str(first_history.history_user)
-        return None
-
-    def get_created_at(self, obj):
-        first_history = getattr(obj, 'history', None)
-        if first_history:
-            first_history = first_history.order_by('history_date').first()
-            if first_history:
-                return first_history.history_date
-        return None
-    
     def to_representation(self, instance):
         ret = super().to_representation(instance)
         action = self.context.get('action')
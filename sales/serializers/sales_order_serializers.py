@@ -1,12 +1,11 @@
 from rest_framework import serializers
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
 from sales.models import SalesOrder
 from sales.serializers.sales_order_line_serializers import SalesOrderLineSerializer
 
 
-class SalesOrderSerializer(serializers.ModelSerializer):
+class SalesOrderSerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
     count_of_lines = serializers.SerializerMethodField(read_only=True)
-    created_by = serializers.SerializerMethodField()
-    created_at = serializers.SerializerMethodField()
     customer_name = serializers.CharField(source='customer.name', read_only=True)
     lines = SalesOrderLineSerializer(many=True, required=False)
     
@@ -52,26 +51,18 @@ class SalesOrderSerializer(serializers.ModelSerializer):
             'created_at',
         ]
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if getattr(self.context.get('view'), 'action', None) == 'list':
+            # The list shows count_of_lines only, do not serialize lines just to pop them
+            fields.pop('lines', None)
+        return fields
+
     def get_count_of_lines(self, obj):
+        if hasattr(obj, 'line_count'):
+            return obj.line_count
         return obj.lines.count() if hasattr(obj, 'lines') else 0
 
-    def get_created_by(self, obj):
-        first_history = getattr(obj, 'history', None)
-        if first_history:
-            first_history = first_history.order_by('history_date').first()
-            if first_history and hasattr(first_history, 'history_user') and first_history.history_user:
-                return str(first_history.history_user)
-        return None
-
-    def get_created_at(self, obj):
-        first_history = getattr(obj, 'history', None)
-        if first_history:
-            first_history = first_history.order_by('history_date').first()
-            if first_history:
-                return first_history.history_date
-        return None
-    
-
     def create(self, validated_data):
         lines_data = validated_data.pop('lines', None)
         sales_order = SalesOrder.objects.create(**validated_data)
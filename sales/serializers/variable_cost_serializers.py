@@ -1,13 +1,12 @@
 from rest_framework import serializers
+from core.serializers.created_meta_serializers import CreatedMetaSerializerMixin
 from sales.models import VariableCost
 from core.serializers.material_serializers import MaterialSerializer
 
-class VariableCostSerializer(serializers.ModelSerializer):
+class VariableCostSerializer(CreatedMetaSerializerMixin, serializers.ModelSerializer):
     
     cost = serializers.DecimalField(max_digits=21, decimal_places=2, coerce_to_string=False)
     material_internal_code = serializers.CharField(source='material.internal_code', read_only=True)
-    created_at = serializers.SerializerMethodField()
-    created_by = serializers.SerializerMethodField()
     user = serializers.SerializerMethodField(read_only = True)
     bom = serializers.SerializerMethodField(read_only = True)
     procurement_order = serializers.SerializerMethodField(required = False, read_only= True)
@@ -53,22 +52,6 @@ class VariableCostSerializer(serializers.ModelSerializer):
             return str(obj.bom)
         return None
 
-    def get_created_by(self, obj):
-        first_history = getattr(obj, 'history', None)
-        if first_history:
-            first_history = first_history.order_by('history_date').first()
-            if first_history and hasattr(first_history, 'history_user') and first_history.history_user:
-                return str(first_history.history_user)
-        return None
-
-    def get_created_at(self, obj):
-        first_history = getattr(obj, 'history', None)
-        if first_history:
-            first_history = first_history.order_by('history_date').first()
-            if first_history:
-                return first_history.history_date
-        return None
-    
     def to_representation(self, instance):
         ret = super().to_representation(instance)
         
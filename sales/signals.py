@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from safedelete.signals import post_softdelete, post_undelete
+from sales.models import CurrentCost, SalesOrder, SalesOrderLine, VariableCost
+
+
+@receiver(post_save, sender=VariableCost)
+def update_current_cost(sender, instance, created, **kwargs):
+    if not created:
+        # An edited record may have moved to another (material, uom)
+        moved = CurrentCost.objects.filter(variable_cost=instance).exclude(material_id=instance.material_id, uom=instance.uom)
+        for current in moved:
+            current.delete()
+            CurrentCost.refresh(current.material_id, current.uom)
+    CurrentCost.refresh(instance.material_id, instance.uom)
+
+
+@receiver(post_softdelete, sender=VariableCost)
+@receiver(post_undelete, sender=VariableCost)
+@receiver(post_delete, sender=VariableCost)
+def refresh_current_cost(sender, instance, **kwargs):
+    CurrentCost.refresh(instance.material_id, instance.uom)
+
+
+@receiver(post_save, sender=SalesOrderLine)
+@receiver(post_softdelete, sender=SalesOrderLine)
+@receiver(post_undelete, sender=SalesOrderLine)
+def refresh_order_totals(sender, instance, **kwargs):
+    instance.so.refresh_totals()
+
+
+@receiver(post_delete, sender=SalesOrderLine)
+def refresh_order_totals_after_delete(sender, instance, **kwargs):
+    # The order may be going away in the same cascade, update it by id
+    SalesOrder.objects.all_with_deleted().filter(pk=instance.so_id).refresh_totals()
@@ -1 +1,98 @@
+from io import StringIO
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.models import Company, Material
+from sales.models import CurrentCost, SalesOrder, SalesOrderLine, VariableCost
+
+
+class CurrentCostTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="maliyet")
+        self.material = Material.objects.create(name="Test Malzeme", category="supplied")
+
+    def add_cost(self, cost, uom="ADT"):
+        return VariableCost.objects.create(
+            user=self.user, material=self.material, cost=Decimal(cost), currency="TRY", uom=uom
+        )
+
+    def test_projection_follows_creates_and_soft_deletes(self):
+        first = self.add_cost("10.000")
+        latest = self.add_cost("12.000")
+        self.add_cost("3.000", uom="KG")
+        self.assertEqual(self.material.latest_cost_for_uom("ADT"), Decimal("12.000"))
+        self.assertEqual(self.material.latest_cost, Decimal("3.000"))
+
+        latest.delete()
+        self.assertEqual(CurrentCost.objects.get(material=self.material, uom="ADT").variable_cost, first)
+        latest.undelete()
+        self.assertEqual(self.material.latest_cost_for_uom("ADT"), Decimal("12.000"))
+
+        first.delete()
+        latest.delete()
+        self.assertIsNone(self.material.latest_cost_for_uom("ADT"))
+
+    def test_edit_moving_a_cost_to_another_uom(self):
+        moved = self.add_cost("10.000")
+        moved.uom = "KG"
+        moved.save()
+        self.assertIsNone(self.material.latest_cost_for_uom("ADT"))
+        self.assertEqual(self.material.latest_cost_for_uom("KG"), Decimal("10.000"))
+
+    def test_rebuild_command(self):
+        self.add_cost("10.000")
+        self.add_cost("11.000")
+        CurrentCost.objects.all().delete()
+        call_command('rebuild_current_costs', stdout=StringIO())
+        self.assertEqual(CurrentCost.objects.get().cost, Decimal("11.000"))
+
+
+class SalesOrderQueryBudgetTest(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Test Müşteri", legal_name="Test Müşteri Ltd.")
+        self.material = Material.objects.create(name="Test Malzeme", category="good")
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="satis", is_superuser=True))
+
+    def make_so(self, line_count):
+        so = SalesOrder.objects.create(
+            customer=self.company, payment_term="CIA", payment_method="BANK_TRANSFER", incoterms="EXW",
+            due_in_days=timedelta(0), description="Test SO", currency="TRY", delivery_address="Test Address",
+        )
+        for _ in range(line_count):
+            SalesOrderLine.objects.create(
+                so=so, material=self.material, uom="ADT", quantity=Decimal("2"),
+                unit_price=Decimal("50.00"), tax_rate=Decimal("0.20"),
+            )
+        return so
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_list_page_has_a_fixed_query_budget(self):
+        self.make_so(1)
+        baseline, _response = self.count_queries('/api/v1/sales-orders/')
+        for _ in range(6):
+            self.make_so(3)
+        queries, response = self.count_queries('/api/v1/sales-orders/')
+        self.assertEqual(queries, baseline)
+        self.assertLessEqual(baseline, 3)
+        self.assertEqual(response.data["results"][0]["count_of_lines"], 3)
+        self.assertEqual(response.data["results"][0]["total_price_with_tax"], Decimal("360.00"))
+
+    def test_retrieve_does_not_grow_with_lines(self):
+        so = self.make_so(1)
+        baseline, _response = self.count_queries(f'/api/v1/sales-orders/{so.pk}/')
+        for _ in range(4):
+            SalesOrderLine.objects.create(so=so, material=self.material, uom="ADT", quantity=Decimal("1"), unit_price=Decimal("1.00"))
+        queries, response = self.count_queries(f'/api/v1/sales-orders/{so.pk}/')
+        self.assertEqual(queries, baseline)
+        self.assertEqual(len(response.data["result"]["lines"]), 5)
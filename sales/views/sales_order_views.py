@@ -1,10 +1,12 @@
 from rest_framework import viewsets, status, filters, pagination
 from django.db import transaction
 from rest_framework.response import Response
-from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.rest_framework import DjangoFilterBackend, FilterSet, NumberFilter
 from rest_framework.permissions import DjangoModelPermissions
-from sales.models import SalesOrder
+from django.db.models import Prefetch
+from sales.models import SalesOrder, SalesOrderLine
 from sales.serializers.sales_order_serializers import SalesOrderSerializer
+from core.querysets import with_created_meta
 
 
 class CustomDjangoModelPermissions(DjangoModelPermissions):
@@ -34,15 +36,37 @@ class CustomPagination(pagination.PageNumberPagination):
         })
         
         
+class SalesOrderFilter(FilterSet):
+    total_with_tax__gte = NumberFilter(field_name='total_with_tax', lookup_expr='gte')
+    total_with_tax__lte = NumberFilter(field_name='total_with_tax', lookup_expr='lte')
+
+    class Meta:
+        model = SalesOrder
+        fields = []
+
+
 class SalesOrderViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'delete']
-    queryset = SalesOrder.objects.all().order_by('-id')
+    queryset = with_created_meta(SalesOrder.objects.all()).order_by('-id')
     serializer_class = SalesOrderSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_class = SalesOrderFilter
     search_fields = ['description', 'so_number', 'customer__name']
-    ordering_fields = ['id']
+    ordering_fields = ['id', 'total_without_tax', 'total_with_tax', 'grand_total', 'open_quantity']
     pagination_class = CustomPagination
     permission_classes = [CustomDjangoModelPermissions]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Totals in SQL, the model properties read the annotations; everything the
+        # serializer touches is loaded up front so a page costs a fixed number of queries
+        if self.action == 'list':
+            queryset = queryset.with_totals().select_related('customer')
+        elif self.action == 'retrieve':
+            queryset = queryset.with_totals().select_related('customer').prefetch_related(
+                Prefetch('lines', queryset=with_created_meta(SalesOrderLine.objects.select_related('material'))),
+            )
+        return queryset
     
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
@@ -7,6 +7,7 @@ from rest_framework.decorators import action
 from safedelete.config import HARD_DELETE
 from sales.models import VariableCost
 from sales.serializers.variable_cost_serializers import VariableCostSerializer
+from core.querysets import with_created_meta
 
 class CustomDjangoModelPermissions(DjangoModelPermissions):
     perms_map = {
@@ -36,7 +37,7 @@ class CustomPagination(pagination.PageNumberPagination):
         
 class VariableCostViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'delete']
-    queryset = VariableCost.objects.all().order_by('-id')
+    queryset = with_created_meta(VariableCost.objects.select_related('material', 'user')).order_by('-id')
     serializer_class = VariableCostSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['material__name', 'material__description', 'material__internal_code']